@@ -23,9 +23,8 @@ def main():
     try:
         ast = parser.parse(lexer.tokenize(text))
         if ast is not None:
-            tree_output = ast.printTree()
-
-            with open('result.m', 'w') as output_file: output_file.write(tree_output)
+            # Lines go to the file as the tree is walked
+            with open('result.m', 'w') as output_file: ast.writeTree(output_file)
         
     except Exception as e:
         print(f"Error during parsing: {e}")
@@ -1,6 +1,12 @@
+# Nodes keep their fields in __slots__ rather than an instance __dict__: large
+# generated programs have millions of them. Annotations added by later passes
+# (`slot`, `types`, `vector_plan`, `invariants`, `update`) need slots of
+# their own.
 class Node:
-    def __init__(self):
-        self.lineno = 0
+    __slots__ = ('lineno',)
+
+    def __init__(self, lineno=0):
+        self.lineno = lineno
     
     def __str__(self):
         return self.printTree()
@@ -9,23 +15,30 @@ class Node:
 
 
 class Program(Node):
+    __slots__ = ('instructions',)
+
     def __init__(self, instructions):
-        super().__init__()
         self.instructions = instructions
+        self.lineno = 0
 
 
 class Instructions(Node):
+    __slots__ = ('instructions',)
+
     def __init__(self):
-        super().__init__()
         self.instructions = []
+        self.lineno = 0
     
     def add(self, instruction):
         self.instructions.append(instruction)
 
 # (+, -, , /, .+, .-, ., ./) 
+# TypeChecker notes the operand types it found in `types`, e.g. ('int',
+# 'float'), and their shapes, None where unknown, in `shapes`
 class BinExpr(Node):
+    __slots__ = ('op', 'left', 'right', 'types', 'shapes')
+
     def __init__(self, op, left, right, lineno=0):
-        super().__init__()
         self.op = op
         self.left = left
         self.right = right
@@ -33,8 +46,9 @@ class BinExpr(Node):
 
 # (<, >, <=, >=, ==, !=)
 class RelExpr(Node):
+    __slots__ = ('op', 'left', 'right')
+
     def __init__(self, op, left, right, lineno=0):
-        super().__init__()
         self.op = op
         self.left = left
         self.right = right
@@ -42,8 +56,9 @@ class RelExpr(Node):
 
 #  (=, +=, -=, *=, /=)
 class Assignment(Node):
+    __slots__ = ('op', 'left', 'right', 'update')
+
     def __init__(self, op, left, right, lineno=0):
-        super().__init__()
         self.op = op
         self.left = left
         self.right = right
@@ -51,8 +66,9 @@ class Assignment(Node):
 
 
 class If(Node):
+    __slots__ = ('condition', 'then_block', 'else_block')
+
     def __init__(self, condition, then_block, else_block=None, lineno=0):
-        super().__init__()
         self.condition = condition
         self.then_block = then_block
         self.else_block = else_block
@@ -60,16 +76,18 @@ class If(Node):
 
 
 class While(Node):
+    __slots__ = ('condition', 'body', 'invariants')
+
     def __init__(self, condition, body, lineno=0):
-        super().__init__()
         self.condition = condition
         self.body = body
         self.lineno = lineno
 
 
 class For(Node):
+    __slots__ = ('var', 'range', 'body', 'vector_plan', 'invariants')
+
     def __init__(self, var, range_expr, body, lineno=0):
-        super().__init__()
         self.var = var
         self.range = range_expr
         self.body = body
@@ -77,78 +95,146 @@ class For(Node):
 
 
 class Range(Node):
+    __slots__ = ('start', 'end')
+
     def __init__(self, start, end, lineno=0):
-        super().__init__()
         self.start = start
         self.end = end
         self.lineno = lineno
 
 
 class Break(Node):
+    __slots__ = ()
+
     def __init__(self, lineno=0):
-        super().__init__()
         self.lineno = lineno
 
 
 class Continue(Node):
+    __slots__ = ()
+
     def __init__(self, lineno=0):
-        super().__init__()
         self.lineno = lineno
 
 
 class Return(Node):
+    __slots__ = ('expr',)
+
     def __init__(self, expr, lineno=0):
-        super().__init__()
         self.expr = expr
         self.lineno = lineno
 
 
 class Print(Node):
+    __slots__ = ('values',)
+
     def __init__(self, values, lineno=0):
-        super().__init__()
         self.values = values
         self.lineno = lineno
 
 
 class IntNum(Node):
+    __slots__ = ('value',)
+
     def __init__(self, value, lineno=0):
-        super().__init__()
         self.value = value
         self.lineno = lineno
 
 
 class FloatNum(Node):
+    __slots__ = ('value',)
+
     def __init__(self, value, lineno=0):
-        super().__init__()
         self.value = value
         self.lineno = lineno
 
 
 class String(Node):
+    __slots__ = ('value',)
+
+    def __init__(self, value, lineno=0):
+        self.value = value
+        self.lineno = lineno
+
+
+# Value computed ahead of time by Optimizer, e.g. a matrix that is never mutated
+class Constant(Node):
+    __slots__ = ('value',)
+
     def __init__(self, value, lineno=0):
-        super().__init__()
         self.value = value
         self.lineno = lineno
 
 
+# Loop-invariant expression, evaluated once per entry into its loop; set up
+# by LoopInvariantMotion, which lists it in the loop's `invariants`
+class Invariant(Node):
+    __slots__ = ('expr', 'value', 'valid')
+
+    def __init__(self, expr, lineno=0):
+        self.expr = expr
+        self.value = None
+        self.valid = False
+        self.lineno = lineno
+
+
+# Occurrence of an expression repeated within a basic block, set up by
+# CommonSubexpressionElimination: the first one (`source` None) evaluates
+# `expr` and keeps the value, the later ones read it from their `source`
+class Common(Node):
+    __slots__ = ('expr', 'source', 'value')
+
+    def __init__(self, expr, source=None, lineno=0):
+        self.expr = expr
+        self.source = source
+        self.value = None
+        self.lineno = lineno
+
+
+# Chain of matrix products whose factors' shapes TypeChecker did not know,
+# multiplied in the cheapest order for their shapes at run time; set up by
+# MatrixChainOrdering
+class Product(Node):
+    __slots__ = ('factors',)
+
+    def __init__(self, factors, lineno=0):
+        self.factors = factors
+        self.lineno = lineno
+
+
+# Tree of element-wise operations, `expr`, run by ElementwiseFusion's
+# `kernel` on the values of its leaves, `operands`, in one pass over them
+class Fused(Node):
+    __slots__ = ('expr', 'operands', 'kernel')
+
+    def __init__(self, expr, operands, kernel, lineno=0):
+        self.expr = expr
+        self.operands = operands
+        self.kernel = kernel
+        self.lineno = lineno
+
+
 class Variable(Node):
+    __slots__ = ('name', 'slot')
+
     def __init__(self, name, lineno=0):
-        super().__init__()
         self.name = name
         self.lineno = lineno
 
 
 class VectorElement(Node):
+    __slots__ = ('name', 'index', 'slot')
+
     def __init__(self, name, index, lineno=0):
-        super().__init__()
         self.name = name
         self.index = index
         self.lineno = lineno
 
 
 class MatrixElement(Node):
+    __slots__ = ('name', 'row', 'col', 'slot')
+
     def __init__(self, name, row, col, lineno=0):
-        super().__init__()
         self.name = name
         self.row = row
         self.col = col
@@ -156,36 +242,41 @@ class MatrixElement(Node):
 
 
 class Matrix(Node):
+    __slots__ = ('rows',)
+
     def __init__(self, rows, lineno=0):
-        super().__init__()
         self.rows = rows
         self.lineno = lineno
 
 
 class Vector(Node):
+    __slots__ = ('elements',)
+
     def __init__(self, elements, lineno=0):
-        super().__init__()
         self.elements = elements
         self.lineno = lineno
 
 
 class MatrixFunction(Node):
+    __slots__ = ('name', 'size')
+
     def __init__(self, name, size, lineno=0):
-        super().__init__()
         self.name = name
         self.size = size
         self.lineno = lineno
 
 
 class UnaryMinus(Node):
+    __slots__ = ('expr',)
+
     def __init__(self, expr, lineno=0):
-        super().__init__()
         self.expr = expr
         self.lineno = lineno
 
 
 class Transposition(Node):
+    __slots__ = ('expr',)
+
     def __init__(self, expr, lineno=0):
-        super().__init__()
         self.expr = expr
         self.lineno = lineno
\ No newline at end of file
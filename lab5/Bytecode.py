@@ -0,0 +1,88 @@
+# Instruction set of the register machine run by VM.
+# Every instruction is a tuple (opcode, a, b, c); operands are register
+# indices unless stated otherwise, jump targets are instruction indices.
+
+HALT = 0        # stop execution
+MOVE = 1        # r[a] = r[b]
+
+ADD = 2         # r[a] = r[b] + r[c]
+SUB = 3         # r[a] = r[b] - r[c]
+MUL = 4         # r[a] = r[b] * r[c], r[b] @ r[c] for two arrays
+DIV = 5         # r[a] = r[b] / r[c]
+DOTADD = 6      # r[a] = np.add(r[b], r[c])
+DOTSUB = 7      # r[a] = np.subtract(r[b], r[c])
+DOTMUL = 8      # r[a] = np.multiply(r[b], r[c])
+DOTDIV = 9      # r[a] = np.divide(r[b], r[c])
+NEG = 10        # r[a] = -r[b]
+TRANSPOSE = 11  # r[a] = r[b].T
+
+JUMP = 12       # pc = a
+JTRUE = 13      # if r[a]: pc = b
+JLT = 14        # if r[a] < r[b]: pc = c
+JGT = 15        # if r[a] > r[b]: pc = c
+JLE = 16        # if r[a] <= r[b]: pc = c
+JGE = 17        # if r[a] >= r[b]: pc = c
+JEQ = 18        # if r[a] == r[b]: pc = c
+JNE = 19        # if r[a] != r[b]: pc = c
+
+FORINIT = 20    # r[a], r[a + 1] = int(r[b]), int(r[c])
+FORLOOP = 21    # if r[a] <= r[a + 1]: r[b] = r[a]; r[a] += 1; pc = c
+
+GETITEM = 22    # r[a] = r[b][r[c]]
+SETITEM = 23    # r[a][r[b]] = r[c]
+ARRAY = 24      # r[a] = np.array(r[b:b + c])
+CALL = 25       # r[a] = r[b]()
+PRINT = 26      # print(*r[a:a + b])
+RETURN = 27     # raise ReturnValueException(r[a])
+
+OPNAMES = {value: name for name, value in globals().items()
+           if name.isupper() and isinstance(value, int)}
+
+BINARY_OPS = {
+    '+': ADD,
+    '-': SUB,
+    '*': MUL,
+    '/': DIV,
+    '.+': DOTADD,
+    '.-': DOTSUB,
+    '.*': DOTMUL,
+    './': DOTDIV,
+}
+
+COMPOUND_OPS = {
+    '+=': ADD,
+    '-=': SUB,
+    '*=': MUL,
+    '/=': DIV,
+}
+
+BRANCH_OPS = {
+    '<': JLT,
+    '>': JGT,
+    '<=': JLE,
+    '>=': JGE,
+    '==': JEQ,
+    '!=': JNE,
+}
+
+
+class Code:
+    def __init__(self, instructions, registers, names):
+        self.instructions = instructions
+        # Initial register file: variables start as None, constants are
+        # pooled in their own registers, the rest are temporaries.
+        self.registers = registers
+        # Variable name -> register index
+        self.names = names
+
+    def disassemble(self):
+        reg_names = {reg: name for name, reg in self.names.items()}
+        lines = []
+        for reg, value in enumerate(self.registers):
+            if reg in reg_names:
+                lines.append(f"r{reg}\t{reg_names[reg]}")
+            elif value is not None:
+                lines.append(f"r{reg}\tconst {value!r}")
+        for pc, (op, a, b, c) in enumerate(self.instructions):
+            lines.append(f"{pc:5d}  {OPNAMES[op]:<10}{a:>5}{b:>5}{c:>5}")
+        return "\n".join(lines)
@@ -0,0 +1,251 @@
+import AST
+from Memory import *
+from Exceptions import *
+from visit import *
+from Interpreter import BINARY_OPS, RELATIONAL_OPS, COMPOUND_OPS
+import numpy as np
+
+
+CONSTANTS = (AST.IntNum, AST.FloatNum, AST.String, AST.Constant)
+
+
+# Turns every AST node into a Python closure once, so running the program
+# costs plain function calls instead of a dispatch per visited node.
+class ClosureCompiler(CachedDispatch):
+    def __init__(self, memory_stack=None):
+        if memory_stack is None:
+            memory_stack = MemoryStack(Memory("global"))
+        self.memory_stack = memory_stack
+
+    def compile(self, node):
+        return self.visit(node)
+
+    @on('node')
+    def visit(self, node):
+        pass
+
+    @when(AST.Program)
+    def visit(self, node):
+        return self.visit(node.instructions)
+
+    @when(AST.Instructions)
+    def visit(self, node):
+        body = tuple(self.visit(instruction) for instruction in node.instructions)
+        if len(body) == 1:
+            return body[0]
+
+        def run():
+            for instruction in body:
+                instruction()
+        return run
+
+    @when(AST.BinExpr)
+    def visit(self, node):
+        op = BINARY_OPS[node.op]
+        left = self.visit(node.left)
+        # Constant operands are captured by value instead of being called
+        if isinstance(node.right, CONSTANTS):
+            right = node.right.value
+            return lambda: op(left(), right)
+        if isinstance(node.left, CONSTANTS):
+            left = node.left.value
+            right = self.visit(node.right)
+            return lambda: op(left, right())
+        right = self.visit(node.right)
+        return lambda: op(left(), right())
+
+    @when(AST.RelExpr)
+    def visit(self, node):
+        op = RELATIONAL_OPS[node.op]
+        left = self.visit(node.left)
+        if isinstance(node.right, CONSTANTS):
+            right = node.right.value
+            return lambda: op(left(), right)
+        right = self.visit(node.right)
+        return lambda: op(left(), right())
+
+    @when(AST.Assignment)
+    def visit(self, node):
+        value = self.visit(node.right)
+        get = self.memory_stack.get
+        store = self.memory_stack.set
+
+        if isinstance(node.left, AST.Variable):
+            name = node.left.name
+            if node.op == '=':
+                return lambda: store(name, value())
+            op = COMPOUND_OPS[node.op]
+            return lambda: store(name, op(get(name), value()))
+
+        if isinstance(node.left, AST.VectorElement):
+            index = node.left.index
+        else:
+            index = (node.left.row, node.left.col)
+        name = node.left.name
+
+        # Evaluate the value before looking the container up, like Interpreter
+        def run():
+            result = value()
+            get(name)[index] = result
+        return run
+
+    @when(AST.If)
+    def visit(self, node):
+        condition = self.visit(node.condition)
+        then_block = self.visit(node.then_block)
+        if not node.else_block:
+            def run():
+                if condition():
+                    then_block()
+            return run
+
+        else_block = self.visit(node.else_block)
+
+        def run():
+            if condition():
+                then_block()
+            else:
+                else_block()
+        return run
+
+    @when(AST.While)
+    def visit(self, node):
+        condition = self.visit(node.condition)
+        body = self.visit(node.body)
+
+        def run():
+            try:
+                while condition():
+                    try:
+                        body()
+                    except ContinueException:
+                        continue
+            except BreakException:
+                pass
+        return run
+
+    @when(AST.For)
+    def visit(self, node):
+        start = self.visit(node.range.start)
+        end = self.visit(node.range.end)
+        body = self.visit(node.body)
+        name = node.var.name
+        store = self.memory_stack.set
+
+        def run():
+            try:
+                for i in range(int(start()), int(end()) + 1):
+                    store(name, i)
+                    try:
+                        body()
+                    except ContinueException:
+                        continue
+            except BreakException:
+                pass
+        return run
+
+    @when(AST.Range)
+    def visit(self, node):
+        start = self.visit(node.start)
+        end = self.visit(node.end)
+        return lambda: range(int(start()), int(end()) + 1)
+
+    @when(AST.Break)
+    def visit(self, node):
+        def run():
+            raise BreakException()
+        return run
+
+    @when(AST.Continue)
+    def visit(self, node):
+        def run():
+            raise ContinueException()
+        return run
+
+    @when(AST.Return)
+    def visit(self, node):
+        expr = self.visit(node.expr)
+
+        def run():
+            raise ReturnValueException(expr())
+        return run
+
+    @when(AST.Print)
+    def visit(self, node):
+        values = tuple(self.visit(val) for val in node.values)
+        return lambda: print(' '.join(str(value()) for value in values))
+
+    @when(AST.IntNum)
+    def visit(self, node):
+        value = node.value
+        return lambda: value
+
+    @when(AST.FloatNum)
+    def visit(self, node):
+        value = node.value
+        return lambda: value
+
+    @when(AST.String)
+    def visit(self, node):
+        value = node.value
+        return lambda: value
+
+    @when(AST.Constant)
+    def visit(self, node):
+        value = node.value
+        return lambda: value
+
+    @when(AST.Variable)
+    def visit(self, node):
+        get = self.memory_stack.get
+        name = node.name
+        return lambda: get(name)
+
+    @when(AST.VectorElement)
+    def visit(self, node):
+        get = self.memory_stack.get
+        name = node.name
+        index = node.index
+        return lambda: get(name)[index]
+
+    @when(AST.MatrixElement)
+    def visit(self, node):
+        get = self.memory_stack.get
+        name = node.name
+        index = (node.row, node.col)
+        return lambda: get(name)[index]
+
+    @when(AST.Vector)
+    def visit(self, node):
+        elements = tuple(self.visit(elem) for elem in node.elements)
+        return lambda: np.array([elem() for elem in elements])
+
+    @when(AST.Matrix)
+    def visit(self, node):
+        rows = tuple(self.visit(row) for row in node.rows)
+        return lambda: np.array([row() for row in rows])
+
+    @when(AST.MatrixFunction)
+    def visit(self, node):
+        if isinstance(node.size, tuple):
+            rows, cols = node.size
+        else:
+            rows = cols = node.size
+
+        if node.name == 'zeros':
+            return lambda: np.zeros((rows, cols))
+        elif node.name == 'ones':
+            return lambda: np.ones((rows, cols))
+        elif node.name == 'eye':
+            return lambda: np.eye(rows, cols)
+        return lambda: None
+
+    @when(AST.UnaryMinus)
+    def visit(self, node):
+        expr = self.visit(node.expr)
+        return lambda: -expr()
+
+    @when(AST.Transposition)
+    def visit(self, node):
+        expr = self.visit(node.expr)
+        return lambda: expr().T
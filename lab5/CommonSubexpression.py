@@ -0,0 +1,230 @@
+import copy
+import AST
+from TypeChecker import NodeVisitor
+from LoopInvariant import reads
+from visit import trampoline
+
+# Worth evaluating once for several occurrences; built by the parser from
+# leaves and other such expressions, without side effects
+COMPOUND = (AST.BinExpr, AST.RelExpr, AST.UnaryMinus, AST.Transposition)
+
+# Fields of the leaves telling them apart
+LEAVES = {
+    AST.IntNum: ('value',),
+    AST.FloatNum: ('value',),
+    AST.String: ('value',),
+    AST.Variable: ('name',),
+    AST.VectorElement: ('name', 'index'),
+    AST.MatrixElement: ('name', 'row', 'col'),
+    AST.MatrixFunction: ('name', 'size'),
+}
+
+# Statements executed one after another; any other one ends a basic block
+STRAIGHT_LINE = (AST.Assignment, AST.Print, AST.Return)
+
+
+def key(value):
+    # Shared expressions, strings and numbers stand for themselves, leaves
+    # for their fields; anything else only equals itself
+    for cls, fields in LEAVES.items():
+        if isinstance(value, cls):
+            return (cls.__name__,) + tuple(getattr(value, field) for field in fields)
+    return value
+
+
+def interning(cls):
+    name = cls.__name__
+
+    def build(self, *fields, lineno=0):
+        signature = (name,) + tuple(key(field) for field in fields)
+        node = self.table.get(signature)
+        self.built += 1
+        if node is None:
+            node = self.table[signature] = getattr(self.nodes, name)(*fields, lineno=lineno)
+        else:
+            self.shared += 1
+        return node
+    build.__name__ = name
+    return build
+
+
+# Stands in for Mparser's `nodes` (the AST module or a FlatAST.Builder):
+# structurally identical compound expressions come back as one shared node,
+# the one built first, so errors in a repeated expression report its first
+# line. Leaves stay apart: each assignment target and variable keeps its own.
+class HashConsing(object):
+    def __init__(self, nodes=AST):
+        self.nodes = nodes
+        self.table = {}
+        self.built = self.shared = 0
+
+    def __getattr__(self, name):
+        return getattr(self.nodes, name)
+
+    def report(self):
+        return (f"Hash-consing: {self.shared} of {self.built} expression nodes shared, "
+                f"{len(self.table)} distinct")
+
+
+for cls in COMPOUND:
+    setattr(HashConsing, cls.__name__, interning(cls))
+
+
+class Group(object):
+    def __init__(self):
+        self.count = 1
+        self.node = None
+
+
+# Evaluates an expression occurring several times in a basic block (one
+# shared node, see HashConsing) once: its first occurrence becomes a Common
+# keeping the value, the next ones Commons reading it, until a statement
+# assigns one of the names it reads. Element stores end every group, as they
+# can change any array through an alias. Like LoopInvariantMotion, only
+# occurrences whose value is read and never bound to a name take part.
+# Each block is scanned first, recording in `plan` the group of every
+# occurrence in evaluation order, then rewritten copying shared parents.
+class CommonSubexpressionElimination(NodeVisitor):
+    def __init__(self):
+        self.groups = 0
+        self.reused = 0
+        # Evaluations skipped at run time, counted by Interpreter
+        self.saved = 0
+
+    def report(self):
+        return (f"CSE: {self.groups} expressions evaluated once for {self.groups + self.reused} "
+                f"occurrences, {self.saved} evaluations saved")
+
+    def visit_Program(self, node):
+        yield node.instructions
+
+    def visit_Instructions(self, node):
+        block = []
+        for instruction in node.instructions:
+            if isinstance(instruction, STRAIGHT_LINE):
+                block.append(instruction)
+                continue
+            self.block(block)
+            block = []
+            yield instruction
+        self.block(block)
+
+    def visit_Assignment(self, node):
+        self.block([node])
+
+    def visit_Print(self, node):
+        self.block([node])
+
+    def visit_Return(self, node):
+        self.block([node])
+
+    def visit_If(self, node):
+        yield node.then_block
+        if node.else_block:
+            yield node.else_block
+
+    def visit_While(self, node):
+        yield node.body
+
+    def visit_For(self, node):
+        yield node.body
+
+    def block(self, statements):
+        if len(statements) == 0:
+            return
+        self.available = {}
+        self.readers = {}
+        self.plan = []
+        for statement in statements:
+            self.scan_statement(statement)
+        self.plan = iter(self.plan)
+        for statement in statements:
+            self.rewrite_statement(statement)
+        self.available = self.readers = self.plan = self.reads = None
+
+    # Scanning; scan and rewrite yield (operand, readonly) pairs to
+    # trampoline, which sends back what the operand's call returns
+
+    def scan_statement(self, node):
+        if isinstance(node, AST.Assignment):
+            # `=` binds the value to a name, every other store copies it
+            self.scan(node.right, node.op != '=' or not isinstance(node.left, AST.Variable))
+            if isinstance(node.left, AST.Variable):
+                for expr in self.readers.pop(node.left.name, ()):
+                    self.available.pop(expr, None)
+            else:
+                self.available.clear()
+                self.readers.clear()
+        elif isinstance(node, AST.Print):
+            for val in node.values:
+                self.scan(val, True)
+        else:
+            self.scan(node.expr, True)
+
+    def scan(self, expr, readonly):
+        self.reads = reads(expr)
+        trampoline(self.scanning, (expr, readonly))
+
+    def scanning(self, item):
+        expr, readonly = item
+        if not isinstance(expr, COMPOUND):
+            return
+        if readonly:
+            group = self.available.get(expr)
+            if group is not None:
+                group.count += 1
+                self.plan.append(group)
+                return
+            group = self.available[expr] = Group()
+            self.plan.append(group)
+            for name in self.reads[expr]:
+                self.readers.setdefault(name, []).append(expr)
+        if isinstance(expr, (AST.BinExpr, AST.RelExpr)):
+            yield expr.left, True
+            yield expr.right, True
+        elif isinstance(expr, AST.UnaryMinus):
+            yield expr.expr, True
+        else:
+            yield expr.expr, readonly
+
+    # Rewriting, in the order of scanning
+
+    def rewrite_statement(self, node):
+        if isinstance(node, AST.Assignment):
+            node.right = self.rewrite(node.right, node.op != '=' or not isinstance(node.left, AST.Variable))
+        elif isinstance(node, AST.Print):
+            node.values = [self.rewrite(val, True) for val in node.values]
+        else:
+            node.expr = self.rewrite(node.expr, True)
+
+    def rewrite(self, expr, readonly):
+        return trampoline(self.rewriting, (expr, readonly))
+
+    def rewriting(self, item):
+        expr, readonly = item
+        if not isinstance(expr, COMPOUND):
+            return expr
+        group = next(self.plan) if readonly else None
+        if group is not None and group.node is not None:
+            self.reused += 1
+            return AST.Common(expr, group.node, lineno=expr.lineno)
+
+        if isinstance(expr, (AST.BinExpr, AST.RelExpr)):
+            operands = expr.left, expr.right
+            left = yield expr.left, True
+            right = yield expr.right, True
+            if (left, right) != operands:
+                expr = copy.copy(expr)
+                expr.left, expr.right = left, right
+        else:
+            operand = expr.expr
+            rewritten = yield operand, readonly or isinstance(expr, AST.UnaryMinus)
+            if rewritten is not operand:
+                expr = copy.copy(expr)
+                expr.expr = rewritten
+
+        if group is not None and group.count > 1:
+            group.node = AST.Common(expr, lineno=expr.lineno)
+            self.groups += 1
+            return group.node
+        return expr
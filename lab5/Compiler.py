@@ -0,0 +1,301 @@
+import AST
+from Bytecode import *
+from visit import *
+from functools import partial
+import numpy as np
+
+
+class Compiler(CachedDispatch):
+    def __init__(self):
+        self.instructions = []
+        self.registers = []
+        self.names = {}
+        self.consts = {}
+        self.temps = set()
+        self.free = []
+        # (break jumps, continue jumps) of every enclosing loop
+        self.loops = []
+
+    def compile(self, node):
+        self.visit(node)
+        self.emit(HALT)
+        return Code(self.instructions, self.registers, self.names)
+
+    def emit(self, op, a=0, b=0, c=0):
+        self.instructions.append((op, a, b, c))
+        return len(self.instructions) - 1
+
+    def patch(self, pc, target):
+        op, a, b, c = self.instructions[pc]
+        if op == JUMP:
+            self.instructions[pc] = (op, target, b, c)
+        elif op == JTRUE:
+            self.instructions[pc] = (op, a, target, c)
+        else:
+            self.instructions[pc] = (op, a, b, target)
+
+    def here(self):
+        return len(self.instructions)
+
+    def new_register(self, value=None):
+        self.registers.append(value)
+        return len(self.registers) - 1
+
+    def var(self, name):
+        if name not in self.names:
+            self.names[name] = self.new_register()
+        return self.names[name]
+
+    def const(self, value):
+        # 1, 1.0 and True compare equal, so the type is part of the key
+        key = (type(value), value)
+        if key not in self.consts:
+            self.consts[key] = self.new_register(value)
+        return self.consts[key]
+
+    def temp(self):
+        reg = self.free.pop() if self.free else self.new_register()
+        self.temps.add(reg)
+        return reg
+
+    def release(self, *regs):
+        for reg in regs:
+            if reg in self.temps:
+                self.temps.discard(reg)
+                self.free.append(reg)
+
+    def block(self, size):
+        # Consecutive registers for instructions taking a register range
+        start = len(self.registers)
+        for _ in range(size):
+            self.temps.add(self.new_register())
+        return start
+
+    def target(self, dst):
+        return self.temp() if dst is None else dst
+
+    def move(self, src, dst):
+        if dst is None or dst == src:
+            return src
+        self.emit(MOVE, dst, src)
+        return dst
+
+    def branch(self, condition):
+        # Emits a jump taken when the condition holds and returns its position
+        if isinstance(condition, AST.RelExpr):
+            left = self.visit(condition.left)
+            right = self.visit(condition.right)
+            self.release(left, right)
+            return self.emit(BRANCH_OPS[condition.op], left, right)
+        value = self.visit(condition)
+        self.release(value)
+        return self.emit(JTRUE, value)
+
+    @on('node')
+    def visit(self, node, dst=None):
+        pass
+
+    @when(AST.Program)
+    def visit(self, node, dst=None):
+        self.visit(node.instructions)
+
+    @when(AST.Instructions)
+    def visit(self, node, dst=None):
+        for instruction in node.instructions:
+            self.visit(instruction)
+
+    @when(AST.BinExpr)
+    def visit(self, node, dst=None):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        self.release(left, right)
+        dst = self.target(dst)
+        self.emit(BINARY_OPS[node.op], dst, left, right)
+        return dst
+
+    @when(AST.RelExpr)
+    def visit(self, node, dst=None):
+        dst = self.target(dst)
+        jump_true = self.branch(node)
+        self.emit(MOVE, dst, self.const(False))
+        jump_end = self.emit(JUMP)
+        self.patch(jump_true, self.here())
+        self.emit(MOVE, dst, self.const(True))
+        self.patch(jump_end, self.here())
+        return dst
+
+    @when(AST.Assignment)
+    def visit(self, node, dst=None):
+        if isinstance(node.left, AST.Variable):
+            var = self.var(node.left.name)
+            if node.op == '=':
+                self.visit(node.right, var)
+            else:
+                value = self.visit(node.right)
+                self.release(value)
+                self.emit(COMPOUND_OPS[node.op], var, var, value)
+
+        elif isinstance(node.left, AST.VectorElement):
+            value = self.visit(node.right)
+            self.release(value)
+            self.emit(SETITEM, self.var(node.left.name), self.const(node.left.index), value)
+
+        elif isinstance(node.left, AST.MatrixElement):
+            value = self.visit(node.right)
+            self.release(value)
+            index = (node.left.row, node.left.col)
+            self.emit(SETITEM, self.var(node.left.name), self.const(index), value)
+
+    @when(AST.If)
+    def visit(self, node, dst=None):
+        # The else branch falls through, the then branch is jumped to
+        jump_then = self.branch(node.condition)
+        if node.else_block:
+            self.visit(node.else_block)
+        jump_end = self.emit(JUMP)
+        self.patch(jump_then, self.here())
+        self.visit(node.then_block)
+        self.patch(jump_end, self.here())
+
+    @when(AST.While)
+    def visit(self, node, dst=None):
+        # Condition is tested at the bottom, so an iteration costs one jump
+        jump_test = self.emit(JUMP)
+        body = self.here()
+        self.loops.append(([], []))
+        self.visit(node.body)
+        breaks, continues = self.loops.pop()
+        test = self.here()
+        self.patch(jump_test, test)
+        self.patch(self.branch(node.condition), body)
+        self.close_loop(test, breaks, continues)
+
+    @when(AST.For)
+    def visit(self, node, dst=None):
+        start = self.visit(node.range.start)
+        end = self.visit(node.range.end)
+        self.release(start, end)
+        counter = self.new_register()
+        self.new_register()
+        self.emit(FORINIT, counter, start, end)
+        jump_test = self.emit(JUMP)
+        body = self.here()
+        self.loops.append(([], []))
+        self.visit(node.body)
+        breaks, continues = self.loops.pop()
+        test = self.here()
+        self.patch(jump_test, test)
+        self.emit(FORLOOP, counter, self.var(node.var.name), body)
+        self.close_loop(test, breaks, continues)
+
+    def close_loop(self, test, breaks, continues):
+        for pc in breaks:
+            self.patch(pc, self.here())
+        for pc in continues:
+            self.patch(pc, test)
+
+    @when(AST.Break)
+    def visit(self, node, dst=None):
+        self.loops[-1][0].append(self.emit(JUMP))
+
+    @when(AST.Continue)
+    def visit(self, node, dst=None):
+        self.loops[-1][1].append(self.emit(JUMP))
+
+    @when(AST.Return)
+    def visit(self, node, dst=None):
+        value = self.visit(node.expr)
+        self.release(value)
+        self.emit(RETURN, value)
+
+    @when(AST.Print)
+    def visit(self, node, dst=None):
+        start = self.block(len(node.values))
+        for i, val in enumerate(node.values):
+            self.visit(val, start + i)
+        self.emit(PRINT, start, len(node.values))
+        self.release(*range(start, start + len(node.values)))
+
+    @when(AST.IntNum)
+    def visit(self, node, dst=None):
+        return self.move(self.const(node.value), dst)
+
+    @when(AST.FloatNum)
+    def visit(self, node, dst=None):
+        return self.move(self.const(node.value), dst)
+
+    @when(AST.String)
+    def visit(self, node, dst=None):
+        return self.move(self.const(node.value), dst)
+
+    @when(AST.Constant)
+    def visit(self, node, dst=None):
+        # Arrays are unhashable, so these are not pooled
+        return self.move(self.new_register(node.value), dst)
+
+    @when(AST.Variable)
+    def visit(self, node, dst=None):
+        return self.move(self.var(node.name), dst)
+
+    @when(AST.VectorElement)
+    def visit(self, node, dst=None):
+        dst = self.target(dst)
+        self.emit(GETITEM, dst, self.var(node.name), self.const(node.index))
+        return dst
+
+    @when(AST.MatrixElement)
+    def visit(self, node, dst=None):
+        dst = self.target(dst)
+        self.emit(GETITEM, dst, self.var(node.name), self.const((node.row, node.col)))
+        return dst
+
+    @when(AST.Vector)
+    def visit(self, node, dst=None):
+        return self.array(node.elements, dst)
+
+    @when(AST.Matrix)
+    def visit(self, node, dst=None):
+        return self.array(node.rows, dst)
+
+    def array(self, items, dst):
+        start = self.block(len(items))
+        for i, item in enumerate(items):
+            self.visit(item, start + i)
+        self.release(*range(start, start + len(items)))
+        dst = self.target(dst)
+        self.emit(ARRAY, dst, start, len(items))
+        return dst
+
+    @when(AST.MatrixFunction)
+    def visit(self, node, dst=None):
+        if isinstance(node.size, tuple):
+            rows, cols = node.size
+        else:
+            rows = cols = node.size
+
+        if node.name == 'zeros':
+            factory = partial(np.zeros, (rows, cols))
+        elif node.name == 'ones':
+            factory = partial(np.ones, (rows, cols))
+        else:
+            factory = partial(np.eye, rows, cols)
+        # Matrices are mutable, so a fresh one is built on every evaluation
+        dst = self.target(dst)
+        self.emit(CALL, dst, self.new_register(factory))
+        return dst
+
+    @when(AST.UnaryMinus)
+    def visit(self, node, dst=None):
+        value = self.visit(node.expr)
+        self.release(value)
+        dst = self.target(dst)
+        self.emit(NEG, dst, value)
+        return dst
+
+    @when(AST.Transposition)
+    def visit(self, node, dst=None):
+        value = self.visit(node.expr)
+        self.release(value)
+        dst = self.target(dst)
+        self.emit(TRANSPOSE, dst, value)
+        return dst
@@ -0,0 +1,100 @@
+import os
+import json
+
+
+# Files named after a hash of what they hold, kept in one directory whose
+# size is bounded: once the files with the given suffix add up to more than
+# max_bytes, the least recently used ones are removed. Reading a file
+# through `read` makes it the most recently used one.
+class DiskCache(object):
+    def __init__(self, directory, max_bytes, suffix):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+
+    def read(self, path):
+        # The bytes stored at path, or None
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def write(self, path, data):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as file:
+                file.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        self.evict()
+
+    def entries(self):
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(self.suffix)]
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        evicted = 0
+        for _, entry_size, name in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            size -= entry_size
+            evicted += 1
+        if evicted:
+            self.count('evictions', evicted)
+
+    # Hit/miss counters shared by every process using the directory
+
+    def stats(self):
+        try:
+            with open(os.path.join(self.directory, "stats.json"), "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def count(self, key, n=1):
+        stats = self.stats()
+        stats[key] = stats.get(key, 0) + n
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, "stats.json")
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as file:
+                json.dump(stats, file)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def report(self, name="Cache"):
+        stats = self.stats()
+        entries = self.entries()
+        lookups = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / lookups if lookups else 0.0
+        return (f"{name}: {stats['hits']} hits, {stats['misses']} misses ({ratio:.0%} hit rate), "
+                f"{stats['evictions']} evicted, {len(entries)} entries, "
+                f"{sum(size for _, size, _ in entries)} of {self.max_bytes} bytes")
+
+    def clear(self):
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else ():
+            if name.endswith(self.suffix) or name == "stats.json":
+                os.remove(os.path.join(self.directory, name))
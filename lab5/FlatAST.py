@@ -0,0 +1,386 @@
+import mmap
+import pickle
+import struct
+from array import array
+import AST
+
+# Struct-of-arrays storage for the AST: node i has its kind in kinds[i], its
+# line number in linenos[i] and up to three fields in operands[3*i:3*i+3].
+# A field is one of
+#   NODE  another node: its index, -1 for None, or -2-k for objects[k], a
+#         node that is not stored in the arrays (Invariant, Constant, ...)
+#   LIST  offset into `children`, holding the count and then the NODE cells
+#   ATOM  index into `atoms`: operators, names, literals and sizes
+#   INT   an integer literal, stored in the cell itself if it fits, and as
+#         -1-k for atoms[k] otherwise
+# Views subclass the AST classes and read their fields from the arrays, so
+# visitors dispatching on node classes traverse a FlatTree unchanged.
+NODE, LIST, ATOM, INT = range(4)
+
+FIELDS = {
+    AST.Program: (('instructions', NODE),),
+    AST.Instructions: (('instructions', LIST),),
+    AST.BinExpr: (('op', ATOM), ('left', NODE), ('right', NODE)),
+    AST.RelExpr: (('op', ATOM), ('left', NODE), ('right', NODE)),
+    AST.Assignment: (('op', ATOM), ('left', NODE), ('right', NODE)),
+    AST.If: (('condition', NODE), ('then_block', NODE), ('else_block', NODE)),
+    AST.While: (('condition', NODE), ('body', NODE)),
+    AST.For: (('var', NODE), ('range', NODE), ('body', NODE)),
+    AST.Range: (('start', NODE), ('end', NODE)),
+    AST.Break: (),
+    AST.Continue: (),
+    AST.Return: (('expr', NODE),),
+    AST.Print: (('values', LIST),),
+    AST.IntNum: (('value', INT),),
+    AST.FloatNum: (('value', ATOM),),
+    AST.String: (('value', ATOM),),
+    AST.Variable: (('name', ATOM),),
+    AST.VectorElement: (('name', ATOM), ('index', ATOM)),
+    AST.MatrixElement: (('name', ATOM), ('row', ATOM), ('col', ATOM)),
+    AST.Matrix: (('rows', LIST),),
+    AST.Vector: (('elements', LIST),),
+    AST.MatrixFunction: (('name', ATOM), ('size', ATOM)),
+    AST.UnaryMinus: (('expr', NODE),),
+    AST.Transposition: (('expr', NODE),),
+}
+
+KINDS = tuple(FIELDS)
+ENCODINGS = {cls: tuple(encoding for _, encoding in fields) for cls, fields in FIELDS.items()}
+
+# Children of an Instructions node still being parsed, see FlatTree.add
+PENDING = -1
+
+INLINE = 1 << 62
+
+PADDING = [[-1] * (3 - n) for n in range(4)]
+
+MAGIC = b'MFLAT001'
+HEADER = struct.Struct('<8sqqqq')
+
+
+class FlatTree(object):
+    def __init__(self):
+        self.kinds = array('B')
+        self.linenos = array('i')
+        self.operands = array('q')
+        self.children = array('q')
+        self.atoms = []
+        self.objects = []
+        self.pending = {}
+        # Annotations set by later passes (`slot`, `invariants`, ...), by
+        # name and node index
+        self.notes = {}
+        self.interned = None
+        self.root = -1
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def node(self, index):
+        return VIEWS[self.kinds[index]](self, index)
+
+    def ast(self):
+        return None if self.root < 0 else self.node(self.root)
+
+    def nbytes(self):
+        return sum(len(values) * values.itemsize for values in
+                   (self.kinds, self.linenos, self.operands, self.children))
+
+    # Building
+
+    def append(self, cls, fields, lineno):
+        index = len(self.kinds)
+        self.kinds.append(KIND[cls])
+        self.linenos.append(lineno)
+        cells = [self.encode(encoding, value) for encoding, value in zip(ENCODINGS[cls], fields)]
+        self.operands.extend(cells + PADDING[len(cells)])
+        return index
+
+    def encode(self, encoding, value):
+        if encoding == NODE:
+            return self.cell(value)
+        if encoding == ATOM:
+            return self.atom(value)
+        if encoding == INT:
+            return value if 0 <= value < INLINE else -1 - self.atom(value)
+        return self.block([self.cell(item) for item in value])
+
+    def cell(self, value):
+        if value is None:
+            return -1
+        if isinstance(value, View) and value._tree is self:
+            if value._index in self.pending:
+                self.flush(value._index)
+            return value._index
+        self.objects.append(value)
+        return -1 - len(self.objects)
+
+    def atom(self, value):
+        # 1, 1.0 and True are equal dict keys, hence the type
+        if self.interned is None:
+            self.interned = {(type(atom), atom): i for i, atom in enumerate(self.atoms)}
+        key = (type(value), value)
+        index = self.interned.get(key)
+        if index is None:
+            index = self.interned[key] = len(self.atoms)
+            self.atoms.append(value)
+        return index
+
+    def block(self, cells):
+        if not isinstance(self.children, array):
+            self.children = copy_array('q', self.children)
+        offset = len(self.children)
+        self.children.append(len(cells))
+        self.children.extend(cells)
+        return offset
+
+    def add(self, index, instruction):
+        # Instructions grow one statement at a time while they are parsed;
+        # their cells stay in `pending` until the node becomes a child
+        cells = self.pending.get(index)
+        if cells is None:
+            cells = self.pending[index] = array('q', self.cells(index * 3))
+            self.operands[index * 3] = PENDING
+        cells.append(self.cell(instruction))
+
+    def flush(self, index):
+        self.operands[index * 3] = self.block(self.pending.pop(index))
+
+    def finish(self):
+        for index in list(self.pending):
+            self.flush(index)
+        self.interned = None
+        return self
+
+    # Reading
+
+    def ref(self, cell):
+        if cell >= 0:
+            return VIEWS[self.kinds[cell]](self, cell)
+        if cell == -1:
+            return None
+        return self.objects[-2 - cell]
+
+    def integer(self, cell):
+        return cell if cell >= 0 else self.atoms[-1 - cell]
+
+    def cells(self, position):
+        offset = self.operands[position]
+        if offset == PENDING:
+            return self.pending[position // 3]
+        count = self.children[offset]
+        return self.children[offset + 1:offset + 1 + count]
+
+    # Pickling and memory mapping
+
+    def __getstate__(self):
+        self.finish()
+        state = dict(self.__dict__)
+        for name in ('kinds', 'linenos', 'operands', 'children'):
+            state[name] = copy_array(TYPECODES[name], state[name])
+        state['interned'] = None
+        return state
+
+    def save(self, filename):
+        # Raw arrays, 8-byte aligned, followed by everything else pickled
+        self.finish()
+        rest = pickle.dumps((self.atoms, self.objects, self.notes, self.root), pickle.HIGHEST_PROTOCOL)
+        with open(filename, "wb") as file:
+            file.write(HEADER.pack(MAGIC, len(self.kinds), len(self.children), len(rest), 0))
+            for name in ('operands', 'children', 'linenos', 'kinds'):
+                file.write(getattr(self, name))
+            file.write(bytes(-file.tell() % 8))
+            file.write(rest)
+
+    @classmethod
+    def load(cls, filename):
+        # Maps the file copy-on-write: the arrays are paged in as nodes are
+        # visited, and passes annotating the tree never write back to it
+        with open(filename, "rb") as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, count, children, size, _ = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{filename}: not a flat AST")
+        tree = cls.__new__(cls)
+        view, offset = memoryview(data), HEADER.size
+        for name, length in (('operands', 3 * count), ('children', children),
+                             ('linenos', count), ('kinds', count)):
+            typecode = TYPECODES[name]
+            end = offset + length * array(typecode).itemsize
+            setattr(tree, name, view[offset:end].cast(typecode))
+            offset = end
+        offset += -offset % 8
+        tree.atoms, tree.objects, tree.notes, tree.root = pickle.loads(view[offset:offset + size])
+        tree.pending = {}
+        tree.interned = None
+        return tree
+
+
+TYPECODES = {'kinds': 'B', 'linenos': 'i', 'operands': 'q', 'children': 'q'}
+
+
+def copy_array(typecode, values):
+    # array of a memoryview taken from a mapped file, without going
+    # through Python ints
+    if isinstance(values, array):
+        return values
+    copy = array(typecode)
+    copy.frombytes(values.cast('B'))
+    return copy
+
+
+# Views
+
+class View(object):
+    __slots__ = ()
+
+
+def view_of(tree, index):
+    return tree.node(index)
+
+
+def view_init(self, tree, index):
+    self._tree = tree
+    self._index = index
+
+
+def view_reduce(self):
+    return view_of, (self._tree, self._index)
+
+
+def view_copy(self):
+    # A detached node with the same fields and annotations, so passes
+    # rewriting a copy of a shared expression leave the arrays alone
+    cls = KINDS[self._tree.kinds[self._index]]
+    node = cls.__new__(cls)
+    for base in cls.__mro__:
+        for name in getattr(base, '__slots__', ()):
+            try:
+                setattr(node, name, getattr(self, name))
+            except AttributeError:
+                pass
+    return node
+
+
+def view_eq(self, other):
+    if isinstance(other, View):
+        return self._tree is other._tree and self._index == other._index
+    return NotImplemented
+
+
+def view_hash(self):
+    return hash((id(self._tree), self._index))
+
+
+def lineno_property():
+    def get(self):
+        return self._tree.linenos[self._index]
+
+    def set(self, value):
+        self._tree.linenos[self._index] = value
+    return property(get, set)
+
+
+def field_property(position, encoding):
+    if encoding == NODE:
+        def get(self):
+            return self._tree.ref(self._tree.operands[self._index * 3 + position])
+    elif encoding == ATOM:
+        def get(self):
+            return self._tree.atoms[self._tree.operands[self._index * 3 + position]]
+    elif encoding == INT:
+        def get(self):
+            return self._tree.integer(self._tree.operands[self._index * 3 + position])
+    else:
+        def get(self):
+            tree = self._tree
+            return [tree.ref(cell) for cell in tree.cells(self._index * 3 + position)]
+
+    def set(self, value):
+        tree = self._tree
+        tree.operands[self._index * 3 + position] = tree.encode(encoding, value)
+        if encoding == LIST:
+            tree.pending.pop(self._index, None)
+    return property(get, set)
+
+
+def note_property(name):
+    def get(self):
+        try:
+            return self._tree.notes[name][self._index]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def set(self, value):
+        self._tree.notes.setdefault(name, {})[self._index] = value
+    return property(get, set)
+
+
+def instructions_add(self, instruction):
+    self._tree.add(self._index, instruction)
+
+
+def view_class(cls):
+    namespace = {
+        '__slots__': ('_tree', '_index'),
+        '__init__': view_init,
+        '__reduce__': view_reduce,
+        '__copy__': view_copy,
+        '__eq__': view_eq,
+        '__hash__': view_hash,
+        'lineno': lineno_property(),
+    }
+    fields = FIELDS[cls]
+    for position, (name, encoding) in enumerate(fields):
+        namespace[name] = field_property(position, encoding)
+    names = {name for name, _ in fields}
+    for base in cls.__mro__:
+        for name in getattr(base, '__slots__', ()):
+            if name != 'lineno' and name not in names:
+                namespace[name] = note_property(name)
+    if cls is AST.Instructions:
+        namespace['add'] = instructions_add
+    return type(cls.__name__, (View, cls), namespace)
+
+
+KIND = {cls: kind for kind, cls in enumerate(KINDS)}
+VIEWS = tuple(view_class(cls) for cls in KINDS)
+
+
+def constructor(cls):
+    # FlatTree.append and FlatTree.node in one call, for the parser
+    kind = KIND[cls]
+    encodings = ENCODINGS[cls]
+    view = VIEWS[kind]
+
+    def build(self, *fields, lineno=0):
+        tree = self.tree
+        index = len(tree.kinds)
+        tree.kinds.append(kind)
+        tree.linenos.append(lineno)
+        encode = tree.encode
+        tree.operands.extend([encode(encoding, value) for encoding, value in zip(encodings, fields)]
+                             + PADDING[len(fields)])
+        return view(tree, index)
+    build.__name__ = cls.__name__
+    return build
+
+
+# Stands in for the AST module as Mparser's `nodes`: the node classes become
+# constructors appending to `tree` and returning views
+class Builder(object):
+    def __init__(self, tree=None):
+        self.tree = FlatTree() if tree is None else tree
+
+    def Instructions(self):
+        return self.tree.node(self.tree.append(AST.Instructions, ([],), 0))
+
+    def Program(self, instructions):
+        tree = self.tree
+        tree.root = tree.append(AST.Program, (instructions,), 0)
+        return tree.node(tree.root)
+
+
+for cls in KINDS:
+    if cls.__name__ not in vars(Builder):
+        setattr(Builder, cls.__name__, constructor(cls))
@@ -0,0 +1,164 @@
+import operator
+import AST
+from Rewriter import ExpressionRewriter
+import numpy as np
+
+# Operand types of a BinExpr TypeChecker checked as an operation on arrays
+ARRAYS = frozenset((('vector', 'vector'), ('matrix', 'matrix')))
+
+# Element-wise operations on arrays, as ufuncs
+UFUNCS = {
+    '+': np.add,
+    '-': np.subtract,
+    '.+': np.add,
+    '.-': np.subtract,
+    '.*': np.multiply,
+    './': np.divide,
+}
+
+# Elements of the operands a kernel works on at a time, 256KB of floats: the
+# scratch buffers of a kernel with a few operations stay in the L2 cache
+CHUNK_ELEMENTS = 32768
+
+# Scalars broadcast over the chunks of array operands
+NUMBERS = (int, float, np.number)
+
+
+def is_elementwise(expr):
+    return isinstance(expr, AST.BinExpr) and expr.op in UFUNCS and getattr(expr, 'types', None) in ARRAYS
+
+
+# Runs a tree of element-wise operations compiled into postfix code: leaves
+# are operand indices, operations (ufunc, function, arity) triples, with
+# `function` what the interpreter applies to the whole operands otherwise.
+# Operands that are arrays of one shape, large enough, are worked through a
+# chunk of rows at a time, each operation writing into a scratch buffer of
+# its own and the last one straight into the result, so no temporary the
+# size of the operands is allocated. Anything else runs the functions.
+class Kernel(object):
+    def __init__(self, code):
+        self.code = code
+        # Scratch buffer of each operation, kept from one run to the next
+        self.scratch = {}
+        self.runs = self.chunked = 0
+
+    def run(self, values):
+        self.runs += 1
+        shape = self.chunk_shape(values)
+        if shape is None:
+            return self.apply(values)
+        self.chunked += 1
+        rows = shape[0]
+        step = max(1, CHUNK_ELEMENTS // max(1, int(np.prod(shape[1:], dtype=np.int64))))
+        # Result types of the operations, as on the whole operands
+        dtypes = self.result_types([value[:1] if value.__class__ is np.ndarray else value for value in values])
+        result = np.empty(shape, dtypes[-1])
+        for start in range(0, rows, step):
+            self.run_chunk(values, start, min(rows, start + step), dtypes, result)
+        return result
+
+    def chunk_shape(self, values):
+        # Shape of the array operands if they can be worked through in
+        # chunks, else None
+        shape = None
+        for value in values:
+            if value.__class__ is np.ndarray:
+                if shape is None:
+                    shape = value.shape
+                elif value.shape != shape:
+                    return None
+            elif not isinstance(value, NUMBERS):
+                return None
+        if shape is None or len(shape) == 0 or np.prod(shape, dtype=np.int64) < 2 * CHUNK_ELEMENTS:
+            return None
+        return shape
+
+    def apply(self, values):
+        stack = []
+        for entry in self.code:
+            if entry.__class__ is int:
+                stack.append(values[entry])
+            else:
+                _, function, arity = entry
+                operands = stack[-arity:]
+                stack[-arity:] = [function(*operands)]
+        return stack[0]
+
+    def result_types(self, values):
+        stack, dtypes = [], []
+        # Warnings, e.g. of a division by zero, come from the run itself
+        with np.errstate(all='ignore'):
+            for entry in self.code:
+                if entry.__class__ is int:
+                    stack.append(values[entry])
+                else:
+                    ufunc, _, arity = entry
+                    operands = stack[-arity:]
+                    stack[-arity:] = [ufunc(*operands)]
+                    dtypes.append(stack[-1].dtype)
+        return dtypes
+
+    def run_chunk(self, values, start, stop, dtypes, result):
+        stack = []
+        position = 0
+        last = len(dtypes) - 1
+        for entry in self.code:
+            if entry.__class__ is int:
+                value = values[entry]
+                stack.append(value[start:stop] if value.__class__ is np.ndarray else value)
+                continue
+            ufunc, _, arity = entry
+            if position == last:
+                out = result[start:stop]
+            else:
+                out = self.buffer(position, dtypes[position], result.shape[1:], stop - start)
+            operands = stack[-arity:]
+            stack[-arity:] = [ufunc(*operands, out=out)]
+            position += 1
+
+    def buffer(self, position, dtype, row_shape, rows):
+        buffer = self.scratch.get(position)
+        if buffer is None or buffer.dtype != dtype or buffer.shape[1:] != row_shape or len(buffer) < rows:
+            buffer = self.scratch[position] = np.empty((rows,) + row_shape, dtype)
+        return buffer[:rows]
+
+
+# Replaces each tree of two or more element-wise operations on arrays
+# (+ - .+ .- .* ./ on operands TypeChecker found to be vectors or matrices,
+# and unary minus within them) by an AST.Fused running it as one Kernel.
+# `operation` gives the function the interpreter applies for a BinExpr.
+class ElementwiseFusion(ExpressionRewriter):
+    def __init__(self, operation):
+        self.operation = operation
+        self.fused = 0
+
+    def expression(self, expr):
+        root = expr.expr if isinstance(expr, AST.UnaryMinus) else expr
+        if is_elementwise(root):
+            code, leaves = self.compile(expr)
+            if len(code) - len(leaves) >= 2:
+                operands = []
+                for leaf in leaves:
+                    operands.append((yield leaf))
+                self.fused += 1
+                return AST.Fused(expr, operands, Kernel(code), lineno=expr.lineno)
+        return (yield from super().expression(expr))
+
+    def compile(self, expr):
+        code, leaves = [], []
+        work = [expr]
+        while work:
+            item = work.pop()
+            if item.__class__ is tuple:
+                code.append(item)
+            elif is_elementwise(item):
+                work.append((UFUNCS[item.op], self.operation(item), 2))
+                work.append(item.right)
+                work.append(item.left)
+            elif isinstance(item, AST.UnaryMinus):
+                work.append((np.negative, operator.neg, 1))
+                work.append(item.expr)
+            else:
+                code.append(len(leaves))
+                leaves.append(item)
+        return code, leaves
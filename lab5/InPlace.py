@@ -0,0 +1,94 @@
+import AST
+from Fusion import ARRAYS
+from LoopInvariant import uses
+import numpy as np
+
+# Compound assignments whose operation on arrays is a ufunc
+COMPOUND_UFUNCS = {
+    '+=': np.add,
+    '-=': np.subtract,
+    '/=': np.divide,
+}
+
+# Element-wise operations of `A = A op B` updating A
+SELF_UPDATE_UFUNCS = {
+    '+': np.add,
+    '-': np.subtract,
+    '.+': np.add,
+    '.-': np.subtract,
+    '.*': np.multiply,
+    './': np.divide,
+}
+
+# Values that are new arrays (or no arrays at all), referred to by nothing
+# but the variable they are assigned to
+FRESH = (AST.BinExpr, AST.RelExpr, AST.UnaryMinus, AST.Vector, AST.Matrix, AST.MatrixFunction, AST.Product,
+         AST.Fused, AST.MatrixElement, AST.IntNum, AST.FloatNum, AST.String)
+
+
+def assignments(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, AST.Program):
+            stack.append(node.instructions)
+        elif isinstance(node, AST.Instructions):
+            stack.extend(node.instructions)
+        elif isinstance(node, AST.Assignment):
+            yield node
+        elif isinstance(node, AST.If):
+            stack.append(node.then_block)
+            if node.else_block:
+                stack.append(node.else_block)
+        elif isinstance(node, (AST.While, AST.For)):
+            stack.append(node.body)
+
+
+# Marks every assignment to a variable with `update`: the (ufunc, side) pair
+# Interpreter applies writing the result into the variable's array instead
+# of a new one, side being the operand that array is, or None. Compound
+# assignments (+= -= /=) update their target, the left operand, and so does
+# `A = A op B` (or `A = B op A`) for an element-wise op TypeChecker checked
+# on arrays. That is only sound while no other name may refer to the array,
+# so a name is taken as sharing its array once `=` binds it to a value that
+# is not fresh (a variable, a transposition or a vector element, which are
+# views, a constant the program keeps) or it appears in such a value. Names
+# are collected over the whole statement given to visit before any
+# assignment in it is marked, and keep sharing in the statements visited
+# later.
+class InPlaceUpdates(object):
+    def __init__(self):
+        self.shared = set()
+        # Arrays updated in place at run time, counted by Interpreter
+        self.avoided = 0
+
+    def report(self):
+        return f"In-place updates: {self.avoided} allocations avoided"
+
+    def visit(self, node):
+        found = list(assignments(node))
+        for assignment in found:
+            # Compound assignments store a new value, or update in place
+            if (assignment.op == '=' and isinstance(assignment.left, AST.Variable)
+                    and not isinstance(assignment.right, FRESH)):
+                self.shared.add(assignment.left.name)
+                self.shared |= uses(assignment.right)
+        for assignment in found:
+            if isinstance(assignment.left, AST.Variable):
+                assignment.update = self.update(assignment)
+
+    def update(self, node):
+        target = node.left.name
+        if target in self.shared:
+            return None
+        if node.op != '=':
+            ufunc = COMPOUND_UFUNCS.get(node.op)
+            return None if ufunc is None else (ufunc, 0)
+        expr = node.right
+        if not (isinstance(expr, AST.BinExpr) and expr.op in SELF_UPDATE_UFUNCS
+                and getattr(expr, 'types', None) in ARRAYS):
+            return None
+        for side, operand in enumerate((expr.left, expr.right)):
+            if isinstance(operand, AST.Variable) and operand.name == target:
+                return SELF_UPDATE_UFUNCS[expr.op], side
+        return None
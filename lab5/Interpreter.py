@@ -2,16 +2,209 @@ import AST
 from Memory import *
 from Exceptions import *
 from visit import *
-import sys
+from Resolver import Resolver
+from Vectorizer import LoopVectorizer
+from LoopInvariant import LoopInvariantMotion
+from CommonSubexpression import CommonSubexpressionElimination
+from MatrixChain import MatrixChainOrdering, multiply, chain_product
+from Fusion import ElementwiseFusion, ARRAYS
+from Lazy import Pending, Scheduler
+from InPlace import InPlaceUpdates
+from Pool import ArrayPool
+from types import GeneratorType
 import operator
 import numpy as np
 
-sys.setrecursionlimit(10000)
+FLOAT = np.dtype(float)
 
+BINARY_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': multiply,
+    '/': operator.truediv,
+    '.+': np.add,
+    '.-': np.subtract,
+    '.*': np.multiply,
+    './': np.divide,
+}
 
-class Interpreter(object):
-    def __init__(self):
-        self.memory_stack = MemoryStack(Memory("global"))
+RELATIONAL_OPS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+}
+
+# Returned by statements that end the current loop iteration early; every
+# other statement returns None, so loops test a result instead of setting
+# up a try block for each iteration
+class Signal(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+BREAK = Signal('BREAK')
+CONTINUE = Signal('CONTINUE')
+
+COMPOUND_OPS = {
+    '+=': operator.add,
+    '-=': operator.sub,
+    '*=': multiply,
+    '/=': operator.truediv,
+}
+
+# Implementations of BINARY_OPS specialized on the operand types TypeChecker
+# notes in BinExpr.types. Those types hold for every run only if the program
+# never rebinds a name to another type, so each one still gives the generic
+# operation's value for any operands.
+
+SCALARS = frozenset((left, right) for left in ('int', 'float') for right in ('int', 'float'))
+
+# Element-wise operations on two numbers give a Python number rather than a
+# NumPy scalar; ./ keeps NumPy's division by zero
+SCALAR_OPS = dict(BINARY_OPS, **{
+    '.+': operator.add,
+    '.-': operator.sub,
+    '.*': operator.mul,
+})
+
+# Nodes whose value is an array no variable refers to yet
+TEMPORARIES = (AST.BinExpr, AST.UnaryMinus, AST.Vector, AST.Matrix, AST.MatrixFunction, AST.Product,
+               AST.Fused)
+
+# Leaves whose value is never an array, so `*` with them is Python's
+SCALAR_LEAVES = (AST.IntNum, AST.FloatNum, AST.String)
+
+
+def reusing(ufunc, side):
+    # Writes the result into the operand at `side` (0 left, 1 right), a
+    # temporary, when it has the result's shape and type
+    def apply(left, right):
+        if (left.__class__ is np.ndarray and right.__class__ is np.ndarray
+                and left.shape == right.shape and left.dtype == right.dtype):
+            try:
+                return ufunc(left, right, out=(left, right)[side], casting='no')
+            except TypeError:
+                # e.g. ./ on integers, whose result is a float array
+                pass
+        return ufunc(left, right)
+    apply.__name__ = f"{ufunc.__name__}_into_{('left', 'right')[side]}"
+    return apply
+
+
+ELEMENTWISE_UFUNCS = {
+    '+': np.add,
+    '-': np.subtract,
+    '.+': np.add,
+    '.-': np.subtract,
+    '.*': np.multiply,
+    './': np.divide,
+}
+ARRAY_OPS = tuple({op: reusing(ufunc, side) for op, ufunc in ELEMENTWISE_UFUNCS.items()}
+                  for side in (0, 1))
+
+
+def pooled(ufunc, function, temporaries, pool):
+    # Like reusing, for the operands at the sides in `temporaries`, but
+    # writes into an array from the pool when neither is one; the temporary
+    # operands not holding the result go back to the pool. `function` is the
+    # generic operation, for anything but arrays of one shape and type.
+    def apply(left, right):
+        if (left.__class__ is np.ndarray and right.__class__ is np.ndarray
+                and left.shape == right.shape and left.dtype == right.dtype):
+            if temporaries:
+                out = (left, right)[temporaries[0]]
+            elif left.nbytes >= pool.minimum:
+                out = pool.take(left.shape, left.dtype)
+            else:
+                out = None
+            try:
+                result = ufunc(left, right, out=out, casting='no')
+            except TypeError:
+                if out is not None and not temporaries:
+                    pool.give(out)
+                result = ufunc(left, right)
+        else:
+            result = function(left, right)
+        for side in temporaries:
+            operand = (left, right)[side]
+            if operand.__class__ is np.ndarray and operand is not result:
+                pool.give(operand)
+        return result
+    apply.__name__ = f"pooled_{ufunc.__name__}"
+    return apply
+
+
+def binary_operation(node, pool=None):
+    # The function computing node.op, None for an unknown operator; with an
+    # ArrayPool, operations on arrays draw their results from it
+    if node.op == '*' and (isinstance(node.left, SCALAR_LEAVES) or isinstance(node.right, SCALAR_LEAVES)):
+        return operator.mul
+    types = getattr(node, 'types', None)
+    if types in SCALARS:
+        return SCALAR_OPS.get(node.op)
+    if types in ARRAYS:
+        if pool is not None and node.op in ELEMENTWISE_UFUNCS:
+            temporaries = tuple(side for side, operand in enumerate((node.left, node.right))
+                                if isinstance(operand, TEMPORARIES))
+            return pooled(ELEMENTWISE_UFUNCS[node.op], BINARY_OPS[node.op], temporaries, pool)
+        for side, operand in enumerate((node.left, node.right)):
+            if isinstance(operand, TEMPORARIES) and node.op in ARRAY_OPS[side]:
+                return ARRAY_OPS[side][node.op]
+    return BINARY_OPS.get(node.op)
+
+
+class Interpreter(CachedDispatch):
+    def __init__(self, symbol_table=None, vectorize=False, hoist=False, cse=False, reorder=False, fuse=False, in_place=False,
+                 pool_bytes=0):
+        self.symbol_table = symbol_table
+        self.vectorize = vectorize
+        self.hoist = hoist
+        self.reorder = reorder
+        self.fuse = fuse
+        # Only finds something in trees built with HashConsing
+        self.cse = CommonSubexpressionElimination() if cse else None
+        # Kept for the whole run: names sharing an array stay so
+        self.in_place = InPlaceUpdates() if in_place else None
+        # Temporaries of array operations, and the arrays of variables
+        # rebound when the in-place analysis shows no other name shares them
+        self.pool = ArrayPool(pool_bytes) if pool_bytes else None
+        self.recycle = self.pool is not None and self.in_place is not None
+        # binary_operation of each BinExpr evaluated so far
+        self.operations = {}
+        self.resolver = None
+        self.frame = Frame("global", {})
+        self.memory_stack = MemoryStack(self.frame)
+    
+    def execute(self, statement):
+        # Runs one top-level statement of a program parsed piecemeal; the
+        # global frame grows as statements introduce new names
+        if self.resolver is None:
+            self.resolver = Resolver(self.symbol_table)
+        self.resolver.visit(statement)
+        self.frame.extend(self.resolver.symbol_table.slots)
+        if self.cse:
+            self.cse.visit(statement)
+        if self.hoist:
+            LoopInvariantMotion().visit(statement)
+        if self.vectorize:
+            LoopVectorizer().visit(statement)
+        if self.reorder:
+            MatrixChainOrdering().visit(statement)
+        if self.fuse:
+            ElementwiseFusion(binary_operation).visit(statement)
+        if self.in_place:
+            self.in_place.visit(statement)
+        return statement.accept(self)
+
+    def finish(self):
+        # Called once the last statement given to execute has run
+        pass
     
     @on('node')
     def visit(self, node):
@@ -19,33 +212,46 @@ class Interpreter(object):
     
     @when(AST.Program)
     def visit(self, node):
+        self.prepare(node)
         return node.instructions.accept(self)
+
+    def prepare(self, node):
+        scope = Resolver(self.symbol_table).resolve(node)
+        if self.cse:
+            self.cse.visit(node)
+        if self.hoist:
+            LoopInvariantMotion().visit(node)
+        if self.vectorize:
+            LoopVectorizer().visit(node)
+        if self.reorder:
+            MatrixChainOrdering().visit(node)
+        if self.fuse:
+            ElementwiseFusion(binary_operation).visit(node)
+        if self.in_place:
+            self.in_place.visit(node)
+        self.frame = Frame("global", scope.slots)
+        # Name-based access to the same frame for code that still uses it
+        self.memory_stack = MemoryStack(self.frame)
     
     @when(AST.Instructions)
     def visit(self, node):
-        result = None
         for instruction in node.instructions:
-            result = instruction.accept(self)
-        return result
+            signal = instruction.accept(self)
+            if signal is not None:
+                return signal
+        return None
     
     @when(AST.BinExpr)
     def visit(self, node):
         left = node.left.accept(self)
         right = node.right.accept(self)
         
-        ops = {
-            '+': operator.add,
-            '-': operator.sub,
-            '*': operator.mul,
-            '/': operator.truediv,
-            '.+': np.add,
-            '.-': np.subtract,
-            '.*': np.multiply,
-            './': np.divide,
-        }
-        
-        if node.op in ops:
-            return ops[node.op](left, right)
+        try:
+            operation = self.operations[node]
+        except KeyError:
+            operation = self.operations[node] = binary_operation(node, self.pool)
+        if operation is not None:
+            return operation(left, right)
         return None
     
     @when(AST.RelExpr)
@@ -53,54 +259,127 @@ class Interpreter(object):
         left = node.left.accept(self)
         right = node.right.accept(self)
         
-        ops = {
-            '==': operator.eq,
-            '!=': operator.ne,
-            '<': operator.lt,
-            '>': operator.gt,
-            '<=': operator.le,
-            '>=': operator.ge,
-        }
-        
-        if node.op in ops:
-            return ops[node.op](left, right)
+        if node.op in RELATIONAL_OPS:
+            return RELATIONAL_OPS[node.op](left, right)
         return None
     
     @when(AST.Assignment)
     def visit(self, node):
-        value = node.right.accept(self)
-        
+        update = getattr(node, 'update', None)
+        if update is not None and node.op == '=':
+            # A = A op B: the operands rather than the operation's value
+            self.update(node, update, node.right.left.accept(self), node.right.right.accept(self))
+        else:
+            self.assign(node, node.right.accept(self))
+        return None
+
+    def assign(self, node, value):
         if isinstance(node.left, AST.Variable):
-            var_name = node.left.name
+            slot = node.left.slot
             
             if node.op == '=':
-                self.memory_stack.set(var_name, value)
+                if self.recycle:
+                    self.discard(node.left, value)
+                self.frame.store(*slot, value)
             else:
-                current = self.memory_stack.get(var_name)
-                ops = {
-                    '+=': operator.add,
-                    '-=': operator.sub,
-                    '*=': operator.mul,
-                    '/=': operator.truediv,
-                }
-                if node.op in ops:
-                    new_value = ops[node.op](current, value)
-                    self.memory_stack.set(var_name, new_value)
+                current = self.frame.load(*slot)
+                update = getattr(node, 'update', None)
+                if update is not None and current.__class__ is np.ndarray:
+                    self.update(node, update, current, value)
+                elif node.op in COMPOUND_OPS:
+                    new_value = COMPOUND_OPS[node.op](current, value)
+                    if self.recycle:
+                        self.discard(node.left, new_value)
+                    self.frame.store(*slot, new_value)
         
         elif isinstance(node.left, AST.VectorElement):
-            var_name = node.left.name
             index = node.left.index
-            vec = self.memory_stack.get(var_name)
+            vec = self.frame.load(*node.left.slot)
             vec[index] = value
         
         elif isinstance(node.left, AST.MatrixElement):
-            var_name = node.left.name
             row = node.left.row
             col = node.left.col
-            mat = self.memory_stack.get(var_name)
+            mat = self.frame.load(*node.left.slot)
             mat[row, col] = value
-        
-        return value
+
+    def update(self, node, update, left, right):
+        # Writes the value assigned into the variable's array, one of the
+        # operands, when it has the shape and type of the result
+        ufunc, side = update
+        target = (left, right)[side]
+        if target.__class__ is np.ndarray:
+            try:
+                ufunc(left, right, out=target, casting='no')
+                self.in_place.avoided += 1
+            except (TypeError, ValueError):
+                # e.g. ./ on integers, or an operand broadcast to a larger
+                # shape; the operation raises any error it is due
+                pass
+            else:
+                if self.pool is not None:
+                    self.release(node.right if node.op != '=' else (node.right.left, node.right.right)[1 - side],
+                                 (left, right)[1 - side])
+                return
+        if node.op == '=':
+            value = binary_operation(node.right)(left, right)
+        else:
+            value = COMPOUND_OPS[node.op](left, right)
+        if self.recycle:
+            self.discard(node.left, value)
+        self.frame.store(*node.left.slot, value)
+
+    def release(self, expr, value):
+        # Gives the pool the value of expr, read for the last time, if it is
+        # a temporary array
+        if value.__class__ is np.ndarray and isinstance(expr, TEMPORARIES):
+            self.pool.give(value)
+
+    def discard(self, var, value):
+        # Gives the pool the array var is about to stop referring to, for
+        # `value`, unless another name may share it
+        current = self.frame.load(*var.slot)
+        if current.__class__ is np.ndarray and current is not value and var.name not in self.in_place.shared:
+            self.pool.give(current)
+
+    def allocate(self, shape, dtype):
+        if self.pool is None or np.prod(shape) * dtype.itemsize < self.pool.minimum:
+            return np.empty(shape, dtype)
+        return self.pool.take(shape, dtype)
+
+    def negative(self, node, value):
+        # -value, into the operand if it is a temporary array, else into an
+        # array from the pool
+        if self.pool is None or value.__class__ is not np.ndarray:
+            return -value
+        if isinstance(node.expr, TEMPORARIES):
+            out = value
+        elif value.nbytes >= self.pool.minimum:
+            out = self.pool.take(value.shape, value.dtype)
+        else:
+            return -value
+        try:
+            return np.negative(value, out=out, casting='no')
+        except TypeError:
+            if out is not value:
+                self.pool.give(out)
+            return -value
+
+    def matrix(self, node, rows):
+        # The rows stacked, into an array from the pool if they are arrays
+        # of one shape and type; temporary rows go back to it
+        if self.pool is None or not rows:
+            return np.array(rows)
+        first = rows[0]
+        if first.__class__ is not np.ndarray or any(row.__class__ is not np.ndarray or row.shape != first.shape
+                                                   or row.dtype != first.dtype for row in rows):
+            return np.array(rows)
+        if len(rows) * first.nbytes < self.pool.minimum:
+            return np.array(rows)
+        array = np.stack(rows, out=self.pool.take((len(rows),) + first.shape, first.dtype))
+        for expr, row in zip(node.rows, rows):
+            self.release(expr, row)
+        return array
     
     @when(AST.If)
     def visit(self, node):
@@ -113,34 +392,29 @@ class Interpreter(object):
     
     @when(AST.While)
     def visit(self, node):
-        result = None
-        try:
-            while node.condition.accept(self):
-                try:
-                    result = node.body.accept(self)
-                except ContinueException:
-                    continue
-        except BreakException:
-            pass
-        return result
+        for invariant in getattr(node, 'invariants', ()):
+            invariant.valid = False
+        while node.condition.accept(self):
+            if node.body.accept(self) is BREAK:
+                break
+        return None
     
     @when(AST.For)
     def visit(self, node):
-        result = None
         range_obj = node.range.accept(self)
-        var_name = node.var.name
+        plan = getattr(node, 'vector_plan', None)
+        if plan is not None and plan.run(self.frame, range_obj):
+            return None
+        slot = node.var.slot
+        for invariant in getattr(node, 'invariants', ()):
+            invariant.valid = False
         
-        try:
-            for i in range_obj:
-                self.memory_stack.set(var_name, i)
-                try:
-                    result = node.body.accept(self)
-                except ContinueException:
-                    continue
-        except BreakException:
-            pass
+        for i in range_obj:
+            self.frame.store(*slot, i)
+            if node.body.accept(self) is BREAK:
+                break
         
-        return result
+        return None
     
     @when(AST.Range)
     def visit(self, node):
@@ -150,11 +424,11 @@ class Interpreter(object):
     
     @when(AST.Break)
     def visit(self, node):
-        raise BreakException()
+        return BREAK
     
     @when(AST.Continue)
     def visit(self, node):
-        raise ContinueException()
+        return CONTINUE
     
     @when(AST.Return)
     def visit(self, node):
@@ -184,18 +458,37 @@ class Interpreter(object):
     def visit(self, node):
         return node.value
     
+    @when(AST.Constant)
+    def visit(self, node):
+        return node.value
+    
+    @when(AST.Invariant)
+    def visit(self, node):
+        if not node.valid:
+            node.value = node.expr.accept(self)
+            node.valid = True
+        return node.value
+    
+    @when(AST.Common)
+    def visit(self, node):
+        if node.source is None:
+            node.value = node.expr.accept(self)
+            return node.value
+        self.cse.saved += 1
+        return node.source.value
+    
     @when(AST.Variable)
     def visit(self, node):
-        return self.memory_stack.get(node.name)
+        return self.frame.load(*node.slot)
     
     @when(AST.VectorElement)
     def visit(self, node):
-        vec = self.memory_stack.get(node.name)
+        vec = self.frame.load(*node.slot)
         return vec[node.index]
     
     @when(AST.MatrixElement)
     def visit(self, node):
-        mat = self.memory_stack.get(node.name)
+        mat = self.frame.load(*node.slot)
         return mat[node.row, node.col]
     
     @when(AST.Vector)
@@ -209,7 +502,7 @@ class Interpreter(object):
         for row in node.rows:
             row_data = row.accept(self)
             rows.append(row_data)
-        return np.array(rows)
+        return self.matrix(node, rows)
     
     @when(AST.MatrixFunction)
     def visit(self, node):
@@ -219,19 +512,508 @@ class Interpreter(object):
             rows = cols = node.size
         
         if node.name == 'zeros':
-            return np.zeros((rows, cols))
+            array = self.allocate((rows, cols), FLOAT)
+            array.fill(0)
+            return array
         elif node.name == 'ones':
-            return np.ones((rows, cols))
+            array = self.allocate((rows, cols), FLOAT)
+            array.fill(1)
+            return array
         elif node.name == 'eye':
-            return np.eye(rows, cols)
+            array = self.allocate((rows, cols), FLOAT)
+            array.fill(0)
+            np.fill_diagonal(array, 1)
+            return array
         return None
     
     @when(AST.UnaryMinus)
     def visit(self, node):
-        value = node.expr.accept(self)
-        return -value
+        return self.negative(node, node.expr.accept(self))
+    
+    @when(AST.Product)
+    def visit(self, node):
+        return chain_product([factor.accept(self) for factor in node.factors])
+    
+    @when(AST.Fused)
+    def visit(self, node):
+        return node.kernel.run([operand.accept(self) for operand in node.operands])
     
     @when(AST.Transposition)
     def visit(self, node):
         mat = node.expr.accept(self)
-        return mat.T
\ No newline at end of file
+        return mat.T
+
+LITERALS = frozenset((AST.IntNum, AST.FloatNum, AST.String, AST.Constant))
+
+# Types of the functions binary_operation returns and of those in
+# RELATIONAL_OPS, which appear in StackInterpreter's code as they are
+OPERATORS = frozenset(type(op) for op in list(SCALAR_OPS.values()) + list(ARRAY_OPS[0].values())
+                      + list(RELATIONAL_OPS.values()))
+
+
+# Continuations in StackInterpreter's code: each applies a node's operation
+# to the values of its operands, on top of the value stack
+
+def apply_unknown(node, values):
+    # Operators without a function evaluate to None, as in Interpreter
+    values[-2:] = [None]
+
+
+def apply_range(node, values):
+    end = values.pop()
+    values[-1] = range(int(values[-1]), int(end) + 1)
+
+
+def apply_minus(node, values):
+    values[-1] = -values[-1]
+
+
+def apply_transposition(node, values):
+    values[-1] = values[-1].T
+
+
+def apply_array(node, values):
+    # Vector elements or Matrix rows, the last len(...) values
+    start = len(values) - len(node.elements if isinstance(node, AST.Vector) else node.rows)
+    array = np.array(values[start:])
+    del values[start:]
+    values.append(array)
+
+
+def apply_product(node, values):
+    # The last len(node.factors) values
+    start = len(values) - len(node.factors)
+    values[start:] = [chain_product(values[start:])]
+
+
+def apply_fused(node, values):
+    # The last len(node.operands) values
+    start = len(values) - len(node.operands)
+    values[start:] = [node.kernel.run(values[start:])]
+
+
+def store_invariant(node, values):
+    node.value = values[-1]
+    node.valid = True
+
+
+def store_common(node, values):
+    node.value = values[-1]
+
+
+# Interpreter evaluating without recursion, so programs nest deeper than
+# the recursion limit visit raises for the tree walker allows. Each expression is flattened
+# once into postfix code: its leaves, the functions binary_operation picks
+# and those of RELATIONAL_OPS, and (continuation, node) pairs, run in a loop
+# over a stack of values. Invariants and Commons not evaluated yet suspend it to run the
+# code of their expression, kept apart.
+class StackInterpreter(Interpreter):
+    def __init__(self, symbol_table=None, vectorize=False, hoist=False, cse=False, reorder=False, fuse=False, in_place=False,
+                 pool_bytes=0):
+        super().__init__(symbol_table, vectorize, hoist, cse, reorder, fuse, in_place, pool_bytes)
+        # Code of the expressions evaluated so far, keyed by their node, and
+        # of the expressions of their Invariants and Commons
+        self.code = {}
+        self.deferred = {}
+
+    def visit(self, node):
+        result = self.step(node)
+        if result.__class__ is not GeneratorType:
+            return result
+        stack = [result]
+        result = None
+        while stack:
+            try:
+                child = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                continue
+            stack.append(child)
+            result = None
+        return result
+
+    # Statements: step executes one, returning its signal, or a generator
+    # if it is a loop, or a block reaching one. Such generators step through
+    # their children the same way, yielding the generators they get to
+    # `visit`, which sends back the signal each of them returns.
+
+    @on('node')
+    def step(self, node):
+        return self.evaluate(node)
+
+    @when(AST.Program)
+    def step(self, node):
+        self.prepare(node)
+        return self.step(node.instructions)
+
+    @when(AST.Instructions)
+    def step(self, node):
+        return self.run(node.instructions, 0, [])
+
+    @when(AST.If)
+    def step(self, node):
+        return self.run((node,), 0, [])
+
+    def run(self, instructions, index, outer):
+        # Runs instructions from index on, then the rest of the blocks in
+        # `outer`, (instructions, index) pairs, innermost last. Nested blocks
+        # and the branches Ifs take are entered in this loop; a loop returns
+        # a generator, which the rest of the run waits on in `resume`.
+        step = self.step
+        while True:
+            while index < len(instructions):
+                instruction = instructions[index]
+                index += 1
+                # Else-if chains are followed here too
+                while isinstance(instruction, AST.If):
+                    if self.evaluate(instruction.condition):
+                        instruction = instruction.then_block
+                    elif instruction.else_block:
+                        instruction = instruction.else_block
+                    else:
+                        instruction = None
+                if isinstance(instruction, AST.Instructions):
+                    outer.append((instructions, index))
+                    instructions, index = instruction.instructions, 0
+                    continue
+                if instruction is None:
+                    continue
+                signal = step(instruction)
+                if signal is not None:
+                    if signal.__class__ is GeneratorType:
+                        return self.resume(signal, instructions, index, outer)
+                    return signal
+            if not outer:
+                return None
+            instructions, index = outer.pop()
+
+    def resume(self, loop, instructions, index, outer):
+        signal = yield loop
+        if signal is None:
+            signal = self.run(instructions, index, outer)
+            if signal.__class__ is GeneratorType:
+                signal = yield signal
+        return signal
+
+    @when(AST.Assignment)
+    def step(self, node):
+        update = getattr(node, 'update', None)
+        if update is not None and node.op == '=':
+            self.update(node, update, self.evaluate(node.right.left), self.evaluate(node.right.right))
+        else:
+            self.assign(node, self.evaluate(node.right))
+        return None
+
+    @when(AST.While)
+    def step(self, node):
+        for invariant in getattr(node, 'invariants', ()):
+            invariant.valid = False
+        step = self.step
+        while self.evaluate(node.condition):
+            signal = step(node.body)
+            if signal.__class__ is GeneratorType:
+                signal = yield signal
+            if signal is BREAK:
+                break
+        return None
+
+    @when(AST.For)
+    def step(self, node):
+        range_obj = self.evaluate(node.range)
+        plan = getattr(node, 'vector_plan', None)
+        if plan is not None and plan.run(self.frame, range_obj):
+            return None
+        slot = node.var.slot
+        for invariant in getattr(node, 'invariants', ()):
+            invariant.valid = False
+
+        step = self.step
+        for i in range_obj:
+            self.frame.store(*slot, i)
+            signal = step(node.body)
+            if signal.__class__ is GeneratorType:
+                signal = yield signal
+            if signal is BREAK:
+                break
+        return None
+
+    @when(AST.Break)
+    def step(self, node):
+        return BREAK
+
+    @when(AST.Continue)
+    def step(self, node):
+        return CONTINUE
+
+    @when(AST.Return)
+    def step(self, node):
+        raise ReturnValueException(self.evaluate(node.expr))
+
+    @when(AST.Print)
+    def step(self, node):
+        print(' '.join([str(self.evaluate(val)) for val in node.values]))
+        return None
+
+    # Expressions
+
+    def evaluate(self, expr):
+        cls = expr.__class__
+        if cls is AST.Variable:
+            return self.frame.load(*expr.slot)
+        if cls in LITERALS:
+            return expr.value
+        try:
+            code = self.code[expr]
+        except KeyError:
+            code = self.code[expr] = self.compile(expr)
+
+        values = []
+        push = values.append
+        frame = self.frame
+        slots = frame.slots
+        running = iter(code)
+        # Code whose run was interrupted by that of an Invariant or a Common
+        suspended = None
+        while True:
+            for item in running:
+                cls = item.__class__
+                # The commonest entries are handled inline
+                if cls is AST.Variable:
+                    depth, index = item.slot
+                    push(frame.load(depth, index) if depth else slots[index])
+                elif cls in LITERALS:
+                    push(item.value)
+                elif cls in OPERATORS:
+                    right = values.pop()
+                    values[-1] = item(values[-1], right)
+                elif cls is tuple:
+                    item[0](item[1], values)
+                else:
+                    code = self.leaf(item, values)
+                    if code is not None:
+                        if suspended is None:
+                            suspended = []
+                        suspended.append(running)
+                        running = iter(code)
+                        break
+            else:
+                if not suspended:
+                    return values[0]
+                running = suspended.pop()
+
+    def compile(self, expr):
+        code = []
+        work = [expr]
+        while work:
+            item = work.pop()
+            if item.__class__ in OPERATORS or item.__class__ is tuple:
+                code.append(item)
+            else:
+                self.expand(item, work, code)
+        return code
+
+    # Compiling: leaves go to the code, other nodes push their operation
+    # and then their operands, last to first, on the work stack
+
+    @on('node')
+    def expand(self, node, work, code):
+        code.append(node)
+
+    @when(AST.BinExpr)
+    def expand(self, node, work, code):
+        work.append(binary_operation(node, self.pool) or (apply_unknown, node))
+        work.append(node.right)
+        work.append(node.left)
+
+    @when(AST.RelExpr)
+    def expand(self, node, work, code):
+        work.append(RELATIONAL_OPS.get(node.op) or (apply_unknown, node))
+        work.append(node.right)
+        work.append(node.left)
+
+    @when(AST.Range)
+    def expand(self, node, work, code):
+        work.append((apply_range, node))
+        work.append(node.end)
+        work.append(node.start)
+
+    @when(AST.UnaryMinus)
+    def expand(self, node, work, code):
+        work.append((apply_minus, node) if self.pool is None else (self.apply_negative, node))
+        work.append(node.expr)
+
+    @when(AST.Transposition)
+    def expand(self, node, work, code):
+        work.append((apply_transposition, node))
+        work.append(node.expr)
+
+    @when(AST.Vector)
+    def expand(self, node, work, code):
+        work.append((apply_array, node))
+        work.extend(reversed(node.elements))
+
+    @when(AST.Matrix)
+    def expand(self, node, work, code):
+        work.append((apply_array, node) if self.pool is None else (self.apply_matrix, node))
+        work.extend(reversed(node.rows))
+
+    @when(AST.Product)
+    def expand(self, node, work, code):
+        work.append((apply_product, node))
+        work.extend(reversed(node.factors))
+
+    @when(AST.Fused)
+    def expand(self, node, work, code):
+        work.append((apply_fused, node))
+        work.extend(reversed(node.operands))
+
+    # Running the leaves not handled inline: each pushes its value, or
+    # returns the code computing it
+
+    @on('node')
+    def leaf(self, node, values):
+        values.append(Interpreter.visit(self, node))
+
+    @when(AST.Invariant)
+    def leaf(self, node, values):
+        if node.valid:
+            values.append(node.value)
+            return None
+        return self.deferred_code(node, store_invariant)
+
+    @when(AST.Common)
+    def leaf(self, node, values):
+        if node.source is None:
+            return self.deferred_code(node, store_common)
+        self.cse.saved += 1
+        values.append(node.source.value)
+        return None
+
+    # Continuations drawing arrays from the pool
+
+    def apply_negative(self, node, values):
+        values[-1] = self.negative(node, values[-1])
+
+    def apply_matrix(self, node, values):
+        start = len(values) - len(node.rows)
+        values[start:] = [self.matrix(node, values[start:])]
+
+    def deferred_code(self, node, store):
+        try:
+            return self.deferred[node]
+        except KeyError:
+            code = self.deferred[node] = self.compile(node.expr) + [(store, node)]
+            return code
+
+
+# Element-wise operations Pendings stand for, by operator
+DEFERRED_OPS = dict(ELEMENTWISE_UFUNCS, **{
+    '+=': np.add,
+    '-=': np.subtract,
+    '/=': np.divide,
+})
+
+
+# Interpreter deferring the element-wise operations on arrays (+ - .+ .- .*
+# ./, unary minus, += -= /=) of the values assigned to variables: a variable
+# is bound to a Pending, which later assignments build on, until an
+# expression of any other kind reads it, an element store, or the end of the
+# program forces it. Each graph forced runs as one Kernel, so values
+# overwritten before they are read are never computed, and the operations of
+# consecutive statements are fused without materializing what they pass on.
+# Shapes are checked as operations are deferred; any other error in them
+# surfaces when their value is forced.
+class LazyInterpreter(Interpreter):
+    def __init__(self, symbol_table=None, vectorize=False, hoist=False, cse=False, reorder=False, fuse=False, in_place=False,
+                 pool_bytes=0):
+        super().__init__(symbol_table, vectorize, hoist, cse, reorder, fuse, in_place, pool_bytes)
+        self.scheduler = Scheduler()
+
+    @on('node')
+    def visit(self, node):
+        return Interpreter.visit(self, node)
+
+    @when(AST.Program)
+    def visit(self, node):
+        self.prepare(node)
+        try:
+            signal = node.instructions.accept(self)
+        except ReturnValueException:
+            self.finish()
+            raise
+        self.finish()
+        return signal
+
+    @when(AST.Assignment)
+    def visit(self, node):
+        self.assign(node, self.deferring(node.right))
+        return None
+
+    @when(AST.Variable)
+    def visit(self, node):
+        return self.scheduler.force(self.frame.load(*node.slot))
+
+    @when(AST.VectorElement)
+    def visit(self, node):
+        return self.scheduler.force(self.frame.load(*node.slot))[node.index]
+
+    @when(AST.MatrixElement)
+    def visit(self, node):
+        return self.scheduler.force(self.frame.load(*node.slot))[node.row, node.col]
+
+    def assign(self, node, value):
+        if not isinstance(node.left, AST.Variable):
+            # The array changed may be an operand of a Pending
+            self.flush()
+            Interpreter.assign(self, node, self.scheduler.force(value))
+            return
+        slot = node.left.slot
+        current = self.frame.load(*slot)
+        if node.op != '=':
+            if node.op not in COMPOUND_OPS:
+                return
+            pending = self.scheduler.defer(DEFERRED_OPS[node.op], (current, value)) if node.op in DEFERRED_OPS else None
+            if pending is None:
+                value = COMPOUND_OPS[node.op](self.scheduler.force(current), self.scheduler.force(value))
+            else:
+                value = pending
+        if current.__class__ is Pending:
+            current.names -= 1
+        if value.__class__ is Pending:
+            value.names += 1
+        self.frame.store(*slot, value)
+
+    def deferring(self, expr):
+        # The value of expr, a Pending for an element-wise operation on arrays
+        cls = expr.__class__
+        if cls is AST.BinExpr and expr.op in ELEMENTWISE_UFUNCS:
+            left = self.deferring(expr.left)
+            right = self.deferring(expr.right)
+            pending = self.scheduler.defer(ELEMENTWISE_UFUNCS[expr.op], (left, right))
+            if pending is not None:
+                return pending
+            try:
+                operation = self.operations[expr]
+            except KeyError:
+                operation = self.operations[expr] = binary_operation(expr)
+            return operation(self.scheduler.force(left), self.scheduler.force(right))
+        if cls is AST.UnaryMinus:
+            operand = self.deferring(expr.expr)
+            pending = self.scheduler.defer(np.negative, (operand,))
+            if pending is not None:
+                return pending
+            return -self.scheduler.force(operand)
+        if cls is AST.Variable:
+            return self.frame.load(*expr.slot)
+        return expr.accept(self)
+
+    def flush(self):
+        # Computes the value of every variable bound to a Pending
+        slots = self.frame.slots
+        for index, value in enumerate(slots):
+            if value.__class__ is Pending:
+                slots[index] = self.scheduler.force(value)
+
+    def finish(self):
+        self.flush()
@@ -0,0 +1,115 @@
+import numpy as np
+from Fusion import Kernel, NUMBERS
+
+# Operations in a graph of Pendings nobody has observed; a larger one is
+# computed as soon as it is built, so graphs of statements repeated in a loop
+# stay small
+MAX_PENDING = 64
+
+
+# An element-wise operation on arrays whose value is not needed yet: ufunc
+# applied to operands that are arrays, numbers or other Pendings. Once
+# computed, `value` keeps the result and the operands are let go. `names`
+# counts the variables bound to it.
+class Pending(object):
+    __slots__ = ('ufunc', 'operands', 'shape', 'size', 'names', 'value')
+
+    def __init__(self, ufunc, operands, shape, size):
+        self.ufunc = ufunc
+        self.operands = operands
+        self.shape = shape
+        # Operations not computed yet in the graph under it, shared ones
+        # counted once for every use
+        self.size = size
+        self.names = 0
+        self.value = None
+
+
+# Builds the graphs of Pendings of one interpreter and computes them when
+# their value is needed, counting the operations deferred, those computed
+# (in how many kernels) and so those dropped: never computed because no one
+# read the value before the variables bound to it were overwritten.
+class Scheduler(object):
+    def __init__(self):
+        self.deferred = self.computed = self.kernels = 0
+
+    def report(self):
+        return (f"Lazy evaluation: {self.deferred} operations deferred, {self.computed} computed "
+                f"in {self.kernels} kernels, {self.deferred - self.computed} dropped")
+
+    def defer(self, ufunc, operands):
+        # A Pending applying ufunc to the operands, or None unless one of
+        # them is an array, the others numbers, and their shapes broadcast
+        # together, in which case the caller computes it as it would
+        # otherwise (raising the same errors)
+        shapes = []
+        size = 1
+        arrays = False
+        for operand in operands:
+            if operand.__class__ is Pending:
+                if operand.operands is not None:
+                    size += operand.size
+                shapes.append(operand.shape)
+                arrays = True
+            elif operand.__class__ is np.ndarray:
+                shapes.append(operand.shape)
+                arrays = True
+            elif isinstance(operand, NUMBERS):
+                shapes.append(())
+            else:
+                return None
+        if not arrays:
+            return None
+        try:
+            shape = np.broadcast_shapes(*shapes)
+        except ValueError:
+            return None
+        pending = Pending(ufunc, operands, shape, size)
+        self.deferred += 1
+        if size > MAX_PENDING:
+            self.force(pending)
+        return pending
+
+    def force(self, value):
+        # The value of a Pending, computed if need be; anything else as it is
+        if value.__class__ is not Pending:
+            return value
+        if value.operands is not None:
+            self.compute(value)
+        return value.value
+
+    def compute(self, root):
+        # Runs the graph under root as one Kernel. Pendings bound to a
+        # variable or used more than once in it are computed first, on their
+        # own, and become operands of the kernel; all the others are never
+        # materialized
+        uses = {}
+        work = [root]
+        while work:
+            for operand in work.pop().operands:
+                if operand.__class__ is Pending and operand.operands is not None:
+                    count = uses[operand] = uses.get(operand, 0) + 1
+                    if count == 1:
+                        work.append(operand)
+
+        code, leaves, indices = [], [], {}
+        work = [root]
+        while work:
+            item = work.pop()
+            if item.__class__ is tuple:
+                code.append(item)
+                self.computed += 1
+            elif item.__class__ is Pending and item.operands is not None and (
+                    item is root or (item.names == 0 and uses[item] == 1)):
+                work.append((item.ufunc, item.ufunc, len(item.operands)))
+                work.extend(reversed(item.operands))
+            else:
+                index = indices.get(id(item))
+                if index is None:
+                    index = indices[id(item)] = len(leaves)
+                    leaves.append(item)
+                code.append(index)
+
+        root.value = Kernel(code).run([self.force(leaf) for leaf in leaves])
+        root.operands = None
+        self.kernels += 1
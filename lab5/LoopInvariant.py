@@ -0,0 +1,169 @@
+import copy
+import AST
+from TypeChecker import NodeVisitor
+from visit import trampoline
+
+# Leaves are as cheap to evaluate as a cached value, hoisting them gains nothing
+LEAVES = (AST.Variable, AST.IntNum, AST.FloatNum, AST.String, AST.Constant, AST.Invariant)
+
+
+def definitions(node, defs):
+    # Names a statement may assign; returns False if it stores into an
+    # element, which can change any array through an alias
+    pure = True
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, AST.Instructions):
+            stack.extend(node.instructions)
+        elif isinstance(node, AST.Assignment):
+            defs.add(node.left.name)
+            pure = pure and isinstance(node.left, AST.Variable)
+        elif isinstance(node, AST.If):
+            stack.append(node.then_block)
+            if node.else_block:
+                stack.append(node.else_block)
+        elif isinstance(node, AST.While):
+            stack.append(node.body)
+        elif isinstance(node, AST.For):
+            defs.add(node.var.name)
+            stack.append(node.body)
+    return pure
+
+
+def operands(expr):
+    if isinstance(expr, (AST.BinExpr, AST.RelExpr)):
+        return (expr.left, expr.right)
+    if isinstance(expr, (AST.UnaryMinus, AST.Transposition, AST.Invariant, AST.Common)):
+        return (expr.expr,)
+    if isinstance(expr, AST.Vector):
+        return expr.elements
+    if isinstance(expr, AST.Matrix):
+        return expr.rows
+    return ()
+
+
+def reads(expr):
+    # Names read by every subexpression of `expr`, computed bottom up
+    found = {}
+    stack = [expr]
+    while stack:
+        expr = stack[-1]
+        if expr in found:
+            stack.pop()
+            continue
+        children = [child for child in operands(expr) if child not in found]
+        if children:
+            stack.extend(children)
+            continue
+        stack.pop()
+        if isinstance(expr, (AST.Variable, AST.VectorElement, AST.MatrixElement)):
+            found[expr] = {expr.name}
+        else:
+            found[expr] = set().union(*[found[child] for child in operands(expr)])
+    return found
+
+
+def uses(expr):
+    # Names an expression reads
+    return reads(expr)[expr]
+
+
+# Wraps every maximal loop-invariant expression of a While/For body in an
+# AST.Invariant, which Interpreter evaluates once per loop entry: on first
+# use, so loops running zero times or errors raised by the expression behave
+# exactly as before. Such values are shared between iterations, so only
+# expressions whose value is read and never bound to a name are hoisted.
+# Loops are processed outside in, hoisting each expression as far as it goes.
+# Statements and expressions are walked as generators run by trampoline.
+class LoopInvariantMotion(NodeVisitor):
+    def __init__(self):
+        self.hoisted = 0
+
+    def visit_Program(self, node):
+        yield node.instructions
+
+    def visit_Instructions(self, node):
+        for instruction in node.instructions:
+            yield instruction
+
+    def visit_If(self, node):
+        yield node.then_block
+        if node.else_block:
+            yield node.else_block
+
+    def visit_While(self, node):
+        node.invariants = []
+        self.hoist_loop(node, set())
+        yield node.body
+
+    def visit_For(self, node):
+        node.invariants = []
+        self.hoist_loop(node, {node.var.name})
+        yield node.body
+
+    def hoist_loop(self, loop, defs):
+        if not definitions(loop.body, defs):
+            return
+        self.loop, self.defs = loop, defs
+        if isinstance(loop, AST.While):
+            loop.condition = self.hoist(loop.condition, True)
+        trampoline(self.statement, loop.body)
+
+    def hoist(self, expr, readonly):
+        self.reads = reads(expr)
+        return trampoline(self.expression, (expr, readonly))
+
+    def statement(self, node):
+        if isinstance(node, AST.Instructions):
+            for instruction in node.instructions:
+                yield instruction
+        elif isinstance(node, AST.Assignment):
+            # `=` binds the value to a name, every other store copies it
+            readonly = node.op != '=' or not isinstance(node.left, AST.Variable)
+            node.right = self.hoist(node.right, readonly)
+        elif isinstance(node, AST.If):
+            node.condition = self.hoist(node.condition, True)
+            yield node.then_block
+            if node.else_block:
+                yield node.else_block
+        elif isinstance(node, AST.While):
+            node.condition = self.hoist(node.condition, True)
+            yield node.body
+        elif isinstance(node, AST.For):
+            node.range.start = self.hoist(node.range.start, True)
+            node.range.end = self.hoist(node.range.end, True)
+            yield node.body
+        elif isinstance(node, AST.Return):
+            node.expr = self.hoist(node.expr, True)
+        elif isinstance(node, AST.Print):
+            node.values = [self.hoist(val, True) for val in node.values]
+
+    def expression(self, item):
+        # Yields (operand, readonly) pairs, receiving the rewritten operand
+        expr, readonly = item
+        if isinstance(expr, LEAVES):
+            return expr
+        if readonly and not self.reads[expr] & self.defs:
+            invariant = AST.Invariant(expr, lineno=expr.lineno)
+            self.loop.invariants.append(invariant)
+            self.hoisted += 1
+            return invariant
+
+        # Expressions may be shared by several statements (HashConsing), so a
+        # changed one is rewritten as a copy
+        if isinstance(expr, (AST.BinExpr, AST.RelExpr)):
+            operands = expr.left, expr.right
+            left = yield expr.left, True
+            right = yield expr.right, True
+            if (left, right) != operands:
+                expr = copy.copy(expr)
+                expr.left, expr.right = left, right
+        elif isinstance(expr, (AST.UnaryMinus, AST.Transposition)):
+            # .T is a view of its operand, so the operand is only read if it is
+            operand = expr.expr
+            rewritten = yield operand, readonly or isinstance(expr, AST.UnaryMinus)
+            if rewritten is not operand:
+                expr = copy.copy(expr)
+                expr.expr = rewritten
+        return expr
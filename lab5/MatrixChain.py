@@ -0,0 +1,165 @@
+import copy
+from functools import lru_cache
+import AST
+from Rewriter import ExpressionRewriter
+import numpy as np
+
+# Operand types of a product TypeChecker checked as a matrix product
+MATRICES = ('matrix', 'matrix')
+
+# Longer chains are multiplied as written: ordering takes time cubic in the
+# number of factors
+MAX_FACTORS = 64
+
+
+def multiply(left, right):
+    # `*`: the matrix product of two arrays, Python's `*` for anything else
+    if left.__class__ is np.ndarray and right.__class__ is np.ndarray:
+        return left @ right
+    return left * right
+
+
+def is_product(expr):
+    return isinstance(expr, AST.BinExpr) and expr.op == '*' and getattr(expr, 'types', None) == MATRICES
+
+
+def dimensions(shapes):
+    # [p0, ..., pn] such that factor i is a p[i] x p[i + 1] matrix, or None
+    # unless every shape is known and each agrees with the next
+    if any(shape is None or len(shape) != 2 for shape in shapes):
+        return None
+    dims = [shapes[0][0]]
+    for rows, cols in shapes:
+        if rows != dims[-1]:
+            return None
+        dims.append(cols)
+    return dims
+
+
+@lru_cache(maxsize=256)
+def chain_order(dims):
+    # Classic matrix-chain DP over the factors' dimensions (a tuple):
+    # cost[i][j] is the fewest scalar multiplications computing factors i..j,
+    # split[i][j] the last factor of the left operand of the product doing it
+    n = len(dims) - 1
+    cost = [[0] * n for _ in range(n)]
+    split = [[None] * n for _ in range(n)]
+    for length in range(1, n):
+        for i in range(n - length):
+            j = i + length
+            cost[i][j], split[i][j] = min((cost[i][k] + cost[k + 1][j] + dims[i] * dims[k + 1] * dims[j + 1], k)
+                                          for k in range(i, j))
+    return cost[0][n - 1], split
+
+
+def written_cost(expr, dims):
+    # Scalar multiplications the chain rooted at expr takes as written
+    position = 0
+    # (rows, cols, cost) of the operands computed so far
+    results = []
+    stack = [(expr, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if not is_product(node):
+            results.append((dims[position], dims[position + 1], 0))
+            position += 1
+        elif not expanded:
+            stack.append((node, True))
+            stack.append((node.right, False))
+            stack.append((node.left, False))
+        else:
+            (rows, inner, left), (_, cols, right) = results[-2:]
+            results[-2:] = [(rows, cols, left + right + rows * inner * cols)]
+    return results[0][2]
+
+
+def multiply_in_order(values, split, i, j):
+    if i == j:
+        return values[i]
+    k = split[i][j]
+    return multiply_in_order(values, split, i, k) @ multiply_in_order(values, split, k + 1, j)
+
+
+def chain_product(values):
+    # Product of the values in the cheapest order for their shapes, or left
+    # to right unless they are all matrices whose shapes agree
+    dims = dimensions([value.shape if value.__class__ is np.ndarray else None for value in values])
+    if dims is None:
+        result = values[0]
+        for value in values[1:]:
+            result = multiply(result, value)
+        return result
+    return multiply_in_order(values, chain_order(tuple(dims))[1], 0, len(values) - 1)
+
+
+def rewritten(expr, factors):
+    # The chain rooted at expr with its factors taken from the iterator
+    # `factors`, copying the products that change
+    if not is_product(expr):
+        return next(factors)
+    left = rewritten(expr.left, factors)
+    right = rewritten(expr.right, factors)
+    if (left, right) != (expr.left, expr.right):
+        expr = copy.copy(expr)
+        expr.left, expr.right = left, right
+    return expr
+
+
+# Reorders each chain of matrix products (BinExprs TypeChecker checked as
+# such, e.g. A * B * C * D) so it takes the fewest scalar multiplications
+# for the shapes TypeChecker inferred. Chains with a factor of unknown shape
+# become an AST.Product, ordered at run time. Chains already in their
+# cheapest order, and any other expression, are left as they are.
+class MatrixChainOrdering(ExpressionRewriter):
+    def __init__(self):
+        self.reordered = 0
+        self.deferred = 0
+
+    def expression(self, expr):
+        if is_product(expr):
+            factors, shapes = self.chain(expr)
+            if factors is not None:
+                ordered = []
+                for factor in factors:
+                    ordered.append((yield factor))
+                return self.order(expr, ordered, shapes)
+        return (yield from super().expression(expr))
+
+    def chain(self, expr):
+        # Factors of the chain rooted at expr, left to right, and their
+        # shapes; None for chains too long to order
+        factors, shapes = [], []
+        stack = [(expr, None)]
+        while stack:
+            node, shape = stack.pop()
+            if is_product(node):
+                left_shape, right_shape = node.shapes
+                stack.append((node.right, right_shape))
+                stack.append((node.left, left_shape))
+            else:
+                factors.append(node)
+                shapes.append(shape)
+                if len(factors) > MAX_FACTORS:
+                    return None, None
+        return factors, shapes
+
+    def order(self, expr, factors, shapes):
+        dims = dimensions(shapes)
+        if dims is None:
+            self.deferred += 1
+            return AST.Product(factors, lineno=expr.lineno)
+        cost, split = chain_order(tuple(dims))
+        if cost < written_cost(expr, dims):
+            self.reordered += 1
+            return self.build(expr, factors, dims, split, 0, len(factors) - 1)
+        return rewritten(expr, iter(factors))
+
+    def build(self, expr, factors, dims, split, i, j):
+        if i == j:
+            return factors[i]
+        k = split[i][j]
+        node = AST.BinExpr('*', self.build(expr, factors, dims, split, i, k),
+                           self.build(expr, factors, dims, split, k + 1, j), lineno=expr.lineno)
+        node.types = MATRICES
+        node.shapes = ((dims[i], dims[k + 1]), (dims[k + 1], dims[j + 1]))
+        return node
@@ -46,4 +46,50 @@ class MemoryStack:
     def pop(self):
         if self.stack:
             return self.stack.pop()
-        return None
\ No newline at end of file
+        return None
+
+
+# Array-backed scope: variables live in a list at indices fixed by Resolver.
+# The name-based Memory interface is kept so a Frame can sit in a MemoryStack.
+class Frame:
+    def __init__(self, name, names, parent=None):
+        self.name = name
+        self.names = dict(names)
+        self.slots = [None] * len(self.names)
+        self.parent = parent
+
+    def extend(self, names):
+        # Gives slots to names declared since the frame was created, in
+        # declaration order, i.e. at the indices Resolver assigned them
+        for name in names:
+            if name not in self.names:
+                self.names[name] = len(self.slots)
+                self.slots.append(None)
+
+    def load(self, depth, slot):
+        frame = self
+        while depth:
+            frame = frame.parent
+            depth -= 1
+        return frame.slots[slot]
+
+    def store(self, depth, slot, value):
+        frame = self
+        while depth:
+            frame = frame.parent
+            depth -= 1
+        frame.slots[slot] = value
+
+    def has_key(self, name):
+        return name in self.names
+
+    def get(self, name):
+        if name in self.names:
+            return self.slots[self.names[name]]
+        return None
+
+    def put(self, name, value):
+        if name not in self.names:
+            self.names[name] = len(self.slots)
+            self.slots.append(None)
+        self.slots[self.names[name]] = value
@@ -0,0 +1,392 @@
+import AST
+from TypeChecker import NodeVisitor
+from Interpreter import Interpreter
+from visit import trampoline
+from collections import defaultdict
+import numpy as np
+
+# Folding `"ab" * n` stops at strings longer than this
+MAX_STRING = 1024
+
+LITERALS = (AST.IntNum, AST.FloatNum, AST.String, AST.Constant)
+NUMBERS = (AST.IntNum, AST.FloatNum)
+ELEMENTWISE = ('.+', '.-', '.*', './')
+
+INT, FLOAT, STRING, ARRAY, OTHER = 'int', 'float', 'string', 'array', 'other'
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, AST.Node):
+            count += 1
+            stack.extend(getattr(node, name, None)
+                         for cls in type(node).__mro__ for name in getattr(cls, '__slots__', ()))
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+    return count
+
+
+def combine(op, left, right):
+    # Kind of `left op right` at run time; OTHER covers NumPy scalars and errors
+    if OTHER in (left, right):
+        return OTHER
+    if op in ELEMENTWISE:
+        return ARRAY if ARRAY in (left, right) and STRING not in (left, right) else OTHER
+    if op == '*' and {left, right} == {STRING, INT}:
+        return STRING
+    if STRING in (left, right):
+        return OTHER
+    if ARRAY in (left, right):
+        return ARRAY
+    if op == '/' or FLOAT in (left, right):
+        return FLOAT
+    return INT
+
+
+def negate(kind):
+    return kind if kind in (INT, FLOAT, ARRAY) else OTHER
+
+
+# AST-to-AST pass run between TypeChecker and the backends:
+#  - folds constant scalar sub-trees into IntNum/FloatNum/String leaves,
+#  - rewrites x*1, 1*x, x+0, 0+x, x-0, x/1, --x and x'' to x where the kinds
+#    of values x can hold make that exact (no int/float change, no -0.0,
+#    no array aliasing),
+#  - replaces constant matrices (zeros/ones/eye, literals and arithmetic on
+#    them) by a Constant computed once, where the value is only read,
+#  - drops if/while statements whose condition is constant.
+# Values are computed with Interpreter itself, so folding cannot change results.
+class Optimizer(NodeVisitor):
+    def __init__(self):
+        self.interpreter = Interpreter(vectorize=False)
+        self.kinds = {}
+        # Nodes whose value does not depend on variables, by id; holding the
+        # nodes keeps their ids from being reused by new ones
+        self.pure = {}
+        self.before = self.after = 0
+        self.folded = self.simplified = self.precomputed = self.removed = 0
+
+    def optimize(self, ast):
+        self.before = count_nodes(ast)
+        self.infer(ast)
+        ast = self.visit(ast)
+        self.after = count_nodes(ast)
+        return ast
+
+    def report(self):
+        return (f"Optimizer: {self.before} -> {self.after} nodes "
+                f"({self.before - self.after} eliminated: {self.folded} folded, "
+                f"{self.simplified} simplified, {self.precomputed} precomputed, "
+                f"{self.removed} dead branches)")
+
+    # Kind inference: every kind a variable may hold anywhere in the program
+
+    def infer(self, ast):
+        definitions = defaultdict(list)
+        self.collect(ast, definitions)
+        self.kinds = {name: set() for name in definitions}
+        changed = True
+        while changed:
+            changed = False
+            for name, defs in definitions.items():
+                kinds = set()
+                for op, expr in defs:
+                    if op is None:
+                        kinds.add(INT)
+                    elif op == '=':
+                        kinds |= self.kind(expr)
+                    else:
+                        kinds |= {combine(op[0], left, right)
+                                  for left in self.kinds[name] for right in self.kind(expr)}
+                if not kinds <= self.kinds[name]:
+                    self.kinds[name] |= kinds
+                    changed = True
+
+    def collect(self, node, definitions):
+        if isinstance(node, AST.Program):
+            self.collect(node.instructions, definitions)
+        elif isinstance(node, AST.Instructions):
+            for instruction in node.instructions:
+                self.collect(instruction, definitions)
+        elif isinstance(node, AST.If):
+            self.collect(node.then_block, definitions)
+            if node.else_block:
+                self.collect(node.else_block, definitions)
+        elif isinstance(node, AST.While):
+            self.collect(node.body, definitions)
+        elif isinstance(node, AST.For):
+            definitions[node.var.name].append((None, None))
+            self.collect(node.body, definitions)
+        elif isinstance(node, AST.Assignment) and isinstance(node.left, AST.Variable):
+            definitions[node.left.name].append((node.op, node.right))
+
+    def kind(self, expr):
+        return trampoline(self.kind_of, expr)
+
+    def kind_of(self, expr):
+        # Yields operands, receiving their kinds
+        if isinstance(expr, AST.IntNum):
+            return {INT}
+        if isinstance(expr, AST.FloatNum):
+            return {FLOAT}
+        if isinstance(expr, AST.String):
+            return {STRING}
+        if isinstance(expr, AST.Constant):
+            return {ARRAY if isinstance(expr.value, np.ndarray) else OTHER}
+        if isinstance(expr, AST.Variable):
+            return self.kinds.get(expr.name, {OTHER})
+        if isinstance(expr, AST.BinExpr):
+            lefts = yield expr.left
+            rights = yield expr.right
+            return {combine(expr.op, left, right) for left in lefts for right in rights}
+        if isinstance(expr, AST.UnaryMinus):
+            return {negate(kind) for kind in (yield expr.expr)}
+        if isinstance(expr, (AST.Vector, AST.Matrix, AST.MatrixFunction)):
+            return {ARRAY}
+        if isinstance(expr, AST.Transposition):
+            return {ARRAY if kind == ARRAY else OTHER for kind in (yield expr.expr)}
+        return {OTHER}
+
+    def holds_only(self, expr, *kinds):
+        found = self.kind(expr)
+        return bool(found) and found <= set(kinds)
+
+    # Evaluation of constant sub-trees
+
+    def mark(self, node):
+        self.pure[id(node)] = node
+
+    def is_pure(self, node):
+        return id(node) in self.pure
+
+    def evaluate(self, node):
+        try:
+            # Anything NumPy would warn about is left for run time
+            with np.errstate(all='raise'):
+                return node.accept(self.interpreter)
+        except Exception:
+            return None
+
+    def literal(self, value, lineno):
+        if type(value) is int:
+            return AST.IntNum(value, lineno=lineno)
+        if type(value) is float:
+            return AST.FloatNum(value, lineno=lineno)
+        if type(value) is str and len(value) <= MAX_STRING:
+            return AST.String(value, lineno=lineno)
+        return None
+
+    def fold(self, node):
+        folded = self.literal(self.evaluate(node), node.lineno)
+        if folded is None:
+            return node
+        self.folded += 1
+        self.mark(folded)
+        return folded
+
+    def precompute(self, node):
+        # Called for operands that are only read, so a shared value is safe
+        if not self.is_pure(node) or isinstance(node, LITERALS):
+            return node
+        value = self.evaluate(node)
+        if isinstance(value, np.ndarray):
+            constant = AST.Constant(value, lineno=node.lineno)
+        else:
+            constant = self.literal(value, node.lineno)
+        if constant is None:
+            return node
+        self.precomputed += 1
+        self.mark(constant)
+        return constant
+
+    def condition(self, node):
+        # True/False for a comparison of two number literals, None otherwise
+        if isinstance(node, AST.RelExpr) and isinstance(node.left, NUMBERS) and isinstance(node.right, NUMBERS):
+            value = self.evaluate(node)
+            if isinstance(value, bool):
+                return value
+        return None
+
+    def is_number(self, node, value):
+        return isinstance(node, NUMBERS) and node.value == value
+
+    def unit_kinds(self, one):
+        return (INT, FLOAT, STRING) if isinstance(one, AST.IntNum) else (FLOAT,)
+
+    def simplify(self, node):
+        op, left, right = node.op, node.left, node.right
+        if op == '*':
+            # x * 1.0 turns ints into floats, x * 1 keeps every scalar as is
+            if self.is_number(right, 1) and self.holds_only(left, *self.unit_kinds(right)):
+                return left
+            if self.is_number(left, 1) and self.holds_only(right, *self.unit_kinds(left)):
+                return right
+        elif op == '+':
+            # -0.0 + 0 is 0.0, so this only holds for integers
+            if isinstance(right, AST.IntNum) and right.value == 0 and self.holds_only(left, INT):
+                return left
+            if isinstance(left, AST.IntNum) and left.value == 0 and self.holds_only(right, INT):
+                return right
+        elif op == '-':
+            if isinstance(right, AST.IntNum) and right.value == 0 and self.holds_only(left, INT, FLOAT):
+                return left
+        elif op == '/':
+            if self.is_number(right, 1) and self.holds_only(left, FLOAT):
+                return left
+        return None
+
+    # Transformation: every visit returns the node replacing its argument;
+    # children are visited by yielding them
+
+    def generic_visit(self, node):
+        return node
+
+    def visit_Program(self, node):
+        node.instructions = yield node.instructions
+        return node
+
+    def visit_Instructions(self, node):
+        instructions = []
+        for instruction in node.instructions:
+            instruction = yield instruction
+            if isinstance(instruction, AST.Instructions) and not instruction.instructions:
+                continue
+            instructions.append(instruction)
+        node.instructions = instructions
+        return node
+
+    def visit_BinExpr(self, node):
+        node.left = self.precompute((yield node.left))
+        node.right = self.precompute((yield node.right))
+
+        if self.is_pure(node.left) and self.is_pure(node.right):
+            self.mark(node)
+            if isinstance(node.left, LITERALS) and isinstance(node.right, LITERALS) \
+                    and node.op not in ELEMENTWISE:
+                return self.fold(node)
+            return node
+
+        simplified = self.simplify(node)
+        if simplified is not None:
+            self.simplified += 1
+            return simplified
+        return node
+
+    def visit_RelExpr(self, node):
+        node.left = self.precompute((yield node.left))
+        node.right = self.precompute((yield node.right))
+        return node
+
+    def visit_Assignment(self, node):
+        node.right = yield node.right
+        # Compound operators and element stores copy the value; `=` binds it
+        if node.op != '=' or not isinstance(node.left, AST.Variable):
+            node.right = self.precompute(node.right)
+        return node
+
+    def visit_If(self, node):
+        node.condition = yield node.condition
+        node.then_block = yield node.then_block
+        if node.else_block:
+            node.else_block = yield node.else_block
+
+        condition = self.condition(node.condition)
+        if condition is None:
+            return node
+        self.removed += 1
+        if condition:
+            return node.then_block
+        return node.else_block or AST.Instructions()
+
+    def visit_While(self, node):
+        node.condition = yield node.condition
+        node.body = yield node.body
+        if self.condition(node.condition) is False:
+            self.removed += 1
+            return AST.Instructions()
+        return node
+
+    def visit_For(self, node):
+        node.range = yield node.range
+        node.body = yield node.body
+        return node
+
+    def visit_Range(self, node):
+        node.start = yield node.start
+        node.end = yield node.end
+        return node
+
+    def visit_Return(self, node):
+        node.expr = self.precompute((yield node.expr))
+        return node
+
+    def visit_Print(self, node):
+        values = []
+        for val in node.values:
+            values.append(self.precompute((yield val)))
+        node.values = values
+        return node
+
+    def visit_IntNum(self, node):
+        self.mark(node)
+        return node
+
+    def visit_FloatNum(self, node):
+        self.mark(node)
+        return node
+
+    def visit_String(self, node):
+        self.mark(node)
+        return node
+
+    def visit_Constant(self, node):
+        self.mark(node)
+        return node
+
+    def visit_Vector(self, node):
+        elements = []
+        for elem in node.elements:
+            elements.append((yield elem))
+        node.elements = elements
+        if all(isinstance(elem, NUMBERS) for elem in node.elements):
+            self.mark(node)
+        return node
+
+    def visit_Matrix(self, node):
+        rows = []
+        for row in node.rows:
+            rows.append((yield row))
+        node.rows = rows
+        if all(self.is_pure(row) for row in node.rows):
+            self.mark(node)
+        return node
+
+    def visit_MatrixFunction(self, node):
+        self.mark(node)
+        return node
+
+    def visit_UnaryMinus(self, node):
+        expr = yield node.expr
+        if isinstance(expr, AST.UnaryMinus) and self.holds_only(expr.expr, INT, FLOAT):
+            self.simplified += 1
+            return expr.expr
+        node.expr = self.precompute(expr)
+        if self.is_pure(node.expr):
+            self.mark(node)
+            if isinstance(node.expr, NUMBERS):
+                return self.fold(node)
+        return node
+
+    def visit_Transposition(self, node):
+        expr = yield node.expr
+        if isinstance(expr, AST.Transposition) and self.holds_only(expr.expr, ARRAY):
+            self.simplified += 1
+            return expr.expr
+        # .T is a view, so the operand is not precomputed here
+        node.expr = expr
+        if self.is_pure(expr):
+            self.mark(node)
+        return node
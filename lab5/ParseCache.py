@@ -0,0 +1,162 @@
+import io
+import os
+import sys
+import zlib
+import pickle
+import hashlib
+from contextlib import redirect_stdout, redirect_stderr
+from DiskCache import DiskCache
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__mcache__", "parse")
+
+# Least recently used entries are evicted once the cache grows past this
+MAX_BYTES = 64 * 1024 * 1024
+
+# Sources whose changes can change the AST built for a program, or the
+# type errors reported for it: the modules building and checking the tree
+# and every module here they import, directly or not
+GRAMMAR_FILES = ("scanner.py", "fastscanner.py", "parser.py", "parsetab.py", "AST.py", "FlatAST.py",
+                 "CommonSubexpression.py", "LoopInvariant.py", "TypeChecker.py", "SymbolTable.py", "visit.py")
+
+
+def grammar_version():
+    digest = hashlib.sha256()
+    for name in GRAMMAR_FILES:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+class ParsedProgram(object):
+    # `output`/`log` hold what parsing wrote to stdout/stderr; `errors` and
+    # `symbol_table`, TypeChecker's, are None until the program has been
+    # type checked
+    symbol_table = None
+
+    def __init__(self, ast, output="", log="", errors=None, symbol_table=None):
+        self.ast = ast
+        self.output = output
+        self.log = log
+        self.errors = errors
+        self.symbol_table = symbol_table
+
+    def replay(self):
+        # Writes the messages parsing and type checking printed, in order
+        sys.stdout.write(self.output)
+        sys.stderr.write(self.log)
+        for error in self.errors or ():
+            print(error)
+
+
+def tree_builder(flat=False, share=False):
+    # Mparser's `nodes`: `flat` stores the AST in a FlatAST.FlatTree, `share`
+    # makes repeated expressions one node
+    import AST
+    from FlatAST import Builder
+    from CommonSubexpression import HashConsing
+
+    nodes = Builder() if flat else AST
+    return HashConsing(nodes) if share else nodes
+
+
+def parse_program(source, check=True, flat=False, share=False):
+    # `source` is the program text, or a file object read as it is parsed
+    from fastscanner import FastScanner
+    from parser import Mparser
+
+    nodes = tree_builder(flat, share)
+    parser = Mparser(nodes)
+    output, log = io.StringIO(), io.StringIO()
+    with redirect_stdout(output), redirect_stderr(log):
+        if isinstance(source, str):
+            ast = parser.parse(FastScanner().tokenize(source))
+        else:
+            ast = parser.parse_stream(source)
+        if share:
+            print(nodes.report(), file=sys.stderr)
+    program = ParsedProgram(ast, output.getvalue(), log.getvalue())
+    if check and ast is not None:
+        type_check(program)
+    return program
+
+
+def type_check(program):
+    from TypeChecker import TypeChecker
+
+    typeChecker = TypeChecker()
+    with redirect_stdout(io.StringIO()):
+        typeChecker.visit(program.ast)
+    program.errors = typeChecker.errors
+    program.symbol_table = typeChecker.symbol_table
+
+
+# Parsed programs pickled and compressed under __mcache__/parse, keyed by a
+# hash of the source text and of the grammar, so running an unchanged
+# script again skips the scanner and the parser (and type checking).
+class ParseCache(DiskCache):
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, flat=False, share=False):
+        super().__init__(directory, max_bytes, ".ast")
+        self.flat = flat
+        self.share = share
+        self.version = grammar_version() + ("-flat" if flat else "") + ("-shared" if share else "")
+
+    def path(self, chunks):
+        digest = hashlib.sha256(f"{self.version}\0".encode())
+        for chunk in chunks:
+            digest.update(chunk.encode())
+        return os.path.join(self.directory, f"{digest.hexdigest()}.ast")
+
+    def load(self, source, check=True):
+        # `source` is the program text or a seekable text file, which is
+        # hashed and, on a miss, parsed chunk by chunk
+        if isinstance(source, str):
+            path = self.path([source])
+        else:
+            from fastscanner import read_chunks
+            path = self.path(read_chunks(source))
+            source.seek(0)
+        program = self.fetch(path)
+        if program is not None:
+            # Entries written before symbol tables were kept are checked again
+            if check and (program.errors is None or program.symbol_table is None) and program.ast is not None:
+                type_check(program)
+                self.store(path, program)
+            self.count('hits')
+            return program
+
+        program = parse_program(source, check, self.flat, self.share)
+        self.count('misses')
+        self.store(path, program)
+        return program
+
+    def fetch(self, path):
+        data = self.read(path)
+        if data is None:
+            return None
+        try:
+            return pickle.loads(zlib.decompress(data))
+        except (EOFError, ValueError, zlib.error, pickle.UnpicklingError, AttributeError):
+            return None
+
+    def store(self, path, program):
+        try:
+            data = zlib.compress(pickle.dumps(program, pickle.HIGHEST_PROTOCOL))
+        except (RecursionError, pickle.PicklingError):
+            return
+        self.write(path, data)
+
+    def report(self):
+        return super().report("Parse cache")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    argparser = argparse.ArgumentParser(description="inspect the parse cache")
+    argparser.add_argument('--clear', action='store_true', help="remove every entry and reset the stats")
+    args = argparser.parse_args()
+
+    cache = ParseCache()
+    if args.clear:
+        cache.clear()
+    print(cache.report())
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+import numpy as np
+
+# Bytes of free arrays a pool keeps by default
+POOL_BYTES = 256 * 2 ** 20
+
+# Smaller arrays are left to NumPy's allocator, which recycles them as
+# cheaply as the pool would
+MIN_BYTES = 2 ** 20
+
+
+# Arrays no longer referred to, kept by (shape, dtype) so a later operation
+# producing an array of that size class writes into one rather than
+# allocating. Holds at most `capacity` bytes: the size class used least
+# recently gives up its oldest array first. Only arrays of `minimum` bytes
+# or more owning their data are kept; callers take arrays of that size only.
+class ArrayPool(object):
+    def __init__(self, capacity=POOL_BYTES, minimum=MIN_BYTES):
+        self.capacity = capacity
+        self.minimum = minimum
+        self.bytes = 0
+        # Lists of free arrays by size class, least recently used first
+        self.free = OrderedDict()
+        self.hits = self.misses = self.recycled = self.evicted = 0
+
+    def report(self):
+        taken = self.hits + self.misses
+        rate = self.hits / taken if taken else 0
+        return (f"Array pool: {self.hits} of {taken} arrays reused ({rate:.0%}), "
+                f"{self.recycled / 2 ** 20:.1f}MB recycled, {self.evicted} evicted")
+
+    def take(self, shape, dtype):
+        # An array of that shape and dtype, its contents undefined
+        key = (shape, dtype)
+        arrays = self.free.get(key)
+        if arrays is None:
+            self.misses += 1
+            return np.empty(shape, dtype)
+        array = arrays.pop()
+        if arrays:
+            self.free.move_to_end(key)
+        else:
+            del self.free[key]
+        self.bytes -= array.nbytes
+        self.hits += 1
+        self.recycled += array.nbytes
+        return array
+
+    def give(self, array):
+        # Keeps an array nothing refers to any more
+        if (array.nbytes < self.minimum or array.nbytes > self.capacity or array.base is not None
+                or not array.flags.c_contiguous):
+            return
+        key = (array.shape, array.dtype)
+        arrays = self.free.get(key)
+        if arrays is None:
+            arrays = self.free[key] = []
+        else:
+            self.free.move_to_end(key)
+        arrays.append(array)
+        self.bytes += array.nbytes
+        while self.bytes > self.capacity:
+            key, arrays = next(iter(self.free.items()))
+            self.bytes -= arrays.pop(0).nbytes
+            self.evicted += 1
+            if not arrays:
+                del self.free[key]
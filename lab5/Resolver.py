@@ -0,0 +1,93 @@
+from TypeChecker import NodeVisitor
+from SymbolTable import SymbolTable
+
+
+# Binds every variable reference to a fixed (depth, slot) pair, stored on the
+# node as `slot`, so the interpreter indexes frames instead of searching scopes.
+# Like MemoryStack.set, a name binds to the nearest scope declaring it and is
+# declared in the current one otherwise. Passing the SymbolTable built by
+# TypeChecker reuses its scopes and the slots of the names it declared.
+# Children are visited by yielding them (see NodeVisitor).
+class Resolver(NodeVisitor):
+    def __init__(self, symbol_table=None):
+        if symbol_table is None:
+            symbol_table = SymbolTable(None, "root")
+        self.symbol_table = symbol_table
+
+    def resolve(self, node):
+        self.visit(node)
+        return self.symbol_table
+
+    def bind(self, node):
+        slot = self.symbol_table.resolve(node.name)
+        if slot is None:
+            slot = (0, self.symbol_table.declare(node.name))
+        node.slot = slot
+
+    def visit_Program(self, node):
+        yield node.instructions
+
+    def visit_Instructions(self, node):
+        for instruction in node.instructions:
+            yield instruction
+
+    def visit_BinExpr(self, node):
+        yield node.left
+        yield node.right
+
+    def visit_RelExpr(self, node):
+        yield node.left
+        yield node.right
+
+    def visit_Assignment(self, node):
+        yield node.right
+        self.bind(node.left)
+
+    def visit_If(self, node):
+        yield node.condition
+        yield node.then_block
+        if node.else_block:
+            yield node.else_block
+
+    def visit_While(self, node):
+        yield node.condition
+        yield node.body
+
+    def visit_For(self, node):
+        yield node.range
+        self.bind(node.var)
+        yield node.body
+
+    def visit_Range(self, node):
+        yield node.start
+        yield node.end
+
+    def visit_Return(self, node):
+        yield node.expr
+
+    def visit_Print(self, node):
+        for val in node.values:
+            yield val
+
+    def visit_Variable(self, node):
+        self.bind(node)
+
+    def visit_VectorElement(self, node):
+        self.bind(node)
+
+    def visit_MatrixElement(self, node):
+        self.bind(node)
+
+    def visit_Vector(self, node):
+        for elem in node.elements:
+            yield elem
+
+    def visit_Matrix(self, node):
+        for row in node.rows:
+            yield row
+
+    def visit_UnaryMinus(self, node):
+        yield node.expr
+
+    def visit_Transposition(self, node):
+        yield node.expr
@@ -0,0 +1,64 @@
+import copy
+import AST
+from TypeChecker import NodeVisitor
+from visit import trampoline
+
+
+# Base of the passes replacing expressions by equivalent ones just before a
+# program runs (MatrixChainOrdering, ElementwiseFusion): visits every
+# statement and rewrites each expression in it through `expression`, a
+# generator run by trampoline that yields operands and receives them
+# rewritten. Subclasses override it for the expressions they replace.
+class ExpressionRewriter(NodeVisitor):
+    def visit_Program(self, node):
+        yield node.instructions
+
+    def visit_Instructions(self, node):
+        for instruction in node.instructions:
+            yield instruction
+
+    def visit_Assignment(self, node):
+        node.right = self.rewrite(node.right)
+
+    def visit_If(self, node):
+        node.condition = self.rewrite(node.condition)
+        yield node.then_block
+        if node.else_block:
+            yield node.else_block
+
+    def visit_While(self, node):
+        node.condition = self.rewrite(node.condition)
+        yield node.body
+
+    def visit_For(self, node):
+        yield node.body
+
+    def visit_Return(self, node):
+        node.expr = self.rewrite(node.expr)
+
+    def visit_Print(self, node):
+        node.values = [self.rewrite(val) for val in node.values]
+
+    def rewrite(self, expr):
+        return trampoline(self.expression, expr)
+
+    def expression(self, expr):
+        # Expressions may be shared by several statements (HashConsing), so a
+        # changed one is rewritten as a copy; Invariants and Commons are
+        # referred to by identity and updated in place
+        if isinstance(expr, (AST.BinExpr, AST.RelExpr)):
+            operands = expr.left, expr.right
+            left = yield expr.left
+            right = yield expr.right
+            if (left, right) != operands:
+                expr = copy.copy(expr)
+                expr.left, expr.right = left, right
+        elif isinstance(expr, (AST.UnaryMinus, AST.Transposition)):
+            operand = expr.expr
+            rewritten = yield operand
+            if rewritten is not operand:
+                expr = copy.copy(expr)
+                expr.expr = rewritten
+        elif isinstance(expr, (AST.Invariant, AST.Common)):
+            expr.expr = yield expr.expr
+        return expr
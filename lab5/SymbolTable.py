@@ -14,9 +14,27 @@ class SymbolTable(object):
         self.parent = parent
         self.name = name
         self.symbols = {}
+        self.slots = {}  # name -> index in this scope's runtime frame
     
     def put(self, name, symbol):
         self.symbols[name] = symbol
+        self.declare(name)
+
+    def declare(self, name):
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
+
+    def resolve(self, name):
+        # (number of scopes up, slot in that scope) or None if undeclared
+        depth = 0
+        scope = self
+        while scope is not None:
+            if name in scope.slots:
+                return (depth, scope.slots[name])
+            scope = scope.parent
+            depth += 1
+        return None
     
     def get(self, name):
         if name in self.symbols:
@@ -0,0 +1,310 @@
+import AST
+from Exceptions import *
+from visit import *
+from MatrixChain import multiply
+from DiskCache import DiskCache
+import os
+import sys
+import math
+import marshal
+import hashlib
+import numpy as np
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__mcache__", "code")
+
+# Least recently used code objects are evicted once the cache grows past this
+MAX_BYTES = 16 * 1024 * 1024
+
+ELEMENTWISE_OPS = {
+    '.+': 'np.add',
+    '.-': 'np.subtract',
+    '.*': 'np.multiply',
+    './': 'np.divide',
+}
+
+# Leaves whose value is never an array, so `*` with them is Python's
+SCALAR_LEAVES = (AST.IntNum, AST.FloatNum, AST.String)
+
+INDENT = "    "
+
+# CPython refuses source nesting more than 200 parentheses, so every
+# expression this many levels below the top of a statement's is computed
+# into a temporary first
+MAX_NESTING = 100
+
+
+def literal(value):
+    if isinstance(value, list):
+        return f"[{', '.join(literal(item) for item in value)}]"
+    if isinstance(value, float) and not math.isfinite(value):
+        return f"float({str(value)!r})"
+    return repr(value)
+
+
+# Generates Python source from an AST so CPython's own compiler and
+# bytecode interpreter run the program.
+class Transpiler(CachedDispatch):
+    def __init__(self):
+        self.names = set()
+        self.constants = []
+        # Expressions above the one being generated, and the assignments
+        # to temporaries the current statement needs first
+        self.depth = 0
+        self.spilled = []
+        self.temporaries = 0
+
+    def transpile(self, node):
+        body = self.visit(node)
+        lines = ["# Generated by Transpiler from an Mparser AST"]
+        # Precomputed matrices are built once, when the module is executed
+        lines += [f"K{i} = np.array({literal(value.tolist())}, dtype={value.dtype.name!r})"
+                  for i, value in enumerate(self.constants)]
+        lines += ["def program():"]
+        # Reading a variable that was never assigned yields None, as in Interpreter
+        lines += [INDENT + f"{name} = None" for name in sorted(self.names)]
+        lines += [INDENT + line for line in body]
+        return "\n".join(lines) + "\n"
+
+    def var(self, name):
+        # Prefix keeps script names from clashing with Python keywords and builtins
+        mangled = "v_" + name
+        self.names.add(mangled)
+        return mangled
+
+    def block(self, node):
+        return [INDENT + line for line in self.visit(node)]
+
+    def operands(self, *nodes):
+        self.depth += 1
+        texts = tuple(map(self.visit, nodes))
+        self.depth -= 1
+        return texts
+
+    def spill(self, text):
+        # text, or a temporary it is assigned to when nested too deeply
+        if self.depth == 0 or self.depth % MAX_NESTING:
+            return text
+        temporary = f"t{self.temporaries}"
+        self.temporaries += 1
+        self.spilled.append(f"{temporary} = {text}")
+        return temporary
+
+    def prelude(self):
+        # Assignments the statement generated since the last call needs first
+        spilled, self.spilled = self.spilled, []
+        return spilled
+
+    @on('node')
+    def visit(self, node):
+        pass
+
+    @when(AST.Program)
+    def visit(self, node):
+        return self.visit(node.instructions)
+
+    @when(AST.Instructions)
+    def visit(self, node):
+        lines = []
+        for instruction in node.instructions:
+            lines += self.visit(instruction)
+        return lines or ["pass"]
+
+    @when(AST.BinExpr)
+    def visit(self, node):
+        left, right = self.operands(node.left, node.right)
+        if node.op in ELEMENTWISE_OPS:
+            return self.spill(f"{ELEMENTWISE_OPS[node.op]}({left}, {right})")
+        if node.op == '*' and not isinstance(node.left, SCALAR_LEAVES) and not isinstance(node.right, SCALAR_LEAVES):
+            # The matrix product if both are arrays
+            return self.spill(f"multiply({left}, {right})")
+        return self.spill(f"({left} {node.op} {right})")
+
+    @when(AST.RelExpr)
+    def visit(self, node):
+        left, right = self.operands(node.left, node.right)
+        return self.spill(f"({left} {node.op} {right})")
+
+    @when(AST.Assignment)
+    def visit(self, node):
+        value = self.visit(node.right)
+        lines = self.prelude()
+
+        if isinstance(node.left, AST.Variable):
+            var = self.var(node.left.name)
+            if node.op == '=':
+                return lines + [f"{var} = {value}"]
+            # Not `var op= value`: that would update NumPy arrays in place
+            if node.op == '*=':
+                return lines + [f"{var} = multiply({var}, {value})"]
+            return lines + [f"{var} = {var} {node.op[0]} {value}"]
+
+        elif isinstance(node.left, AST.VectorElement):
+            return lines + [f"{self.var(node.left.name)}[{node.left.index}] = {value}"]
+
+        elif isinstance(node.left, AST.MatrixElement):
+            return lines + [f"{self.var(node.left.name)}[{node.left.row}, {node.left.col}] = {value}"]
+
+        return lines
+
+    @when(AST.If)
+    def visit(self, node):
+        condition = self.visit(node.condition)
+        lines = self.prelude() + [f"if {condition}:"] + self.block(node.then_block)
+        if node.else_block:
+            lines += ["else:"] + self.block(node.else_block)
+        return lines
+
+    @when(AST.While)
+    def visit(self, node):
+        condition = self.visit(node.condition)
+        lines = self.prelude()
+        if lines:
+            # The temporaries are computed again before every test
+            return (["while True:"] + [INDENT + line for line in lines]
+                    + [INDENT + f"if not {condition}:", INDENT * 2 + "break"] + self.block(node.body))
+        return [f"while {condition}:"] + self.block(node.body)
+
+    @when(AST.For)
+    def visit(self, node):
+        var = self.var(node.var.name)
+        range_text = self.visit(node.range)
+        return self.prelude() + [f"for {var} in {range_text}:"] + self.block(node.body)
+
+    @when(AST.Range)
+    def visit(self, node):
+        return f"range(int({self.visit(node.start)}), int({self.visit(node.end)}) + 1)"
+
+    @when(AST.Break)
+    def visit(self, node):
+        return ["break"]
+
+    @when(AST.Continue)
+    def visit(self, node):
+        return ["continue"]
+
+    @when(AST.Return)
+    def visit(self, node):
+        value = self.visit(node.expr)
+        return self.prelude() + [f"raise ReturnValueException({value})"]
+
+    @when(AST.Print)
+    def visit(self, node):
+        values = [self.visit(val) for val in node.values]
+        return self.prelude() + [f"print({', '.join(values)})"]
+
+    @when(AST.IntNum)
+    def visit(self, node):
+        return repr(node.value)
+
+    @when(AST.FloatNum)
+    def visit(self, node):
+        return literal(node.value)
+
+    @when(AST.String)
+    def visit(self, node):
+        return repr(node.value)
+
+    @when(AST.Constant)
+    def visit(self, node):
+        if isinstance(node.value, np.ndarray):
+            self.constants.append(node.value)
+            return f"K{len(self.constants) - 1}"
+        return literal(node.value)
+
+    @when(AST.Variable)
+    def visit(self, node):
+        return self.var(node.name)
+
+    @when(AST.VectorElement)
+    def visit(self, node):
+        return f"{self.var(node.name)}[{node.index}]"
+
+    @when(AST.MatrixElement)
+    def visit(self, node):
+        return f"{self.var(node.name)}[{node.row}, {node.col}]"
+
+    @when(AST.Vector)
+    def visit(self, node):
+        return f"np.array([{', '.join(self.visit(elem) for elem in node.elements)}])"
+
+    @when(AST.Matrix)
+    def visit(self, node):
+        return f"np.array([{', '.join(self.visit(row) for row in node.rows)}])"
+
+    @when(AST.MatrixFunction)
+    def visit(self, node):
+        if isinstance(node.size, tuple):
+            rows, cols = node.size
+        else:
+            rows = cols = node.size
+
+        if node.name == 'eye':
+            return f"np.eye({rows}, {cols})"
+        return f"np.{node.name}(({rows}, {cols}))"
+
+    @when(AST.UnaryMinus)
+    def visit(self, node):
+        operand, = self.operands(node.expr)
+        return self.spill(f"(-{operand})")
+
+    @when(AST.Transposition)
+    def visit(self, node):
+        operand, = self.operands(node.expr)
+        return self.spill(f"({operand}).T")
+
+
+# Code objects of transpiled programs marshalled under __mcache__/code,
+# keyed by a hash of the generated source
+class CodeCache(DiskCache):
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        super().__init__(directory, max_bytes, ".bin")
+
+    def path(self, source):
+        digest = hashlib.sha256(source.encode()).hexdigest()
+        # Marshal data is only valid for the interpreter version that wrote it
+        return os.path.join(self.directory, f"{digest}.{sys.implementation.cache_tag}.bin")
+
+    def compile(self, source):
+        path = self.path(source)
+        data = self.read(path)
+        if data is not None:
+            try:
+                code = marshal.loads(data)
+                self.count('hits')
+                return code
+            except (EOFError, ValueError, TypeError):
+                pass
+
+        code = compile(source, "<transpiled>", "exec")
+        self.count('misses')
+        self.write(path, marshal.dumps(code))
+        return code
+
+    def report(self):
+        return super().report("Code cache")
+
+
+def execute(code):
+    namespace = {'np': np, 'multiply': multiply, 'ReturnValueException': ReturnValueException}
+    exec(code, namespace)
+    return namespace['program']()
+
+
+if __name__ == '__main__':
+    from scanner import Scanner
+    from parser import Mparser
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else "triangle.m"
+
+    try:
+        with open(filename, "r") as file:
+            text = file.read()
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found")
+        sys.exit(1)
+
+    ast = Mparser().parse(Scanner().tokenize(text))
+    if ast is None:
+        print("Parsing failed")
+        sys.exit(1)
+    print(Transpiler().transpile(ast), end="")
@@ -1,4 +1,5 @@
 from __future__ import print_function
+import io
 import AST
 
 
@@ -9,160 +10,190 @@ def addToClass(cls):
     return decorator
 
 
+# Every node lists its dump as a generator of lines (indentation included)
+# and (child, indent) pairs standing for the child's lines; writeTree walks
+# them with an explicit stack of generators and writes each line to `out`
+# as soon as it is produced, so deep trees neither recurse nor get copied
+# level by level. Lines are separated by "\n", with none after the last.
 class TreePrinter:
+    @addToClass(AST.Node)
+    def writeTree(self, out, indent=0):
+        stack = [iter(((self, indent),))]
+        separator = ""
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+            elif isinstance(item, str):
+                out.write(separator)
+                out.write(item)
+                separator = "\n"
+            else:
+                node, indent = item
+                stack.append(node.printLines(indent))
+
+    @addToClass(AST.Node)
+    def printTree(self, indent=0):
+        out = io.StringIO()
+        self.writeTree(out, indent)
+        return out.getvalue()
+
     @addToClass(AST.Program)
-    def printTree(self, indent=0):
+    def printLines(self, indent=0):
         if self.instructions:
-            return self.instructions.printTree(indent)
-        return ""
+            yield self.instructions, indent
+        else:
+            yield ""
 
     @addToClass(AST.Instructions)
-    def printTree(self, indent=0):
-        result = []
+    def printLines(self, indent=0):
+        empty = True
         for instruction in self.instructions:
-            result.append(instruction.printTree(indent))
-        return "\n".join(result)
+            empty = False
+            yield instruction, indent
+        if empty:
+            yield ""
 
     @addToClass(AST.BinExpr)
-    def printTree(self, indent=0):
-        s = "|  " * indent + self.op + "\n"
-        s += self.left.printTree(indent + 1) + "\n"
-        s += self.right.printTree(indent + 1)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + self.op
+        yield self.left, indent + 1
+        yield self.right, indent + 1
 
     @addToClass(AST.RelExpr)
-    def printTree(self, indent=0):
-        s = "|  " * indent + self.op + "\n"
-        s += self.left.printTree(indent + 1) + "\n"
-        s += self.right.printTree(indent + 1)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + self.op
+        yield self.left, indent + 1
+        yield self.right, indent + 1
 
     @addToClass(AST.Assignment)
-    def printTree(self, indent=0):
-        s = "|  " * indent + self.op + "\n"
-        s += self.left.printTree(indent + 1) + "\n"
-        s += self.right.printTree(indent + 1)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + self.op
+        yield self.left, indent + 1
+        yield self.right, indent + 1
 
     @addToClass(AST.If)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "IF\n"
-        s += self.condition.printTree(indent + 1) + "\n"
-        s += "|  " * indent + "THEN\n"
-        s += self.then_block.printTree(indent + 1)
+    def printLines(self, indent=0):
+        yield "|  " * indent + "IF"
+        yield self.condition, indent + 1
+        yield "|  " * indent + "THEN"
+        yield self.then_block, indent + 1
         if self.else_block:
-            s += "\n" + "|  " * indent + "ELSE\n"
-            s += self.else_block.printTree(indent + 1)
-        return s
+            yield "|  " * indent + "ELSE"
+            yield self.else_block, indent + 1
 
     @addToClass(AST.While)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "WHILE\n"
-        s += self.condition.printTree(indent + 1) + "\n"
-        s += self.body.printTree(indent + 1)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "WHILE"
+        yield self.condition, indent + 1
+        yield self.body, indent + 1
 
     @addToClass(AST.For)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "FOR\n"
-        s += self.var.printTree(indent + 1) + "\n"
-        s += self.range.printTree(indent + 1) + "\n"
-        s += self.body.printTree(indent + 1)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "FOR"
+        yield self.var, indent + 1
+        yield self.range, indent + 1
+        yield self.body, indent + 1
 
     @addToClass(AST.Range)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "RANGE\n"
-        s += self.start.printTree(indent + 1) + "\n"
-        s += self.end.printTree(indent + 1)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "RANGE"
+        yield self.start, indent + 1
+        yield self.end, indent + 1
 
     @addToClass(AST.Break)
-    def printTree(self, indent=0):
-        return "|  " * indent + "BREAK"
+    def printLines(self, indent=0):
+        yield "|  " * indent + "BREAK"
 
     @addToClass(AST.Continue)
-    def printTree(self, indent=0):
-        return "|  " * indent + "CONTINUE"
+    def printLines(self, indent=0):
+        yield "|  " * indent + "CONTINUE"
 
     @addToClass(AST.Return)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "RETURN\n"
-        s += self.expr.printTree(indent + 1)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "RETURN"
+        yield self.expr, indent + 1
 
     @addToClass(AST.Print)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "PRINT\n"
-        for i, val in enumerate(self.values):
-            s += val.printTree(indent + 1)
-            if i < len(self.values) - 1:
-                s += "\n"
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "PRINT"
+        for val in self.values:
+            yield val, indent + 1
 
     @addToClass(AST.IntNum)
-    def printTree(self, indent=0):
-        return "|  " * indent + str(self.value)
+    def printLines(self, indent=0):
+        yield "|  " * indent + str(self.value)
 
     @addToClass(AST.FloatNum)
-    def printTree(self, indent=0):
-        return "|  " * indent + str(self.value)
+    def printLines(self, indent=0):
+        yield "|  " * indent + str(self.value)
 
     @addToClass(AST.String)
-    def printTree(self, indent=0):
-        return "|  " * indent + '"' + self.value + '"'
+    def printLines(self, indent=0):
+        yield "|  " * indent + '"' + self.value + '"'
+
+    @addToClass(AST.Constant)
+    def printLines(self, indent=0):
+        yield "|  " * indent + "CONST " + " ".join(str(self.value).split())
+
+    @addToClass(AST.Invariant)
+    def printLines(self, indent=0):
+        yield self.expr, indent
+
+    @addToClass(AST.Common)
+    def printLines(self, indent=0):
+        yield self.expr, indent
+
+    @addToClass(AST.Fused)
+    def printLines(self, indent=0):
+        yield self.expr, indent
+
+    @addToClass(AST.Product)
+    def printLines(self, indent=0):
+        yield "|  " * indent + "*"
+        for factor in self.factors:
+            yield factor, indent + 1
 
     @addToClass(AST.Variable)
-    def printTree(self, indent=0):
-        return "|  " * indent + self.name
+    def printLines(self, indent=0):
+        yield "|  " * indent + self.name
 
     @addToClass(AST.VectorElement)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "REF\n"
-        s += "|  " * (indent + 1) + self.name + "\n"
-        s += "|  " * (indent + 1) + str(self.index)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "REF"
+        yield "|  " * (indent + 1) + self.name
+        yield "|  " * (indent + 1) + str(self.index)
 
     @addToClass(AST.MatrixElement)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "REF\n"
-        s += "|  " * (indent + 1) + self.name + "\n"
-        s += "|  " * (indent + 1) + str(self.row) + "\n"
-        s += "|  " * (indent + 1) + str(self.col)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "REF"
+        yield "|  " * (indent + 1) + self.name
+        yield "|  " * (indent + 1) + str(self.row)
+        yield "|  " * (indent + 1) + str(self.col)
 
     @addToClass(AST.Matrix)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "VECTOR\n"
-        for i, row in enumerate(self.rows):
-            s += row.printTree(indent + 1)
-            if i < len(self.rows) - 1:
-                s += "\n"
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "VECTOR"
+        for row in self.rows:
+            yield row, indent + 1
 
     @addToClass(AST.Vector)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "VECTOR\n"
-        for i, elem in enumerate(self.elements):
-            s += elem.printTree(indent + 1)
-            if i < len(self.elements) - 1:
-                s += "\n"
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "VECTOR"
+        for elem in self.elements:
+            yield elem, indent + 1
 
     @addToClass(AST.MatrixFunction)
-    def printTree(self, indent=0):
-        s = "|  " * indent + self.name + "\n"
-        s += "|  " * (indent + 1) + str(self.size)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + self.name
+        yield "|  " * (indent + 1) + str(self.size)
 
     @addToClass(AST.UnaryMinus)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "-\n"
-        s += self.expr.printTree(indent + 1)
-        return s
+    def printLines(self, indent=0):
+        yield "|  " * indent + "-"
+        yield self.expr, indent + 1
 
     @addToClass(AST.Transposition)
-    def printTree(self, indent=0):
-        s = "|  " * indent + "TRANSPOSE\n"
-        s += self.expr.printTree(indent + 1)
-        return s
\ No newline at end of file
+    def printLines(self, indent=0):
+        yield "|  " * indent + "TRANSPOSE"
+        yield self.expr, indent + 1
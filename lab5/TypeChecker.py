@@ -2,9 +2,17 @@
 
 import AST
 from SymbolTable import SymbolTable, VariableSymbol
+from visit import trampoline
 
+# A visit_X method may visit children by yielding them, receiving what their
+# visit returns (`info = yield node.left`); such methods run on an explicit
+# stack, so they handle nesting of any depth. Plain calls to self.visit work
+# too, but use a few Python frames per level.
 class NodeVisitor(object):
     def visit(self, node):
+        return trampoline(self.dispatch, node)
+
+    def dispatch(self, node):
         method = 'visit_' + node.__class__.__name__
         visitor = getattr(self, method, self.generic_visit)
         return visitor(node)
@@ -92,15 +100,15 @@ class TypeChecker(NodeVisitor):
         print(f"Line {lineno}: {msg}")
 
     def visit_Program(self, node):
-        self.visit(node.instructions)
+        yield node.instructions
 
     def visit_Instructions(self, node):
         for instruction in node.instructions:
-            self.visit(instruction)
+            yield instruction
 
     def visit_BinExpr(self, node):
-        left_info = self.visit(node.left)
-        right_info = self.visit(node.right)
+        left_info = yield node.left
+        right_info = yield node.right
         op = node.op
         
         if left_info is None or right_info is None:
@@ -117,6 +125,9 @@ class TypeChecker(NodeVisitor):
                 return None
             
             result_type, constraint = self.ttype[op][key]
+            # Annotations the interpreter specializes the operation on
+            node.types = key
+            node.shapes = (left_shape, right_shape)
             
             # Check size constraints
             if constraint == 'same_size':
@@ -141,8 +152,8 @@ class TypeChecker(NodeVisitor):
         return None
 
     def visit_RelExpr(self, node):
-        left_info = self.visit(node.left)
-        right_info = self.visit(node.right)
+        left_info = yield node.left
+        right_info = yield node.right
         
         if left_info is None or right_info is None:
             return ('int', None)
@@ -158,7 +169,7 @@ class TypeChecker(NodeVisitor):
 
     def visit_Assignment(self, node):
         # First evaluate the right side
-        right_info = self.visit(node.right)
+        right_info = yield node.right
         
         if right_info is None:
             return None
@@ -188,30 +199,37 @@ class TypeChecker(NodeVisitor):
                         key = (left_type, right_type)
                         if key not in self.ttype[op_base]:
                             self.error(f"Invalid compound assignment {node.op}: {left_type} and {right_type}", node.lineno)
+                        elif self.ttype[op_base][key][1] == 'matrix_mul':
+                            # A *= B is A = A * B, a matrix product
+                            if left_shape and right_shape:
+                                if left_shape[1] != right_shape[0]:
+                                    self.error(f"Matrix multiplication: incompatible dimensions {left_shape} and {right_shape}", node.lineno)
+                                else:
+                                    symbol.shape = (left_shape[0], right_shape[1])
                         elif left_type in ['vector', 'matrix'] and left_shape != right_shape:
                             self.error(f"Incompatible shapes for {node.op}: {left_shape} and {right_shape}", node.lineno)
         
         # Handle matrix/vector element assignment
         elif isinstance(node.left, (AST.MatrixElement, AST.VectorElement)):
             # Evaluate left side to check bounds
-            self.visit(node.left)
+            yield node.left
         
         return right_info
 
     def visit_If(self, node):
-        self.visit(node.condition)
-        self.visit(node.then_block)
+        yield node.condition
+        yield node.then_block
         if node.else_block:
-            self.visit(node.else_block)
+            yield node.else_block
 
     def visit_While(self, node):
-        self.visit(node.condition)
+        yield node.condition
         self.loop_depth += 1
-        self.visit(node.body)
+        yield node.body
         self.loop_depth -= 1
 
     def visit_For(self, node):
-        range_info = self.visit(node.range)
+        range_info = yield node.range
         
         # Register loop variable as int
         if isinstance(node.var, AST.Variable):
@@ -219,12 +237,12 @@ class TypeChecker(NodeVisitor):
             self.symbol_table.put(node.var.name, symbol)
         
         self.loop_depth += 1
-        self.visit(node.body)
+        yield node.body
         self.loop_depth -= 1
 
     def visit_Range(self, node):
-        start_info = self.visit(node.start)
-        end_info = self.visit(node.end)
+        start_info = yield node.start
+        end_info = yield node.end
         
         if start_info and start_info[0] not in ['int', 'float']:
             self.error(f"Range start must be numeric", node.lineno)
@@ -243,11 +261,11 @@ class TypeChecker(NodeVisitor):
             self.error("Continue statement outside loop", node.lineno)
 
     def visit_Return(self, node):
-        self.visit(node.expr)
+        yield node.expr
 
     def visit_Print(self, node):
         for val in node.values:
-            self.visit(val)
+            yield val
 
     def visit_IntNum(self, node):
         return ('int', None)
@@ -258,6 +276,18 @@ class TypeChecker(NodeVisitor):
     def visit_String(self, node):
         return ('string', None)
 
+    def visit_Constant(self, node):
+        value = node.value
+        if isinstance(value, str):
+            return ('string', None)
+        if isinstance(value, float):
+            return ('float', None)
+        if isinstance(value, int):
+            return ('int', None)
+        if value.ndim == 1:
+            return ('vector', value.shape)
+        return ('matrix', value.shape)
+
     def visit_Variable(self, node):
         symbol = self.symbol_table.get(node.name)
         if symbol is None:
@@ -328,7 +358,7 @@ class TypeChecker(NodeVisitor):
                 self.error(f"Matrix row {i} is not a vector", node.lineno)
                 continue
             
-            row_info = self.visit(row)
+            row_info = yield row
             if row_info and row_info[1]:
                 row_sizes.append(row_info[1][0])
             else:
@@ -349,7 +379,7 @@ class TypeChecker(NodeVisitor):
         
         # Visit all elements
         for elem in node.elements:
-            self.visit(elem)
+            yield elem
         
         return ('vector', (len(node.elements),))
 
@@ -373,7 +403,7 @@ class TypeChecker(NodeVisitor):
             return 'matrix', (size_value, size_value)
 
     def visit_UnaryMinus(self, node):
-        expr_info = self.visit(node.expr)
+        expr_info = yield node.expr
         if expr_info is None:
             return None
         
@@ -385,7 +415,7 @@ class TypeChecker(NodeVisitor):
         return expr_info
 
     def visit_Transposition(self, node):
-        expr_info = self.visit(node.expr)
+        expr_info = yield node.expr
         if expr_info is None:
             return None
         
@@ -0,0 +1,91 @@
+from Bytecode import *
+from Exceptions import *
+import numpy as np
+
+
+class VM(object):
+    def __init__(self, code):
+        self.code = code
+        self.registers = list(code.registers)
+
+    def run(self):
+        code = self.code.instructions
+        r = self.registers
+        add, subtract, multiply, divide = np.add, np.subtract, np.multiply, np.divide
+        ndarray = np.ndarray
+        pc = 0
+
+        # Opcodes are tested roughly in order of how often they execute
+        while True:
+            op, a, b, c = code[pc]
+            pc += 1
+            if op == ADD:
+                r[a] = r[b] + r[c]
+            elif op == SUB:
+                r[a] = r[b] - r[c]
+            elif op == DIV:
+                r[a] = r[b] / r[c]
+            elif op == MUL:
+                x, y = r[b], r[c]
+                # `*` on two arrays is their matrix product
+                r[a] = x @ y if x.__class__ is ndarray and y.__class__ is ndarray else x * y
+            elif op == FORLOOP:
+                i = r[a]
+                if i <= r[a + 1]:
+                    r[b] = i
+                    r[a] = i + 1
+                    pc = c
+            elif op == MOVE:
+                r[a] = r[b]
+            elif op == JGT:
+                if r[a] > r[b]:
+                    pc = c
+            elif op == JLT:
+                if r[a] < r[b]:
+                    pc = c
+            elif op == JEQ:
+                if r[a] == r[b]:
+                    pc = c
+            elif op == JNE:
+                if r[a] != r[b]:
+                    pc = c
+            elif op == JLE:
+                if r[a] <= r[b]:
+                    pc = c
+            elif op == JGE:
+                if r[a] >= r[b]:
+                    pc = c
+            elif op == JUMP:
+                pc = a
+            elif op == JTRUE:
+                if r[a]:
+                    pc = b
+            elif op == FORINIT:
+                r[a] = int(r[b])
+                r[a + 1] = int(r[c])
+            elif op == DOTADD:
+                r[a] = add(r[b], r[c])
+            elif op == DOTSUB:
+                r[a] = subtract(r[b], r[c])
+            elif op == DOTMUL:
+                r[a] = multiply(r[b], r[c])
+            elif op == DOTDIV:
+                r[a] = divide(r[b], r[c])
+            elif op == NEG:
+                r[a] = -r[b]
+            elif op == TRANSPOSE:
+                r[a] = r[b].T
+            elif op == GETITEM:
+                r[a] = r[b][r[c]]
+            elif op == SETITEM:
+                r[a][r[b]] = r[c]
+            elif op == ARRAY:
+                r[a] = np.array(r[b:b + c])
+            elif op == CALL:
+                r[a] = r[b]()
+            elif op == PRINT:
+                print(' '.join(str(value) for value in r[a:a + b]))
+            elif op == RETURN:
+                raise ReturnValueException(r[a])
+            elif op == HALT:
+                return None
@@ -0,0 +1,257 @@
+import AST
+from TypeChecker import NodeVisitor
+from visit import trampoline
+import numpy as np
+
+# Loops shorter than this are not worth the NumPy call overhead
+MIN_TRIP_COUNT = 16
+
+# Integers stay below this so int64 arithmetic can neither overflow nor lose
+# precision when converted to float, i.e. it matches Python ints exactly
+INT_LIMIT = 2 ** 53
+
+ARITHMETIC_OPS = {
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '/': np.true_divide,
+}
+
+ACCUMULATE_OPS = {
+    '+=': np.add,
+    '-=': np.subtract,
+    '*=': np.multiply,
+    '/=': np.true_divide,
+}
+
+
+class NotVectorizable(Exception):
+    pass
+
+
+def flatten(node):
+    statements = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, AST.Instructions):
+            stack.extend(reversed(node.instructions))
+        else:
+            statements.append(node)
+    return statements
+
+
+def names(expr):
+    # Variables read by an arithmetic expression, None if it has other nodes
+    found = set()
+    stack = [expr]
+    while stack:
+        expr = stack.pop()
+        if isinstance(expr, AST.Variable):
+            found.add(expr.name)
+        elif isinstance(expr, (AST.UnaryMinus, AST.Invariant, AST.Common)):
+            stack.append(expr.expr)
+        elif isinstance(expr, AST.BinExpr) and expr.op in ARITHMETIC_OPS:
+            stack.append(expr.left)
+            stack.append(expr.right)
+        elif not isinstance(expr, (AST.IntNum, AST.FloatNum)):
+            return None
+    return found
+
+
+def is_int(value):
+    if isinstance(value, np.ndarray):
+        return value.dtype.kind == 'i'
+    return isinstance(value, (int, np.integer))
+
+
+def magnitude(value):
+    if isinstance(value, np.ndarray):
+        return int(np.abs(value).max()) if value.size else 0
+    return int(abs(value))
+
+
+def check_int(value):
+    if is_int(value) and magnitude(value) >= INT_LIMIT:
+        raise NotVectorizable()
+    return value
+
+
+def scalar(value):
+    # Only plain Python numbers have semantics NumPy reproduces exactly
+    if isinstance(value, np.generic):
+        value = value.item()
+    if type(value) is float:
+        return value
+    if type(value) is int:
+        return check_int(value)
+    raise NotVectorizable()
+
+
+def arithmetic(op, left, right):
+    if op == '/':
+        # Python raises ZeroDivisionError where NumPy would produce inf
+        if np.any(np.equal(right, 0)):
+            raise NotVectorizable()
+    elif op == '*' and is_int(left) and is_int(right):
+        if magnitude(left) * magnitude(right) >= INT_LIMIT:
+            raise NotVectorizable()
+    return check_int(ARITHMETIC_OPS[op](left, right))
+
+
+def evaluate(expr, env):
+    return trampoline(lambda expr: evaluation(expr, env), expr)
+
+
+def evaluation(expr, env):
+    # Yields operands, receiving their values
+    if isinstance(expr, AST.Variable):
+        return env[expr.name]
+    if isinstance(expr, (AST.IntNum, AST.FloatNum)):
+        return scalar(expr.value)
+    if isinstance(expr, (AST.Invariant, AST.Common)):
+        return (yield expr.expr)
+    if isinstance(expr, AST.UnaryMinus):
+        return np.negative((yield expr.expr))
+    left = yield expr.left
+    right = yield expr.right
+    return arithmetic(expr.op, left, right)
+
+
+def accumulate(op, initial, steps):
+    # ufunc.accumulate applies the operation strictly left to right, so the
+    # result is bit-for-bit what the scalar loop computes
+    values = np.concatenate((np.asarray([initial]), steps))
+    if op == '/=':
+        if np.any(steps == 0):
+            raise NotVectorizable()
+        values = values.astype(float)
+    elif is_int(values):
+        if op == '*=' or magnitude(initial) + int(np.abs(steps).sum()) >= INT_LIMIT:
+            raise NotVectorizable()
+    return ACCUMULATE_OPS[op].accumulate(values)
+
+
+class Statement:
+    def __init__(self, node, position):
+        self.name = node.left.name
+        self.slot = node.left.slot
+        self.op = node.op
+        self.expr = node.right
+        self.position = position
+
+
+# For loop whose body only updates accumulators (`s op= f(i, n, ...)` where s
+# is read nowhere in the body) and linear inductions (`n += c` or `n -= c`
+# with c loop invariant). Executing it computes every iteration at once.
+class ReductionLoop:
+    def __init__(self, var, inductions, accumulators, invariants):
+        self.var = var
+        self.inductions = inductions
+        self.accumulators = accumulators
+        self.invariants = invariants
+
+    def run(self, frame, range_obj):
+        # Returns False, having changed nothing, when the values met at run
+        # time cannot be reproduced exactly; the caller then runs the loop.
+        count = len(range_obj)
+        if count < MIN_TRIP_COUNT:
+            return False
+        try:
+            updates = self.compute(frame, range_obj, count)
+        except NotVectorizable:
+            return False
+        for slot, value in updates:
+            frame.store(*slot, value)
+        return True
+
+    def compute(self, frame, range_obj, count):
+        check_int(range_obj.start)
+        check_int(range_obj.stop)
+        env = {name: scalar(frame.load(*slot)) for name, slot in self.invariants.items()}
+        env[self.var.name] = np.arange(range_obj.start, range_obj.stop)
+
+        # Value of each induction variable before and after its update
+        history = {}
+        updates = [(self.var.slot, range_obj[-1])]
+        for induction in self.inductions:
+            step = scalar(evaluate(induction.expr, env))
+            initial = scalar(frame.load(*induction.slot))
+            values = accumulate(induction.op, initial, np.full(count, step))
+            history[induction.name] = (induction.position, values)
+            updates.append((induction.slot, values[-1].item()))
+
+        for accumulator in self.accumulators:
+            for name, (position, values) in history.items():
+                env[name] = values[1:] if position < accumulator.position else values[:-1]
+            steps = np.broadcast_to(evaluate(accumulator.expr, env), (count,))
+            initial = scalar(frame.load(*accumulator.slot))
+            updates.append((accumulator.slot, accumulate(accumulator.op, initial, steps)[-1].item()))
+        return updates
+
+
+# Marks every For node with `vector_plan`: a ReductionLoop when its body
+# matches that pattern exactly, None otherwise.
+class LoopVectorizer(NodeVisitor):
+    def visit_Program(self, node):
+        yield node.instructions
+
+    def visit_Instructions(self, node):
+        for instruction in node.instructions:
+            yield instruction
+
+    def visit_If(self, node):
+        yield node.then_block
+        if node.else_block:
+            yield node.else_block
+
+    def visit_While(self, node):
+        yield node.body
+
+    def visit_For(self, node):
+        node.vector_plan = self.plan(node)
+        yield node.body
+
+    def plan(self, node):
+        statements = flatten(node.body)
+        reads = []
+        for statement in statements:
+            if not (isinstance(statement, AST.Assignment) and statement.op in ACCUMULATE_OPS
+                    and isinstance(statement.left, AST.Variable)):
+                return None
+            read = names(statement.right)
+            if read is None:
+                return None
+            reads.append(read)
+
+        assigned = [statement.left.name for statement in statements]
+        if len(set(assigned)) != len(assigned) or node.var.name in assigned:
+            return None
+
+        inductions, accumulators = [], []
+        all_reads = set().union(*reads)
+        for position, (statement, read) in enumerate(zip(statements, reads)):
+            if statement.op in ('+=', '-=') and not read & (set(assigned) | {node.var.name}):
+                inductions.append(Statement(statement, position))
+            elif statement.left.name not in all_reads:
+                accumulators.append(Statement(statement, position))
+            else:
+                return None
+
+        invariants = {}
+        for statement in statements:
+            self.collect(statement.right, set(assigned) | {node.var.name}, invariants)
+        return ReductionLoop(node.var, inductions, accumulators, invariants)
+
+    def collect(self, expr, variant, invariants):
+        stack = [expr]
+        while stack:
+            expr = stack.pop()
+            if isinstance(expr, AST.Variable):
+                if expr.name not in variant:
+                    invariants[expr.name] = expr.slot
+            elif isinstance(expr, (AST.UnaryMinus, AST.Invariant, AST.Common)):
+                stack.append(expr.expr)
+            elif isinstance(expr, AST.BinExpr):
+                stack.append(expr.right)
+                stack.append(expr.left)
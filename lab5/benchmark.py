@@ -0,0 +1,529 @@
+import io
+import os
+import sys
+import copy
+import pickle
+import glob
+import time
+import tracemalloc
+import tempfile
+import subprocess
+import argparse
+from contextlib import redirect_stdout
+from scanner import Scanner
+from fastscanner import FastScanner
+from parser import Mparser
+from TypeChecker import TypeChecker
+from main import BACKENDS, INTERPRETERS
+from Interpreter import Interpreter, LazyInterpreter
+from Pool import POOL_BYTES
+from Exceptions import BreakException, ContinueException
+from visit import *
+import AST
+import FlatAST
+
+# Loop-heavy programs leaving their loop bodies early
+CONTROL_PROGRAMS = {
+    'break': "for i = 1:20000 {\n    for j = 1:10 {\n        if (j == 3) break;\n    }\n}\n",
+    'continue': "s = 0;\nfor i = 1:50000 {\n    if (i > 0) continue;\n    s += 1;\n}\n",
+    'while': "n = 0;\nwhile (n < 50000) {\n    n += 1;\n    continue;\n}\n",
+}
+
+
+# Repeated to build large sources for the lexer benchmark
+LEXER_BLOCK = """\
+# generated block {n}
+A{n} = zeros(3, 4);
+x{n} = 1.5e-3 * (y .+ 2) ./ z';
+if (x{n} >= 10) {{ print "value:", x{n}, 42; }} else x{n} -= .5;
+for i = 1:{n} {{ s += A{n}[i, 2] .* 3; }}
+"""
+
+
+def load(filename):
+    with open(filename, "r") as file:
+        return parse(file.read(), filename)
+
+
+def parse(text, filename="<program>"):
+    ast = Mparser().parse(Scanner().tokenize(text))
+    typeChecker = TypeChecker()
+    with redirect_stdout(io.StringIO()):
+        typeChecker.visit(ast)
+    if ast is None or typeChecker.errors:
+        raise SystemExit(f"{filename}: does not type check")
+    return ast
+
+
+def measure(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare_backends(filenames, backends, repeat):
+    print(f"{'program':<14}" + "".join(f"{name:>16}" for name in backends))
+    for filename in filenames:
+        ast = load(filename)
+        times = [measure(lambda: BACKENDS[name](ast), repeat) for name in backends]
+        baseline = times[0]
+        cells = [f"{t * 1000:9.1f}ms {baseline / t:4.1f}x" for t in times]
+        print(f"{filename:<14}" + "".join(f"{cell:>16}" for cell in cells))
+
+
+def dispatch_visitors():
+    leaves = [AST.IntNum, AST.FloatNum, AST.String, AST.Variable, AST.Break, AST.Continue]
+
+    class Plain(object):
+        @on('node')
+        def visit(self, node):
+            pass
+
+        for cls in leaves:
+            @when(cls)
+            def visit(self, node):
+                return node
+
+    class Cached(CachedDispatch):
+        @on('node')
+        def visit(self, node):
+            pass
+
+        for cls in leaves:
+            @when(cls)
+            def visit(self, node):
+                return node
+
+    class Direct(object):
+        def visit(self, node):
+            return node
+
+    nodes = [cls.__new__(cls) for cls in leaves] * 1000
+    return nodes, {'direct call': Direct(), 'Dispatcher': Plain(), 'CachedDispatch': Cached()}
+
+
+def dispatch_overhead(repeat):
+    nodes, visitors = dispatch_visitors()
+    baseline = None
+    for name, visitor in visitors.items():
+        elapsed = measure(lambda: [node.accept(visitor) for node in nodes], repeat)
+        per_node = elapsed / len(nodes) * 1e9
+        baseline = per_node if baseline is None else baseline
+        print(f"{name:<16}{per_node:8.1f}ns/node  (+{per_node - baseline:.1f}ns dispatch)")
+
+
+def raising_interpreter():
+    # Interpreter as it was before loops used BREAK/CONTINUE results: the
+    # same dispatch table with the exception-based statements swapped in
+    def instructions(self, node):
+        result = None
+        for instruction in node.instructions:
+            result = instruction.accept(self)
+        return result
+
+    def while_loop(self, node):
+        for invariant in getattr(node, 'invariants', ()):
+            invariant.valid = False
+        try:
+            while node.condition.accept(self):
+                try:
+                    node.body.accept(self)
+                except ContinueException:
+                    continue
+        except BreakException:
+            pass
+
+    def for_loop(self, node):
+        range_obj = node.range.accept(self)
+        plan = getattr(node, 'vector_plan', None)
+        if plan is not None and plan.run(self.frame, range_obj):
+            return
+        for invariant in getattr(node, 'invariants', ()):
+            invariant.valid = False
+        try:
+            for i in range_obj:
+                self.frame.store(*node.var.slot, i)
+                try:
+                    node.body.accept(self)
+                except ContinueException:
+                    continue
+        except BreakException:
+            pass
+
+    def raise_break(self, node):
+        raise BreakException()
+
+    def raise_continue(self, node):
+        raise ContinueException()
+
+    dispatcher = copy.copy(Interpreter.visit.dispatcher)
+    dispatcher.targets = dict(dispatcher.targets)
+    dispatcher.targets.update({
+        AST.Instructions: instructions,
+        AST.While: while_loop,
+        AST.For: for_loop,
+        AST.Break: raise_break,
+        AST.Continue: raise_continue,
+    })
+    return type('RaisingInterpreter', (Interpreter,), {'visit': dispatcher.method()})
+
+
+def control_flow(filenames, repeat):
+    programs = [(name, lambda text=text: parse(text, name)) for name, text in CONTROL_PROGRAMS.items()]
+    programs += [(filename, lambda filename=filename: load(filename)) for filename in filenames]
+    designs = {'exceptions': raising_interpreter(), 'signals': Interpreter}
+    print(f"{'program':<14}" + "".join(f"{name:>18}" for name in designs))
+    for name, build in programs:
+        times = []
+        for design in designs.values():
+            # Interpreter annotates the tree, so each design gets its own copy
+            ast = build()
+            times.append(measure(lambda: ast.accept(design()), repeat))
+        cells = [f"{t * 1000:9.1f}ms {times[0] / t:4.2f}x" for t in times]
+        print(f"{name:<14}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+def nesting(depths, repeat):
+    # `x = 1 + 1 + ... + 1;`, one BinExpr per level, under the recursion
+    # limit visit sets
+    print(f"{'depth':<14}" + "".join(f"{name:>16}" for name in INTERPRETERS))
+    for depth in depths:
+        ast = parse(f"x = {' + '.join(['1'] * (depth + 1))};\nprint x;\n", f"depth {depth}")
+        cells = []
+        for name in INTERPRETERS:
+            try:
+                cells.append(f"{measure(lambda: BACKENDS[name](ast), repeat) * 1000:9.1f}ms")
+            except RecursionError:
+                cells.append("too deep")
+        print(f"{depth:<14}" + "".join(f"{cell:>16}" for cell in cells))
+
+
+# Element-wise arithmetic on numbers, and on matrices of the given size
+SPECIALIZATION_PROGRAMS = {
+    'scalars': "s = 0.0;\nfor i = 1:50000 {{\n    s = s .+ 0.5 .* 2.0 .- 1;\n}}\n",
+    'matrices': "A = ones({size});\nB = ones({size});\nC = ones({size});\nfor i = 1:20 {{\n    C = A .+ B .* C .- B ./ A;\n}}\n",
+}
+
+
+def specialization(size, repeat):
+    # The same program with and without the types TypeChecker notes
+    designs = ('generic', 'specialized')
+    print(f"{'program':<14}" + "".join(f"{name:>16}" for name in INTERPRETERS for _ in designs))
+    print(f"{'':<14}" + "".join(f"{name:>16}" for _ in INTERPRETERS for name in designs))
+    for name, text in SPECIALIZATION_PROGRAMS.items():
+        text = text.format(size=size)
+        trees = (Mparser().parse(Scanner().tokenize(text)), parse(text, name))
+        cells = []
+        for engine in INTERPRETERS.values():
+            times = [measure(lambda: ast.accept(engine()), repeat) for ast in trees]
+            cells += [f"{t * 1000:9.1f}ms {times[0] / t:4.2f}x" for t in times]
+        print(f"{name:<14}" + "".join(f"{cell:>16}" for cell in cells))
+
+
+# Written left to right, the products build size x size matrices
+CHAIN_PROGRAM = ("A = ones({size}, 10);\nB = ones(10, {size});\nC = ones({size}, 10);\nD = ones(10, 1);\n"
+                 "P = A * B * C * D;\n")
+
+
+def matrix_chains(sizes, repeat):
+    print(f"{'size':<14}" + "".join(f"{name + ' ' + order:>18}" for name in INTERPRETERS
+                                    for order in ('written', 'reordered')))
+    for size in sizes:
+        ast = parse(CHAIN_PROGRAM.format(size=size), f"size {size}")
+        cells = []
+        for engine in INTERPRETERS.values():
+            times = [measure(lambda: copy.deepcopy(ast).accept(engine(reorder=reorder)), repeat)
+                     for reorder in (False, True)]
+            cells += [f"{t * 1000:9.1f}ms {times[0] / t:5.1f}x" for t in times]
+        print(f"{size:<14}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+# Element-wise operations on size x size matrices, run without loop-invariant
+# motion, which would evaluate them once
+FUSION_PROGRAM = ("A = ones({size});\nB = eye({size});\nC = ones({size});\n"
+                  "for i = 1:10 {{\n    D = A .+ B .* C ./ (A .+ C) .- B;\n}}\n")
+
+
+def fusion(sizes, repeat):
+    print(f"{'size':<14}" + "".join(f"{name + ' ' + mode:>24}" for name in INTERPRETERS
+                                    for mode in ('unfused', 'fused')))
+    for size in sizes:
+        ast = parse(FUSION_PROGRAM.format(size=size), f"size {size}")
+        cells = []
+        for engine in INTERPRETERS.values():
+            times, peaks = [], []
+            for fuse in (False, True):
+                times.append(measure(lambda: copy.deepcopy(ast).accept(engine(fuse=fuse)), repeat))
+                tree = copy.deepcopy(ast)
+                tracemalloc.start()
+                with redirect_stdout(io.StringIO()):
+                    tree.accept(engine(fuse=fuse))
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            cells += [f"{t * 1000:7.1f}ms {t0 / t:4.2f}x {peak / 2 ** 20:5.0f}MB"
+                      for t, peak, t0 in zip(times, peaks, [times[0]] * 2)]
+        print(f"{size:<14}" + "".join(f"{cell:>24}" for cell in cells))
+
+
+# Statements passing size x size matrices on to the next ones, some of the
+# values overwritten before anything reads them
+LAZY_PROGRAM = ("A = ones({size});\nB = eye({size});\nS = zeros({size});\n"
+                "for i = 1:10 {{\n    D = A .+ B;\n    E = D .* B;\n    D = E .- A;\n"
+                "    S = S .+ D ./ A;\n}}\nprint S[0, 0];\n")
+
+
+def laziness(sizes, repeat):
+    engines = {'eager': Interpreter, 'lazy': LazyInterpreter}
+    print(f"{'size':<14}" + "".join(f"{name:>24}" for name in engines))
+    for size in sizes:
+        ast = parse(LAZY_PROGRAM.format(size=size), f"size {size}")
+        times, peaks = [], []
+        for engine in engines.values():
+            times.append(measure(lambda: copy.deepcopy(ast).accept(engine()), repeat))
+            tree = copy.deepcopy(ast)
+            tracemalloc.start()
+            with redirect_stdout(io.StringIO()):
+                tree.accept(engine())
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        cells = [f"{t * 1000:7.1f}ms {times[0] / t:4.2f}x {peak / 2 ** 20:5.0f}MB" for t, peak in zip(times, peaks)]
+        print(f"{size:<14}" + "".join(f"{cell:>24}" for cell in cells))
+
+
+# Compound assignments and self-updates of a size x size matrix
+IN_PLACE_PROGRAM = ("A = ones({size});\nB = eye({size});\nS = zeros({size});\n"
+                    "for i = 1:20 {{\n    S += A;\n    S = S .* B;\n    S -= A;\n}}\n")
+
+
+def in_place_updates(sizes, repeat):
+    engines = ('tree', 'stack')
+    print(f"{'size':<14}" + "".join(f"{name + ' ' + mode:>32}" for name in engines
+                                    for mode in ('copying', 'in place')))
+    for size in sizes:
+        ast = parse(IN_PLACE_PROGRAM.format(size=size), f"size {size}")
+        cells = []
+        for name in engines:
+            engine = INTERPRETERS[name]
+            times, peaks, avoided = [], [], []
+            for in_place in (False, True):
+                times.append(measure(lambda: copy.deepcopy(ast).accept(engine(in_place=in_place)), repeat))
+                interpreter = engine(in_place=in_place)
+                tracemalloc.start()
+                with redirect_stdout(io.StringIO()):
+                    copy.deepcopy(ast).accept(interpreter)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                avoided.append(interpreter.in_place.avoided if in_place else 0)
+            cells += [f"{t * 1000:7.1f}ms {times[0] / t:4.2f}x {peak / 2 ** 20:4.0f}MB {n:3} avoided"
+                      for t, peak, n in zip(times, peaks, avoided)]
+        print(f"{size:<14}" + "".join(f"{cell:>32}" for cell in cells))
+
+
+# Temporaries and rebound variables of one size class in every iteration,
+# run unfused and without loop-invariant motion so each is allocated
+POOL_PROGRAM = ("A = ones({size});\nB = eye({size});\n"
+                "for i = 1:20 {{\n    T = -(A .+ B) .* (A .- B);\n    U = T ./ (A .+ B);\n}}\n")
+
+
+def array_pool(sizes, repeat):
+    engines = ('tree', 'stack')
+    print(f"{'size':<14}" + "".join(f"{name + ' ' + mode:>24}" for name in engines
+                                    for mode in ('allocating', 'pooled')))
+    for size in sizes:
+        ast = parse(POOL_PROGRAM.format(size=size), f"size {size}")
+        cells, reports = [], []
+        for name in engines:
+            engine = INTERPRETERS[name]
+            times = [measure(lambda: copy.deepcopy(ast).accept(engine(in_place=True, pool_bytes=pool_bytes)),
+                             repeat) for pool_bytes in (0, POOL_BYTES)]
+            interpreter = engine(in_place=True, pool_bytes=POOL_BYTES)
+            with redirect_stdout(io.StringIO()):
+                copy.deepcopy(ast).accept(interpreter)
+            reports.append(f"{name}: {interpreter.pool.report()}")
+            cells += [f"{t * 1000:9.1f}ms {times[0] / t:4.2f}x" for t in times]
+        print(f"{size:<14}" + "".join(f"{cell:>24}" for cell in cells))
+        for report in reports:
+            print(f"{'':<14}{report}")
+
+
+# Fresh interpreter importing the parser and parsing one program; blocking
+# the parsetab import makes Mparser build its LALR tables like it used to
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+if {rebuild}:
+    sys.modules['parsetab'] = None
+from scanner import Scanner
+from parser import Mparser
+with open({filename!r}) as file:
+    Mparser().parse(Scanner().tokenize(file.read()))
+print(time.perf_counter() - start)
+"""
+
+
+def time_to_first_parse(filename, rebuild):
+    script = STARTUP_SCRIPT.format(rebuild=rebuild, filename=filename)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(result.stdout.split()[-1])
+
+
+def startup(filename, repeat):
+    for label, rebuild in (("tables built", True), ("parsetab.py", False)):
+        best = min(time_to_first_parse(filename, rebuild) for _ in range(repeat))
+        print(f"{label:<14}{best * 1000:8.1f}ms to first parse of {filename}")
+
+
+def token_stream(lexer, text):
+    output = io.StringIO()
+    with redirect_stdout(output):
+        tokens = [(tok.type, tok.value, tok.lineno, tok.index, tok.end) for tok in lexer.tokenize(text)]
+    return tokens, output.getvalue()
+
+
+def lexers(megabytes, repeat):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    filenames = sorted(glob.glob(os.path.join(root, "lab[1-5]", "*.m")))
+    for filename in filenames:
+        with open(filename, "r") as file:
+            text = file.read()
+        if token_stream(Scanner(), text) != token_stream(FastScanner(), text):
+            raise SystemExit(f"{filename}: FastScanner tokens differ from Scanner")
+    print(f"FastScanner matches Scanner token for token on {len(filenames)} files")
+
+    blocks, size, n = [], 0, 0
+    while size < megabytes * 2 ** 20:
+        blocks.append(LEXER_BLOCK.format(n=n))
+        size += len(blocks[-1])
+        n += 1
+    text = "".join(blocks)
+
+    times = []
+    for lexer in (Scanner, FastScanner):
+        times.append(measure(lambda: sum(1 for _ in lexer().tokenize(text)), repeat))
+        print(f"{lexer.__name__:<14}{times[-1]:8.3f}s  {size / 2 ** 20 / times[-1]:6.1f}MB/s  "
+              f"{times[0] / times[-1]:4.2f}x")
+
+
+def synthetic_program(statements, nodes=AST):
+    # `x = y + i;` per line, built the way the parser builds it
+    instructions = nodes.Instructions()
+    for i in range(statements):
+        lineno = i + 1
+        instructions.add(nodes.Assignment('=', nodes.Variable('x', lineno=lineno),
+                                          nodes.BinExpr('+', nodes.Variable('y', lineno=lineno),
+                                                        nodes.IntNum(i, lineno=lineno), lineno=lineno),
+                                          lineno=lineno))
+    return nodes.Program(instructions)
+
+
+def ast_memory(statements):
+    count = 4 * statements + 2
+    print(f"{statements} statements, {count} nodes")
+    for label, nodes in (("objects", lambda: AST), ("flat", FlatAST.Builder)):
+        start = time.perf_counter()
+        program = synthetic_program(statements, nodes())
+        elapsed = time.perf_counter() - start
+        del program
+
+        tracemalloc.start()
+        program = synthetic_program(statements, nodes())
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        data = pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+        dumped = time.perf_counter() - start
+        start = time.perf_counter()
+        pickle.loads(data)
+        loaded = time.perf_counter() - start
+        print(f"{label:<8} built in {elapsed:5.2f}s, {size / 2 ** 20:4.0f}MB ({size / count:3.0f} bytes per node, "
+              f"values included); pickle {len(data) / 2 ** 20:.0f}MB, dumped in {dumped:.2f}s, "
+              f"loaded in {loaded:.2f}s")
+        del program, data
+
+    tree = synthetic_program(statements, FlatAST.Builder())._tree
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "program.flat")
+        tree.save(filename)
+        start = time.perf_counter()
+        FlatAST.FlatTree.load(filename)
+        print(f"{'mapped':<8} loaded in {time.perf_counter() - start:.4f}s from {os.path.getsize(filename) / 2 ** 20:.0f}MB")
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--repeat', type=int, default=3)
+    commands = argparser.add_subparsers(dest='command', required=True)
+
+    backends = commands.add_parser('backends', help="run programs on each backend")
+    backends.add_argument('filenames', nargs='*', default=["pi.m", "primes.m", "sqrt.m"])
+    backends.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+
+    commands.add_parser('dispatch', help="per-node cost of visitor dispatch")
+
+    control = commands.add_parser('control', help="exception-based vs signal-based break/continue")
+    control.add_argument('filenames', nargs='*', default=["primes.m"])
+
+    depth = commands.add_parser('nesting', help="tree vs stack interpreter on deeply nested expressions")
+    depth.add_argument('depths', nargs='*', type=int, default=[100, 1000, 10000, 100000])
+
+    specialized = commands.add_parser('specialize', help="arithmetic with and without TypeChecker's types")
+    specialized.add_argument('--size', type=int, default=500)
+
+    chains = commands.add_parser('chain', help="matrix product chains as written and reordered")
+    chains.add_argument('sizes', nargs='*', type=int, default=[100, 300, 1000])
+
+    fused = commands.add_parser('fusion', help="element-wise expressions with and without fusion")
+    fused.add_argument('sizes', nargs='*', type=int, default=[500, 1000, 2000])
+
+    deferred = commands.add_parser('lazy', help="element-wise statements run eagerly and deferred")
+    deferred.add_argument('sizes', nargs='*', type=int, default=[500, 1000, 2000])
+
+    updates = commands.add_parser('inplace', help="compound assignments copying and updating in place")
+    updates.add_argument('sizes', nargs='*', type=int, default=[500, 1000, 2000])
+
+    pool = commands.add_parser('pool', help="temporaries allocated and drawn from the array pool")
+    pool.add_argument('sizes', nargs='*', type=int, default=[100, 500, 2000])
+
+    first_parse = commands.add_parser('startup', help="time to first parse in a fresh process")
+    first_parse.add_argument('filename', nargs='?', default="primes.m")
+
+    lexer = commands.add_parser('lexer', help="validate FastScanner against Scanner and time both")
+    lexer.add_argument('--megabytes', type=float, default=4)
+
+    memory = commands.add_parser('ast', help="memory and build time of a synthetic program's AST")
+    memory.add_argument('--statements', type=int, default=1000000)
+    args = argparser.parse_args()
+
+    if args.command == 'backends':
+        compare_backends(args.filenames, args.backends, args.repeat)
+    elif args.command == 'dispatch':
+        dispatch_overhead(args.repeat * 10)
+    elif args.command == 'control':
+        control_flow(args.filenames, args.repeat)
+    elif args.command == 'nesting':
+        nesting(args.depths, args.repeat)
+    elif args.command == 'specialize':
+        specialization(args.size, args.repeat)
+    elif args.command == 'chain':
+        matrix_chains(args.sizes, args.repeat)
+    elif args.command == 'fusion':
+        fusion(args.sizes, args.repeat)
+    elif args.command == 'lazy':
+        laziness(args.sizes, args.repeat)
+    elif args.command == 'inplace':
+        in_place_updates(args.sizes, args.repeat)
+    elif args.command == 'pool':
+        array_pool(args.sizes, args.repeat)
+    elif args.command == 'startup':
+        startup(os.path.abspath(args.filename), args.repeat * 3)
+    elif args.command == 'lexer':
+        lexers(args.megabytes, args.repeat)
+    elif args.command == 'ast':
+        ast_memory(args.statements)
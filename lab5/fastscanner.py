@@ -0,0 +1,227 @@
+import re
+import sys
+import codecs
+from sly.lex import Token
+from scanner import Scanner
+
+# Same patterns as Scanner; they are only tried where the first character
+# says they can match
+NAME = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*')
+FLOAT = re.compile(r'(\d*\.\d+|\d+\.\d*)([eE][+-]?\d+)?|\d+[eE][+-]?\d+')
+INT = re.compile(r'\d+')
+STRING = re.compile(r'"([^"\\]|\\.)*"')
+NEWLINES = re.compile(r'\n+')
+
+KEYWORDS = {
+    'if': 'IF',
+    'else': 'ELSE',
+    'for': 'FOR',
+    'while': 'WHILE',
+    'break': 'BREAK',
+    'continue': 'CONTINUE',
+    'return': 'RETURN',
+    'eye': 'EYE',
+    'zeros': 'ZEROS',
+    'ones': 'ONES',
+    'print': 'PRINT',
+}
+
+OPERATORS = {
+    '.+': 'DOTADD',
+    '.-': 'DOTSUB',
+    '.*': 'DOTMUL',
+    './': 'DOTDIV',
+    '+=': 'ADDASSIGN',
+    '-=': 'SUBASSIGN',
+    '*=': 'MULASSIGN',
+    '/=': 'DIVASSIGN',
+    '<=': 'LEQ',
+    '>=': 'GEQ',
+    '!=': 'NEQ',
+    '==': 'EQ',
+}
+
+# No pattern looks further than this past the end of its match (`1e+5`), so
+# a token ending this far before the end of a chunk cannot grow in the next
+MARGIN = 3
+
+CHUNK_SIZE = 1 << 16
+
+# What the first character of a token can start
+SKIP, NEWLINE, COMMENT, ID, NUMBER, DOT, QUOTE, OPERATOR, LITERAL, OTHER = range(10)
+
+DISPATCH = {}
+DISPATCH.update(dict.fromkeys(' \t', SKIP))
+DISPATCH['\n'] = NEWLINE
+DISPATCH['#'] = COMMENT
+DISPATCH.update(dict.fromkeys('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_', ID))
+DISPATCH.update(dict.fromkeys('0123456789', NUMBER))
+DISPATCH['.'] = DOT
+DISPATCH['"'] = QUOTE
+DISPATCH.update(dict.fromkeys(Scanner.literals, LITERAL))
+DISPATCH.update(dict.fromkeys({op[0] for op in OPERATORS if op[0] != '.'}, OPERATOR))
+
+
+def number(text, index):
+    match = FLOAT.match(text, index)
+    if match:
+        return 'FLOATNUM', float(match.group()), match.end()
+    match = INT.match(text, index)
+    if match:
+        return 'INTNUM', int(match.group()), match.end()
+    return None
+
+
+def read_chunks(source, size=CHUNK_SIZE):
+    # Text chunks of a file object, an mmap or an iterable of str/bytes
+    if hasattr(source, 'read'):
+        read = source.read
+        source = iter(lambda: read(size), read(0))
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in source:
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+# Drop-in replacement for Scanner yielding the same tokens (type, value,
+# lineno, index, end) and error messages, without a master regex or a
+# Python callback per token.
+class FastScanner(object):
+    tokens = Scanner.tokens
+    literals = Scanner.literals
+
+    def __init__(self):
+        self.text = None
+        self.index = 0
+        self.lineno = 1
+
+    def tokenize(self, text, lineno=1, index=0):
+        return self.scan(text, lineno, index, len(text), 0)
+
+    def tokenize_stream(self, chunks, lineno=1):
+        # Tokens of the concatenated chunks, holding back only what may
+        # continue in the next chunk: the last few characters, a string
+        # still missing its closing quote or a comment missing its newline
+        buffer, offset = "", 0
+        for chunk in chunks:
+            buffer += chunk
+            yield from self.scan(buffer, lineno, 0, len(buffer) - MARGIN, offset)
+            buffer, offset, lineno = buffer[self.index:], offset + self.index, self.lineno
+        yield from self.scan(buffer, lineno, 0, len(buffer), offset)
+
+    def scan(self, text, lineno, index, limit, offset):
+        # Stops before anything ending past `limit`, leaving self.index and
+        # self.lineno where it stopped; token positions are shifted by
+        # `offset`, the position of `text` in the whole source
+        self.text = text
+        length = len(text)
+        dispatch = DISPATCH.get
+        keywords = KEYWORDS.get
+        operators = OPERATORS.get
+        literals = self.literals
+        try:
+            while index < length:
+                char = text[index]
+                kind = dispatch(char, OTHER)
+
+                if kind == SKIP:
+                    index += 1
+                    continue
+                if kind == NEWLINE:
+                    end = NEWLINES.match(text, index).end()
+                    lineno += end - index
+                    index = end
+                    continue
+                if kind == COMMENT:
+                    end = text.find('\n', index)
+                    if end < 0:
+                        if limit < length:
+                            break
+                        end = length
+                    index = end
+                    continue
+
+                if kind == ID:
+                    end = NAME.match(text, index).end()
+                    value = text[index:end]
+                    token_type = keywords(value, 'ID')
+                elif kind == LITERAL:
+                    end = index + 1
+                    token_type = value = char
+                elif kind == OPERATOR:
+                    end = index + 2
+                    value = text[index:end]
+                    token_type = operators(value)
+                    if token_type is None:
+                        if char not in literals:
+                            if limit < length and index + 2 > limit:
+                                break
+                            index = self.error(index, lineno)
+                            continue
+                        end = index + 1
+                        token_type = value = char
+                elif kind == NUMBER:
+                    token_type, value, end = number(text, index)
+                elif kind == QUOTE and STRING.match(text, index):
+                    end = STRING.match(text, index).end()
+                    token_type = 'STRING'
+                    value = text[index + 1:end - 1]
+                else:
+                    # `.+` and the like, `.5`, non-ASCII digits or an error,
+                    # in Scanner's rule order
+                    end = index + 2
+                    value = text[index:end]
+                    token_type = operators(value) if kind == DOT else None
+                    if token_type is None:
+                        if number(text, index) is None:
+                            # An unmatched quote may be closed in a later chunk
+                            if limit < length and (index + 2 > limit or kind == QUOTE):
+                                break
+                            index = self.error(index, lineno)
+                            continue
+                        token_type, value, end = number(text, index)
+
+                if end > limit:
+                    break
+                tok = Token()
+                tok.type = token_type
+                tok.value = value
+                tok.lineno = lineno
+                tok.index = offset + index
+                tok.end = offset + end
+                index = end
+                if token_type == 'STRING':
+                    lineno += value.count('\n')
+                yield tok
+        finally:
+            self.index = index
+            self.lineno = lineno
+
+    def error(self, index, lineno):
+        # Returns where to resume, like Scanner.error moving self.index
+        print(f"Line {lineno}: Illegal character '{self.text[index]}'")
+        return index + 1
+
+
+if __name__ == '__main__':
+    lexer = FastScanner()
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else "example1.m"
+
+    try:
+        with open(filename, "r") as file:
+            text = file.read()
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found")
+        sys.exit(1)
+
+    for tok in lexer.tokenize(text):
+        if tok.type in lexer.literals:
+            print(f"({tok.lineno}): {tok.value}({tok.value})")
+        else:
+            print(f"({tok.lineno}): {tok.type}({tok.value})")
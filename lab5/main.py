@@ -1,41 +1,200 @@
 import sys
+import argparse
 import ply.yacc as yacc
-from scanner import Scanner
-from parser import Mparser
 from TreePrinter import TreePrinter
+from ParseCache import ParseCache, parse_program, tree_builder
+from Optimizer import Optimizer
 from TypeChecker import TypeChecker
-from Interpreter import Interpreter
+from Interpreter import Interpreter, StackInterpreter, LazyInterpreter
+from Compiler import Compiler
+from VM import VM
+from ClosureCompiler import ClosureCompiler
+from Transpiler import Transpiler, CodeCache, execute
+from Pool import POOL_BYTES
+
+
+def report(interpreter):
+    # What the interpreter's optional passes did, for --stats
+    if interpreter.in_place:
+        print(interpreter.in_place.report(), file=sys.stderr)
+    if interpreter.pool:
+        print(interpreter.pool.report(), file=sys.stderr)
+    if isinstance(interpreter, LazyInterpreter):
+        print(interpreter.scheduler.report(), file=sys.stderr)
+
+
+def run_tree(ast, engine=Interpreter, symbol_table=None, stats=False, **options):
+    # `symbol_table` is TypeChecker's, whose slots the interpreter reuses;
+    # `options` turn its optional passes on (none by default)
+    interpreter = engine(symbol_table, **options)
+    try:
+        ast.accept(interpreter)
+    finally:
+        if interpreter.cse:
+            print(interpreter.cse.report(), file=sys.stderr)
+        if stats:
+            report(interpreter)
+
+
+def run_stack(ast, **options):
+    run_tree(ast, StackInterpreter, **options)
+
+
+def run_lazy(ast, **options):
+    run_tree(ast, LazyInterpreter, **options)
+
+
+def run_vm(ast):
+    VM(Compiler().compile(ast)).run()
+
+
+def run_closure(ast):
+    ClosureCompiler().compile(ast)()
+
+
+def run_python(ast):
+    execute(CodeCache().compile(Transpiler().transpile(ast)))
+
+
+def run_incremental(file, flat=False, share=False, engine=Interpreter, stats=False, **options):
+    # Each top-level statement is type checked and run as soon as it is
+    # parsed; after the first type error the rest is only checked
+    from fastscanner import FastScanner, read_chunks
+    from parser import Mparser
+
+    nodes = tree_builder(flat, share)
+    parser = Mparser(nodes)
+    typeChecker = TypeChecker()
+    interpreter = engine(typeChecker.symbol_table, cse=share, **options)
+    try:
+        for statement in parser.parse_statements(FastScanner().tokenize_stream(read_chunks(file))):
+            typeChecker.visit(statement)
+            if typeChecker.errors:
+                continue
+            try:
+                interpreter.execute(statement)
+            except Exception as e:
+                print(f"Runtime error: {e}")
+                return
+        try:
+            interpreter.finish()
+        except Exception as e:
+            print(f"Runtime error: {e}")
+            return
+
+        if parser.failed:
+            print("Parsing failed")
+            sys.exit(1)
+        if typeChecker.errors:
+            print("Type checking failed, interpretation stopped")
+    finally:
+        if share:
+            print(nodes.report(), file=sys.stderr)
+            print(interpreter.cse.report(), file=sys.stderr)
+        if stats:
+            report(interpreter)
+
+
+# Tree-walking interpreters, run with the CSE option and the passes below
+INTERPRETERS = {
+    'tree': Interpreter,
+    'stack': StackInterpreter,
+    'lazy': LazyInterpreter,
+}
+
+BACKENDS = {
+    'tree': run_tree,
+    'stack': run_stack,
+    'lazy': run_lazy,
+    'vm': run_vm,
+    'closure': run_closure,
+    'python': run_python,
+}
+
+# Optional passes of the interpreters, each turned on by its own flag
+PASSES = {
+    'vectorize': "run for loops that only update accumulators as whole-array operations",
+    'hoist': "evaluate expressions loop bodies do not change once before each loop",
+    'reorder': "multiply chains of matrix products in the order needing the fewest operations",
+    'fuse': "compute trees of element-wise matrix operations in one pass, without temporaries",
+    'in_place': "write the result of A += B, A = A .* B and the like into A's array when no other name shares it",
+}
 
 
 if __name__ == '__main__':
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('filename', nargs='?', default="triangle.m")
+    argparser.add_argument('--backend', choices=BACKENDS, default='tree',
+                           help="execution engine (default: tree-walking interpreter; stack walks the "
+                                "tree without recursion, for deeply nested expressions; lazy defers element-wise "
+                                "operations on matrices until their value is needed)")
+    argparser.add_argument('-O', '--optimize', action='store_true',
+                           help="fold constants and simplify the AST before running it")
+    argparser.add_argument('--no-cache', action='store_true',
+                           help="parse and type check the program even if the parse cache has it")
+    argparser.add_argument('--incremental', action='store_true',
+                           help="type check and interpret each top-level statement as soon as it is "
+                                "parsed (tree, stack or lazy backend, no cache, no -O)")
+    argparser.add_argument('--flat', action='store_true',
+                           help="keep the AST in flat arrays instead of one object per node")
+    argparser.add_argument('--share', action='store_true',
+                           help="build repeated expressions once and evaluate them once per basic block "
+                                "(errors in them report their first line)")
+    argparser.add_argument('--stats', action='store_true',
+                           help="report what the interpreter passes did on stderr")
+    for name, help in PASSES.items():
+        argparser.add_argument('--' + name.replace('_', '-'), action='store_true', help=help)
+    argparser.add_argument('--pool', metavar='MB', type=int, default=0,
+                           help="write large array temporaries into arrays freed earlier, keeping at most MB "
+                                f"megabytes of them (ArrayPool keeps {POOL_BYTES // 2 ** 20} unless told otherwise)")
+    args = argparser.parse_args()
+    if args.pool < 0:
+        argparser.error("--pool takes a number of megabytes")
+    options = {name: getattr(args, name) for name in PASSES}
+    options['pool_bytes'] = args.pool * 2 ** 20
+    if args.backend not in INTERPRETERS and (args.stats or any(options.values())):
+        argparser.error("--stats and the interpreter passes (" + ", ".join('--' + name.replace('_', '-') for name in PASSES)
+                        + ", --pool) need the tree, stack or lazy backend")
+    if args.incremental and (args.backend not in INTERPRETERS or args.optimize):
+        argparser.error("--incremental runs on the tree, stack or lazy backend without -O")
+
     try:
-        filename = sys.argv[1] if len(sys.argv) > 1 else "triangle.m"
+        filename = args.filename
         file = open(filename, "r")
     except IOError:
         print("Cannot open {0} file".format(filename))
         sys.exit(0)
 
-    scanner = Scanner()
-    parser = Mparser()
-    text = file.read()
+    if args.incremental:
+        with file:
+            run_incremental(file, args.flat, args.share, INTERPRETERS[args.backend], args.stats, **options)
+        sys.exit(0)
 
-    # Parse
-    tokens = scanner.tokenize(text)
-    ast = parser.parse(tokens)
+    # Parse and type check, or fetch both results from the cache; the
+    # source is streamed, never read into memory as a whole
+    with file:
+        if args.no_cache:
+            program = parse_program(file, flat=args.flat, share=args.share)
+        else:
+            program = ParseCache(flat=args.flat, share=args.share).load(file)
+    program.replay()
+    ast = program.ast
     
     if ast is None:
         print("Parsing failed")
         sys.exit(1)
-
-    # Type checking
-    typeChecker = TypeChecker()
-    typeChecker.visit(ast)
     
     # Only interpret if no errors
-    if not typeChecker.errors:
-        interpreter = Interpreter()
+    if not program.errors:
+        if args.optimize:
+            optimizer = Optimizer()
+            ast = optimizer.optimize(ast)
+            print(optimizer.report(), file=sys.stderr)
         try:
-            ast.accept(interpreter)
+            if args.backend in INTERPRETERS:
+                run_tree(ast, INTERPRETERS[args.backend], program.symbol_table, args.stats, cse=args.share, **options)
+            else:
+                BACKENDS[args.backend](ast)
         except Exception as e:
             print(f"Runtime error: {e}")
     else:
@@ -1,6 +1,84 @@
 from sly import Parser
+from sly.yacc import LRTable
 from scanner import Scanner
+from fastscanner import FastScanner, read_chunks
 import AST
+import os
+import hashlib
+
+TABLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parsetab.py")
+
+
+# Hash of everything the LALR tables are computed from
+def grammar_signature(grammar):
+    productions = [(p.name, p.prod, p.prec) for p in grammar.Productions]
+    text = repr((productions, sorted(grammar.Precedence.items()), sorted(grammar.Terminals)))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ParseTables(object):
+    # The parts of sly's LRTable that Parser.parse uses
+    def __init__(self, lr_action, lr_goto, defaulted_states):
+        self.lr_action = lr_action
+        self.lr_goto = lr_goto
+        self.defaulted_states = defaulted_states
+
+
+def load_tables(grammar):
+    # Tables from parsetab.py, or None if they are missing or stale
+    try:
+        import parsetab
+    except ImportError:
+        return None
+    if getattr(parsetab, 'SIGNATURE', None) != grammar_signature(grammar):
+        return None
+    return ParseTables(parsetab.LR_ACTION, parsetab.LR_GOTO, parsetab.DEFAULTED_STATES)
+
+
+def write_tables(grammar, lrtable, filename=TABLES_FILE):
+    # Run by `python parser.py` only: importing the parser never writes
+    lines = ["# LALR tables for parser.Mparser, generated by `python parser.py`.",
+             "# Regenerated whenever the grammar changes; do not edit.",
+             f"SIGNATURE = {grammar_signature(grammar)!r}"]
+    for name, table in (("LR_ACTION", lrtable.lr_action), ("LR_GOTO", lrtable.lr_goto),
+                        ("DEFAULTED_STATES", lrtable.defaulted_states)):
+        lines.append(f"{name} = {{")
+        lines += [f"    {state!r}: {table[state]!r}," for state in sorted(table)]
+        lines.append("}")
+    text = "\n".join(lines) + "\n"
+
+    try:
+        with open(filename, "r") as file:
+            if file.read() == text:
+                return
+    except OSError:
+        pass
+    try:
+        tmp = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp, "w") as file:
+            file.write(text)
+        os.replace(tmp, filename)
+    except OSError:
+        pass
+
+
+def split_statements(tokens):
+    # Token lists of the top-level instructions: one ends with a `;` or `}`
+    # outside all brackets, unless an `else` follows it
+    statement, depth, ended = [], 0, False
+    for tok in tokens:
+        if ended and tok.type != 'ELSE':
+            yield statement
+            statement = []
+        statement.append(tok)
+        if tok.type in ('{', '(', '['):
+            depth += 1
+        elif tok.type in ('}', ')', ']'):
+            depth -= 1
+        ended = depth == 0 and tok.type in (';', '}')
+    if statement:
+        yield statement
+
 
 class Mparser(Parser):
 
@@ -8,9 +86,33 @@ class Mparser(Parser):
 
     start = 'program'
     
-    debugfile = 'parser_new.out'
     expected_shift_reduce = 1
 
+    # Rules use p.lineno only; sly's per-value position maps would grow
+    # with the program
+    track_positions = False
+
+    # Called by Parser._build once the grammar is built (a private hook of
+    # SLY 0.5, the version requirements.txt pins; other versions build the
+    # tables as usual). Computing the LALR automaton dominates start-up, so
+    # it is skipped while parsetab.py matches the grammar; when it does not,
+    # the tables are built in memory and `python parser.py` writes them.
+    @classmethod
+    def _Parser__build_lrtables(cls):
+        cls._lrtable = load_tables(cls._grammar)
+        if cls._lrtable is None:
+            build = getattr(Parser, '_Parser__build_lrtables', None)
+            if build is None:
+                cls._lrtable = LRTable(cls._grammar)
+            else:
+                build.__func__(cls)
+        return True
+
+    # `nodes` builds the tree: the AST module, or a FlatAST.Builder storing
+    # it in flat arrays
+    def __init__(self, nodes=None):
+        self.nodes = AST if nodes is None else nodes
+
     precedence = (
         ('nonassoc', 'IFX'),
         ('nonassoc', 'ELSE'),
@@ -26,7 +128,7 @@ class Mparser(Parser):
 
     @_('instructions_opt')
     def program(self, p):
-        return AST.Program(p.instructions_opt)
+        return self.nodes.Program(p.instructions_opt)
 
     @_('instructions')
     def instructions_opt(self, p):
@@ -34,7 +136,7 @@ class Mparser(Parser):
 
     @_('')
     def instructions_opt(self, p):
-        return AST.Instructions()
+        return self.nodes.Instructions()
 
     @_('instructions instruction')
     def instructions(self, p):
@@ -43,7 +145,7 @@ class Mparser(Parser):
 
     @_('instruction')
     def instructions(self, p):
-        instructions = AST.Instructions()
+        instructions = self.nodes.Instructions()
         instructions.add(p.instruction)
         return instructions
 
@@ -53,67 +155,67 @@ class Mparser(Parser):
 
     @_('IF "(" condition ")" instruction %prec IFX')
     def instruction(self, p):
-        return AST.If(p.condition, p.instruction, lineno=p.lineno)
+        return self.nodes.If(p.condition, p.instruction, lineno=p.lineno)
 
     @_('IF "(" condition ")" instruction ELSE instruction')
     def instruction(self, p):
-        return AST.If(p.condition, p.instruction0, p.instruction1, lineno=p.lineno)
+        return self.nodes.If(p.condition, p.instruction0, p.instruction1, lineno=p.lineno)
 
     @_('WHILE "(" condition ")" instruction')
     def instruction(self, p):
-        return AST.While(p.condition, p.instruction, lineno=p.lineno)
+        return self.nodes.While(p.condition, p.instruction, lineno=p.lineno)
 
     @_('FOR ID "=" range_expr instruction')
     def instruction(self, p):
-        return AST.For(AST.Variable(p.ID, lineno=p.lineno), p.range_expr, p.instruction, lineno=p.lineno)
+        return self.nodes.For(self.nodes.Variable(p.ID, lineno=p.lineno), p.range_expr, p.instruction, lineno=p.lineno)
     
     @_('expression ":" expression')
     def range_expr(self, p):
-        return AST.Range(p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.Range(p.expression0, p.expression1, lineno=p.lineno)
 
     @_('ID "=" expression ";"')
     def instruction(self, p):
-        return AST.Assignment('=', AST.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
+        return self.nodes.Assignment('=', self.nodes.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
 
     @_('ID ADDASSIGN expression ";"')
     def instruction(self, p):
-        return AST.Assignment('+=', AST.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
+        return self.nodes.Assignment('+=', self.nodes.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
 
     @_('ID SUBASSIGN expression ";"')
     def instruction(self, p):
-        return AST.Assignment('-=', AST.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
+        return self.nodes.Assignment('-=', self.nodes.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
 
     @_('ID MULASSIGN expression ";"')
     def instruction(self, p):
-        return AST.Assignment('*=', AST.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
+        return self.nodes.Assignment('*=', self.nodes.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
 
     @_('ID DIVASSIGN expression ";"')
     def instruction(self, p):
-        return AST.Assignment('/=', AST.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
+        return self.nodes.Assignment('/=', self.nodes.Variable(p.ID, lineno=p.lineno), p.expression, lineno=p.lineno)
 
     @_('ID "[" INTNUM "]" "=" expression ";"')
     def instruction(self, p):
-        return AST.Assignment('=', AST.VectorElement(p.ID, p.INTNUM, lineno=p.lineno), p.expression, lineno=p.lineno)
+        return self.nodes.Assignment('=', self.nodes.VectorElement(p.ID, p.INTNUM, lineno=p.lineno), p.expression, lineno=p.lineno)
 
     @_('ID "[" INTNUM "," INTNUM "]" "=" expression ";"')
     def instruction(self, p):
-        return AST.Assignment('=', AST.MatrixElement(p.ID, p.INTNUM0, p.INTNUM1, lineno=p.lineno), p.expression, lineno=p.lineno)
+        return self.nodes.Assignment('=', self.nodes.MatrixElement(p.ID, p.INTNUM0, p.INTNUM1, lineno=p.lineno), p.expression, lineno=p.lineno)
 
     @_('BREAK ";"')
     def instruction(self, p):
-        return AST.Break(lineno=p.lineno)
+        return self.nodes.Break(lineno=p.lineno)
 
     @_('CONTINUE ";"')
     def instruction(self, p):
-        return AST.Continue(lineno=p.lineno)
+        return self.nodes.Continue(lineno=p.lineno)
 
     @_('RETURN expression ";"')
     def instruction(self, p):
-        return AST.Return(p.expression, lineno=p.lineno)
+        return self.nodes.Return(p.expression, lineno=p.lineno)
 
     @_('PRINT print_list ";"')
     def instruction(self, p):
-        return AST.Print(p.print_list, lineno=p.lineno)
+        return self.nodes.Print(p.print_list, lineno=p.lineno)
 
     @_('print_list "," print_item')
     def print_list(self, p):
@@ -125,7 +227,7 @@ class Mparser(Parser):
 
     @_('STRING')
     def print_item(self, p):
-        return AST.String(p.STRING, lineno=p.lineno)
+        return self.nodes.String(p.STRING, lineno=p.lineno)
     
     @_('expression')
     def print_item(self, p):
@@ -133,67 +235,67 @@ class Mparser(Parser):
 
     @_('expression EQ expression')
     def condition(self, p):
-        return AST.RelExpr('==', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.RelExpr('==', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression NEQ expression')
     def condition(self, p):
-        return AST.RelExpr('!=', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.RelExpr('!=', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression LEQ expression')
     def condition(self, p):
-        return AST.RelExpr('<=', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.RelExpr('<=', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression GEQ expression')
     def condition(self, p):
-        return AST.RelExpr('>=', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.RelExpr('>=', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression "<" expression')
     def condition(self, p):
-        return AST.RelExpr('<', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.RelExpr('<', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression ">" expression')
     def condition(self, p):
-        return AST.RelExpr('>', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.RelExpr('>', p.expression0, p.expression1, lineno=p.lineno)
 
     @_('expression "+" expression')
     def expression(self, p):
-        return AST.BinExpr('+', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.BinExpr('+', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression "-" expression')
     def expression(self, p):
-        return AST.BinExpr('-', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.BinExpr('-', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression "*" expression')
     def expression(self, p):
-        return AST.BinExpr('*', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.BinExpr('*', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression "/" expression')
     def expression(self, p):
-        return AST.BinExpr('/', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.BinExpr('/', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression DOTADD expression')
     def expression(self, p):
-        return AST.BinExpr('.+', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.BinExpr('.+', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression DOTSUB expression')
     def expression(self, p):
-        return AST.BinExpr('.-', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.BinExpr('.-', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression DOTMUL expression')
     def expression(self, p):
-        return AST.BinExpr('.*', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.BinExpr('.*', p.expression0, p.expression1, lineno=p.lineno)
     
     @_('expression DOTDIV expression')
     def expression(self, p):
-        return AST.BinExpr('./', p.expression0, p.expression1, lineno=p.lineno)
+        return self.nodes.BinExpr('./', p.expression0, p.expression1, lineno=p.lineno)
 
     @_('"-" expression %prec UMINUS')
     def expression(self, p):
-        return AST.UnaryMinus(p.expression, lineno=p.lineno)
+        return self.nodes.UnaryMinus(p.expression, lineno=p.lineno)
     
     @_('expression "\'"')
     def expression(self, p):
-        return AST.Transposition(p.expression, lineno=p.lineno)
+        return self.nodes.Transposition(p.expression, lineno=p.lineno)
 
     @_('"(" expression ")"')
     def expression(self, p):
@@ -201,33 +303,33 @@ class Mparser(Parser):
 
     @_('ID')
     def expression(self, p):
-        return AST.Variable(p.ID, lineno=p.lineno)
+        return self.nodes.Variable(p.ID, lineno=p.lineno)
 
     @_('ID "[" INTNUM "]"')
     def expression(self, p):
-        return AST.VectorElement(p.ID, p.INTNUM, lineno=p.lineno)
+        return self.nodes.VectorElement(p.ID, p.INTNUM, lineno=p.lineno)
     
     @_('ID "[" INTNUM "," INTNUM "]"')
     def expression(self, p):
-        return AST.MatrixElement(p.ID, p.INTNUM0, p.INTNUM1, lineno=p.lineno)
+        return self.nodes.MatrixElement(p.ID, p.INTNUM0, p.INTNUM1, lineno=p.lineno)
 
     @_('INTNUM')
     def expression(self, p):
-        return AST.IntNum(p.INTNUM, lineno=p.lineno)
+        return self.nodes.IntNum(p.INTNUM, lineno=p.lineno)
     
     @_('FLOATNUM')
     def expression(self, p):
-        return AST.FloatNum(p.FLOATNUM, lineno=p.lineno)
+        return self.nodes.FloatNum(p.FLOATNUM, lineno=p.lineno)
 
     @_('"[" inner_lists "]"')
     def expression(self, p):
         # Check if we have nested lists (matrix) or flat list (vector)
         if all(isinstance(item, AST.Vector) for item in p.inner_lists):
             # All items are vectors - this is a matrix
-            return AST.Matrix(p.inner_lists, lineno=p.lineno)
+            return self.nodes.Matrix(p.inner_lists, lineno=p.lineno)
         else:
             # Flat list - this is a vector
-            return AST.Vector(p.inner_lists, lineno=p.lineno)
+            return self.nodes.Vector(p.inner_lists, lineno=p.lineno)
 
     @_('inner_lists "," inner_item')
     def inner_lists(self, p):
@@ -240,7 +342,7 @@ class Mparser(Parser):
     @_('"[" elem_list "]"')
     def inner_item(self, p):
         # Nested brackets - this is a vector (row of matrix)
-        return AST.Vector(p.elem_list, lineno=p.lineno)
+        return self.nodes.Vector(p.elem_list, lineno=p.lineno)
     
     @_('elem')
     def inner_item(self, p):
@@ -257,43 +359,43 @@ class Mparser(Parser):
 
     @_('INTNUM')
     def elem(self, p):
-        return AST.IntNum(p.INTNUM, lineno=p.lineno)
+        return self.nodes.IntNum(p.INTNUM, lineno=p.lineno)
     
     @_('FLOATNUM')
     def elem(self, p):
-        return AST.FloatNum(p.FLOATNUM, lineno=p.lineno)
+        return self.nodes.FloatNum(p.FLOATNUM, lineno=p.lineno)
 
     @_('STRING')
     def expression(self, p):
-        return AST.String(p.STRING, lineno=p.lineno)
+        return self.nodes.String(p.STRING, lineno=p.lineno)
     
     @_('ID')
     def elem(self, p):
-        return AST.Variable(p.ID, lineno=p.lineno)
+        return self.nodes.Variable(p.ID, lineno=p.lineno)
 
     @_('ZEROS "(" matrix_size ")"')
     def expression(self, p):
-        return AST.MatrixFunction('zeros', p.matrix_size, lineno=p.lineno)
+        return self.nodes.MatrixFunction('zeros', p.matrix_size, lineno=p.lineno)
     
     @_('ZEROS "(" matrix_size "," matrix_size ")"')
     def expression(self, p):
-        return AST.MatrixFunction('zeros', (p.matrix_size0, p.matrix_size1), lineno=p.lineno)
+        return self.nodes.MatrixFunction('zeros', (p.matrix_size0, p.matrix_size1), lineno=p.lineno)
 
     @_('ONES "(" matrix_size ")"')
     def expression(self, p):
-        return AST.MatrixFunction('ones', p.matrix_size, lineno=p.lineno)
+        return self.nodes.MatrixFunction('ones', p.matrix_size, lineno=p.lineno)
     
     @_('ONES "(" matrix_size "," matrix_size ")"')
     def expression(self, p):
-        return AST.MatrixFunction('ones', (p.matrix_size0, p.matrix_size1), lineno=p.lineno)
+        return self.nodes.MatrixFunction('ones', (p.matrix_size0, p.matrix_size1), lineno=p.lineno)
 
     @_('EYE "(" matrix_size ")"')
     def expression(self, p):
-        return AST.MatrixFunction('eye', p.matrix_size, lineno=p.lineno)
+        return self.nodes.MatrixFunction('eye', p.matrix_size, lineno=p.lineno)
     
     @_('EYE "(" matrix_size "," matrix_size ")"')
     def expression(self, p):
-        return AST.MatrixFunction('eye', (p.matrix_size0, p.matrix_size1), lineno=p.lineno)
+        return self.nodes.MatrixFunction('eye', (p.matrix_size0, p.matrix_size1), lineno=p.lineno)
 
     @_('INTNUM')
     def matrix_size(self, p):
@@ -303,8 +405,45 @@ class Mparser(Parser):
     def matrix_size(self, p):
         return -p.INTNUM
 
+    def parse_stream(self, source):
+        # Parses a file object, an mmap or an iterable of chunks while it is
+        # read, without holding the whole source text
+        return self.parse(FastScanner().tokenize_stream(read_chunks(source)))
+
+    def parse_statements(self, tokens):
+        # Top-level instructions one at a time, each parsed as soon as the
+        # token after it is read; stops at the first syntax error, leaving
+        # self.failed set
+        self.failed = False
+        for statement in split_statements(tokens):
+            program = self.parse(iter(statement))
+            if program is None or self.failed:
+                self.failed = True
+                return
+            yield from program.instructions.instructions
+
     def error(self, p):
+        self.failed = True
         if p:
             print(f"Syntax error at line {p.lineno}: {p.type}('{p.value}')")
         else:
-            print("Unexpected end of input")
\ No newline at end of file
+            print("Unexpected end of input")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    argparser = argparse.ArgumentParser(description="regenerate parsetab.py from the grammar")
+    argparser.add_argument('--debug', metavar='FILE',
+                           help="also write the grammar and LALR automaton to FILE")
+    args = argparser.parse_args()
+
+    lrtable = LRTable(Mparser._grammar)
+    write_tables(Mparser._grammar, lrtable)
+    print(f"{TABLES_FILE}: {len(lrtable.lr_action)} states, "
+          f"{len(lrtable.sr_conflicts)} shift/reduce and {len(lrtable.rr_conflicts)} reduce/reduce conflicts")
+    if args.debug:
+        with open(args.debug, "w") as file:
+            file.write(str(Mparser._grammar))
+            file.write("\n")
+            file.write(str(lrtable))
\ No newline at end of file
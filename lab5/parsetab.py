@@ -0,0 +1,324 @@
+# LALR tables for parser.Mparser, generated by `python parser.py`.
+# Regenerated whenever the grammar changes; do not edit.
+SIGNATURE = '9c4fd895724db38096f7e9d68c717746c6f3b5a9140c50d940732662fd1e5f20'
+LR_ACTION = {
+    0: {'$end': -2, 'PRINT': 5, 'RETURN': 6, 'CONTINUE': 7, 'BREAK': 8, 'ID': 9, 'FOR': 10, 'WHILE': 11, 'IF': 12, '{': 13},
+    1: {'$end': 0},
+    2: {'$end': -1},
+    3: {'$end': -3, 'PRINT': 5, 'RETURN': 6, 'CONTINUE': 7, 'BREAK': 8, 'ID': 9, 'FOR': 10, 'WHILE': 11, 'IF': 12, '{': 13},
+    4: {'PRINT': -4, 'RETURN': -4, 'CONTINUE': -4, 'BREAK': -4, 'ID': -4, 'FOR': -4, 'WHILE': -4, 'IF': -4, '{': -4, '$end': -4, '}': -4},
+    5: {'STRING': 18, 'EYE': 19, 'ONES': 21, 'ZEROS': 22, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    6: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    7: {';': 30},
+    8: {';': 31},
+    9: {'[': 32, 'DIVASSIGN': 34, 'MULASSIGN': 35, 'SUBASSIGN': 36, 'ADDASSIGN': 37, '=': 33},
+    10: {'ID': 38},
+    11: {'(': 39},
+    12: {'(': 40},
+    13: {'PRINT': 5, 'RETURN': 6, 'CONTINUE': 7, 'BREAK': 8, 'ID': 9, 'FOR': 10, 'WHILE': 11, 'IF': 12, '{': 13},
+    14: {'PRINT': -5, 'RETURN': -5, 'CONTINUE': -5, 'BREAK': -5, 'ID': -5, 'FOR': -5, 'WHILE': -5, 'IF': -5, '{': -5, '$end': -5, '}': -5},
+    15: {';': 42, ',': 43},
+    16: {';': -23, ',': -23},
+    17: {';': -25, ',': -25, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    18: {';': -26, ',': -26, "'": -39, 'DOTDIV': -39, 'DOTMUL': -39, 'DOTSUB': -39, 'DOTADD': -39, '/': -39, '*': -39, '-': -39, '+': -39},
+    19: {'(': 53},
+    20: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    21: {'(': 55},
+    22: {'(': 56},
+    23: {'[': 57, 'ID': 61, 'FLOATNUM': 62, 'INTNUM': 63},
+    24: {"'": -41, 'DOTDIV': -41, 'DOTMUL': -41, 'DOTSUB': -41, 'DOTADD': -41, '/': -41, '*': -41, '-': -41, '+': -41, ';': -41, ',': -41, ')': -41, '>': -41, '<': -41, 'GEQ': -41, 'LEQ': -41, 'NEQ': -41, 'EQ': -41, ':': -41, 'PRINT': -41, 'RETURN': -41, 'CONTINUE': -41, 'BREAK': -41, 'ID': -41, 'FOR': -41, 'WHILE': -41, 'IF': -41, '{': -41},
+    25: {"'": -42, 'DOTDIV': -42, 'DOTMUL': -42, 'DOTSUB': -42, 'DOTADD': -42, '/': -42, '*': -42, '-': -42, '+': -42, ';': -42, ',': -42, ')': -42, '>': -42, '<': -42, 'GEQ': -42, 'LEQ': -42, 'NEQ': -42, 'EQ': -42, ':': -42, 'PRINT': -42, 'RETURN': -42, 'CONTINUE': -42, 'BREAK': -42, 'ID': -42, 'FOR': -42, 'WHILE': -42, 'IF': -42, '{': -42},
+    26: {'[': 64, "'": -45, 'DOTDIV': -45, 'DOTMUL': -45, 'DOTSUB': -45, 'DOTADD': -45, '/': -45, '*': -45, '-': -45, '+': -45, ';': -45, ',': -45, ')': -45, '>': -45, '<': -45, 'GEQ': -45, 'LEQ': -45, 'NEQ': -45, 'EQ': -45, ':': -45, 'PRINT': -45, 'RETURN': -45, 'CONTINUE': -45, 'BREAK': -45, 'ID': -45, 'FOR': -45, 'WHILE': -45, 'IF': -45, '{': -45},
+    27: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    28: {';': 66, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    29: {';': -39, "'": -39, 'DOTDIV': -39, 'DOTMUL': -39, 'DOTSUB': -39, 'DOTADD': -39, '/': -39, '*': -39, '-': -39, '+': -39, ')': -39, ',': -39, '>': -39, '<': -39, 'GEQ': -39, 'LEQ': -39, 'NEQ': -39, 'EQ': -39, ':': -39, 'PRINT': -39, 'RETURN': -39, 'CONTINUE': -39, 'BREAK': -39, 'ID': -39, 'FOR': -39, 'WHILE': -39, 'IF': -39, '{': -39},
+    30: {'PRINT': -8, 'RETURN': -8, 'CONTINUE': -8, 'BREAK': -8, 'ID': -8, 'FOR': -8, 'WHILE': -8, 'IF': -8, '{': -8, '$end': -8, '}': -8, 'ELSE': -8},
+    31: {'PRINT': -9, 'RETURN': -9, 'CONTINUE': -9, 'BREAK': -9, 'ID': -9, 'FOR': -9, 'WHILE': -9, 'IF': -9, '{': -9, '$end': -9, '}': -9, 'ELSE': -9},
+    32: {'INTNUM': 67},
+    33: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    34: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    35: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    36: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    37: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    38: {'=': 73},
+    39: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    40: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    41: {'}': 77, 'PRINT': 5, 'RETURN': 6, 'CONTINUE': 7, 'BREAK': 8, 'ID': 9, 'FOR': 10, 'WHILE': 11, 'IF': 12, '{': 13},
+    42: {'PRINT': -6, 'RETURN': -6, 'CONTINUE': -6, 'BREAK': -6, 'ID': -6, 'FOR': -6, 'WHILE': -6, 'IF': -6, '{': -6, '$end': -6, '}': -6, 'ELSE': -6},
+    43: {'STRING': 18, 'EYE': 19, 'ONES': 21, 'ZEROS': 22, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    44: {"'": -47, 'DOTDIV': -47, 'DOTMUL': -47, 'DOTSUB': -47, 'DOTADD': -47, '/': -47, '*': -47, '-': -47, '+': -47, ';': -47, ',': -47, ')': -47, '>': -47, '<': -47, 'GEQ': -47, 'LEQ': -47, 'NEQ': -47, 'EQ': -47, ':': -47, 'PRINT': -47, 'RETURN': -47, 'CONTINUE': -47, 'BREAK': -47, 'ID': -47, 'FOR': -47, 'WHILE': -47, 'IF': -47, '{': -47},
+    45: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    46: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    47: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    48: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    49: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    50: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    51: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    52: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    53: {'-': 88, 'INTNUM': 89},
+    54: {')': 90, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    55: {'-': 88, 'INTNUM': 89},
+    56: {'-': 88, 'INTNUM': 89},
+    57: {'ID': 61, 'FLOATNUM': 62, 'INTNUM': 63},
+    58: {']': 95, ',': 96},
+    59: {']': -57, ',': -57},
+    60: {']': -59, ',': -59},
+    61: {']': -63, ',': -63},
+    62: {']': -64, ',': -64},
+    63: {']': -65, ',': -65},
+    64: {'INTNUM': 97},
+    65: {"'": 44, 'DOTDIV': -48, 'DOTMUL': -48, 'DOTSUB': -48, 'DOTADD': -48, '/': -48, '*': -48, '-': -48, '+': -48, ';': -48, ',': -48, ')': -48, '>': -48, '<': -48, 'GEQ': -48, 'LEQ': -48, 'NEQ': -48, 'EQ': -48, ':': -48, 'PRINT': -48, 'RETURN': -48, 'CONTINUE': -48, 'BREAK': -48, 'ID': -48, 'FOR': -48, 'WHILE': -48, 'IF': -48, '{': -48},
+    66: {'PRINT': -7, 'RETURN': -7, 'CONTINUE': -7, 'BREAK': -7, 'ID': -7, 'FOR': -7, 'WHILE': -7, 'IF': -7, '{': -7, '$end': -7, '}': -7, 'ELSE': -7},
+    67: {',': 98, ']': 99},
+    68: {';': 100, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    69: {';': 101, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    70: {';': 102, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    71: {';': 103, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    72: {';': 104, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    73: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    74: {')': 107},
+    75: {'>': 108, '<': 109, 'GEQ': 110, 'LEQ': 111, 'NEQ': 112, 'EQ': 113, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    76: {')': 114},
+    77: {'PRINT': -21, 'RETURN': -21, 'CONTINUE': -21, 'BREAK': -21, 'ID': -21, 'FOR': -21, 'WHILE': -21, 'IF': -21, '{': -21, '$end': -21, '}': -21, 'ELSE': -21},
+    78: {';': -24, ',': -24},
+    79: {"'": 44, 'DOTDIV': -49, 'DOTMUL': -49, 'DOTSUB': -49, 'DOTADD': -49, '/': -49, '*': -49, '-': -49, '+': -49, ';': -49, ',': -49, ')': -49, '>': -49, '<': -49, 'GEQ': -49, 'LEQ': -49, 'NEQ': -49, 'EQ': -49, ':': -49, 'PRINT': -49, 'RETURN': -49, 'CONTINUE': -49, 'BREAK': -49, 'ID': -49, 'FOR': -49, 'WHILE': -49, 'IF': -49, '{': -49},
+    80: {"'": 44, 'DOTDIV': -50, 'DOTMUL': -50, 'DOTSUB': -50, 'DOTADD': -50, '/': -50, '*': -50, '-': -50, '+': -50, ';': -50, ',': -50, ')': -50, '>': -50, '<': -50, 'GEQ': -50, 'LEQ': -50, 'NEQ': -50, 'EQ': -50, ':': -50, 'PRINT': -50, 'RETURN': -50, 'CONTINUE': -50, 'BREAK': -50, 'ID': -50, 'FOR': -50, 'WHILE': -50, 'IF': -50, '{': -50},
+    81: {"'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': -51, 'DOTADD': -51, '/': 49, '*': 50, '-': -51, '+': -51, ';': -51, ',': -51, ')': -51, '>': -51, '<': -51, 'GEQ': -51, 'LEQ': -51, 'NEQ': -51, 'EQ': -51, ':': -51, 'PRINT': -51, 'RETURN': -51, 'CONTINUE': -51, 'BREAK': -51, 'ID': -51, 'FOR': -51, 'WHILE': -51, 'IF': -51, '{': -51},
+    82: {"'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': -52, 'DOTADD': -52, '/': 49, '*': 50, '-': -52, '+': -52, ';': -52, ',': -52, ')': -52, '>': -52, '<': -52, 'GEQ': -52, 'LEQ': -52, 'NEQ': -52, 'EQ': -52, ':': -52, 'PRINT': -52, 'RETURN': -52, 'CONTINUE': -52, 'BREAK': -52, 'ID': -52, 'FOR': -52, 'WHILE': -52, 'IF': -52, '{': -52},
+    83: {"'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': -53, 'DOTADD': -53, '/': -53, '*': -53, '-': -53, '+': -53, ';': -53, ',': -53, ')': -53, '>': -53, '<': -53, 'GEQ': -53, 'LEQ': -53, 'NEQ': -53, 'EQ': -53, ':': -53, 'PRINT': -53, 'RETURN': -53, 'CONTINUE': -53, 'BREAK': -53, 'ID': -53, 'FOR': -53, 'WHILE': -53, 'IF': -53, '{': -53},
+    84: {"'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': -54, 'DOTADD': -54, '/': -54, '*': -54, '-': -54, '+': -54, ';': -54, ',': -54, ')': -54, '>': -54, '<': -54, 'GEQ': -54, 'LEQ': -54, 'NEQ': -54, 'EQ': -54, ':': -54, 'PRINT': -54, 'RETURN': -54, 'CONTINUE': -54, 'BREAK': -54, 'ID': -54, 'FOR': -54, 'WHILE': -54, 'IF': -54, '{': -54},
+    85: {"'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': -55, '+': -55, ';': -55, ',': -55, ')': -55, '>': -55, '<': -55, 'GEQ': -55, 'LEQ': -55, 'NEQ': -55, 'EQ': -55, ':': -55, 'PRINT': -55, 'RETURN': -55, 'CONTINUE': -55, 'BREAK': -55, 'ID': -55, 'FOR': -55, 'WHILE': -55, 'IF': -55, '{': -55},
+    86: {"'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': -56, '+': -56, ';': -56, ',': -56, ')': -56, '>': -56, '<': -56, 'GEQ': -56, 'LEQ': -56, 'NEQ': -56, 'EQ': -56, ':': -56, 'PRINT': -56, 'RETURN': -56, 'CONTINUE': -56, 'BREAK': -56, 'ID': -56, 'FOR': -56, 'WHILE': -56, 'IF': -56, '{': -56},
+    87: {',': 115, ')': 116},
+    88: {'INTNUM': 117},
+    89: {',': -67, ')': -67},
+    90: {"'": -46, 'DOTDIV': -46, 'DOTMUL': -46, 'DOTSUB': -46, 'DOTADD': -46, '/': -46, '*': -46, '-': -46, '+': -46, ';': -46, ',': -46, ')': -46, '>': -46, '<': -46, 'GEQ': -46, 'LEQ': -46, 'NEQ': -46, 'EQ': -46, ':': -46, 'PRINT': -46, 'RETURN': -46, 'CONTINUE': -46, 'BREAK': -46, 'ID': -46, 'FOR': -46, 'WHILE': -46, 'IF': -46, '{': -46},
+    91: {',': 118, ')': 119},
+    92: {',': 120, ')': 121},
+    93: {']': 122, ',': 123},
+    94: {']': -61, ',': -61},
+    95: {"'": -40, 'DOTDIV': -40, 'DOTMUL': -40, 'DOTSUB': -40, 'DOTADD': -40, '/': -40, '*': -40, '-': -40, '+': -40, ';': -40, ',': -40, ')': -40, '>': -40, '<': -40, 'GEQ': -40, 'LEQ': -40, 'NEQ': -40, 'EQ': -40, ':': -40, 'PRINT': -40, 'RETURN': -40, 'CONTINUE': -40, 'BREAK': -40, 'ID': -40, 'FOR': -40, 'WHILE': -40, 'IF': -40, '{': -40},
+    96: {'[': 57, 'ID': 61, 'FLOATNUM': 62, 'INTNUM': 63},
+    97: {',': 125, ']': 126},
+    98: {'INTNUM': 127},
+    99: {'=': 128},
+    100: {'PRINT': -16, 'RETURN': -16, 'CONTINUE': -16, 'BREAK': -16, 'ID': -16, 'FOR': -16, 'WHILE': -16, 'IF': -16, '{': -16, '$end': -16, '}': -16, 'ELSE': -16},
+    101: {'PRINT': -12, 'RETURN': -12, 'CONTINUE': -12, 'BREAK': -12, 'ID': -12, 'FOR': -12, 'WHILE': -12, 'IF': -12, '{': -12, '$end': -12, '}': -12, 'ELSE': -12},
+    102: {'PRINT': -13, 'RETURN': -13, 'CONTINUE': -13, 'BREAK': -13, 'ID': -13, 'FOR': -13, 'WHILE': -13, 'IF': -13, '{': -13, '$end': -13, '}': -13, 'ELSE': -13},
+    103: {'PRINT': -14, 'RETURN': -14, 'CONTINUE': -14, 'BREAK': -14, 'ID': -14, 'FOR': -14, 'WHILE': -14, 'IF': -14, '{': -14, '$end': -14, '}': -14, 'ELSE': -14},
+    104: {'PRINT': -15, 'RETURN': -15, 'CONTINUE': -15, 'BREAK': -15, 'ID': -15, 'FOR': -15, 'WHILE': -15, 'IF': -15, '{': -15, '$end': -15, '}': -15, 'ELSE': -15},
+    105: {'PRINT': 5, 'RETURN': 6, 'CONTINUE': 7, 'BREAK': 8, 'ID': 9, 'FOR': 10, 'WHILE': 11, 'IF': 12, '{': 13},
+    106: {':': 130, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    107: {'PRINT': 5, 'RETURN': 6, 'CONTINUE': 7, 'BREAK': 8, 'ID': 9, 'FOR': 10, 'WHILE': 11, 'IF': 12, '{': 13},
+    108: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    109: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    110: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    111: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    112: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    113: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    114: {'PRINT': 5, 'RETURN': 6, 'CONTINUE': 7, 'BREAK': 8, 'ID': 9, 'FOR': 10, 'WHILE': 11, 'IF': 12, '{': 13},
+    115: {'-': 88, 'INTNUM': 89},
+    116: {"'": -34, 'DOTDIV': -34, 'DOTMUL': -34, 'DOTSUB': -34, 'DOTADD': -34, '/': -34, '*': -34, '-': -34, '+': -34, ';': -34, ',': -34, ')': -34, '>': -34, '<': -34, 'GEQ': -34, 'LEQ': -34, 'NEQ': -34, 'EQ': -34, ':': -34, 'PRINT': -34, 'RETURN': -34, 'CONTINUE': -34, 'BREAK': -34, 'ID': -34, 'FOR': -34, 'WHILE': -34, 'IF': -34, '{': -34},
+    117: {',': -66, ')': -66},
+    118: {'-': 88, 'INTNUM': 89},
+    119: {"'": -36, 'DOTDIV': -36, 'DOTMUL': -36, 'DOTSUB': -36, 'DOTADD': -36, '/': -36, '*': -36, '-': -36, '+': -36, ';': -36, ',': -36, ')': -36, '>': -36, '<': -36, 'GEQ': -36, 'LEQ': -36, 'NEQ': -36, 'EQ': -36, ':': -36, 'PRINT': -36, 'RETURN': -36, 'CONTINUE': -36, 'BREAK': -36, 'ID': -36, 'FOR': -36, 'WHILE': -36, 'IF': -36, '{': -36},
+    120: {'-': 88, 'INTNUM': 89},
+    121: {"'": -38, 'DOTDIV': -38, 'DOTMUL': -38, 'DOTSUB': -38, 'DOTADD': -38, '/': -38, '*': -38, '-': -38, '+': -38, ';': -38, ',': -38, ')': -38, '>': -38, '<': -38, 'GEQ': -38, 'LEQ': -38, 'NEQ': -38, 'EQ': -38, ':': -38, 'PRINT': -38, 'RETURN': -38, 'CONTINUE': -38, 'BREAK': -38, 'ID': -38, 'FOR': -38, 'WHILE': -38, 'IF': -38, '{': -38},
+    122: {']': -60, ',': -60},
+    123: {'ID': 61, 'FLOATNUM': 62, 'INTNUM': 63},
+    124: {']': -58, ',': -58},
+    125: {'INTNUM': 143},
+    126: {"'": -44, 'DOTDIV': -44, 'DOTMUL': -44, 'DOTSUB': -44, 'DOTADD': -44, '/': -44, '*': -44, '-': -44, '+': -44, ';': -44, ',': -44, ')': -44, '>': -44, '<': -44, 'GEQ': -44, 'LEQ': -44, 'NEQ': -44, 'EQ': -44, ':': -44, 'PRINT': -44, 'RETURN': -44, 'CONTINUE': -44, 'BREAK': -44, 'ID': -44, 'FOR': -44, 'WHILE': -44, 'IF': -44, '{': -44},
+    127: {']': 144},
+    128: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    129: {'PRINT': -17, 'RETURN': -17, 'CONTINUE': -17, 'BREAK': -17, 'ID': -17, 'FOR': -17, 'WHILE': -17, 'IF': -17, '{': -17, '$end': -17, '}': -17, 'ELSE': -17},
+    130: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    131: {'PRINT': -18, 'RETURN': -18, 'CONTINUE': -18, 'BREAK': -18, 'ID': -18, 'FOR': -18, 'WHILE': -18, 'IF': -18, '{': -18, '$end': -18, '}': -18, 'ELSE': -18},
+    132: {')': -27, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    133: {')': -28, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    134: {')': -29, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    135: {')': -30, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    136: {')': -31, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    137: {')': -32, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    138: {'ELSE': 147, 'PRINT': -20, 'RETURN': -20, 'CONTINUE': -20, 'BREAK': -20, 'ID': -20, 'FOR': -20, 'WHILE': -20, 'IF': -20, '{': -20, '$end': -20, '}': -20},
+    139: {')': 148},
+    140: {')': 149},
+    141: {')': 150},
+    142: {']': -62, ',': -62},
+    143: {']': 151},
+    144: {'=': 152},
+    145: {';': 153, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    146: {'PRINT': -22, 'RETURN': -22, 'CONTINUE': -22, 'BREAK': -22, 'ID': -22, 'FOR': -22, 'WHILE': -22, 'IF': -22, '{': -22, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    147: {'PRINT': 5, 'RETURN': 6, 'CONTINUE': 7, 'BREAK': 8, 'ID': 9, 'FOR': 10, 'WHILE': 11, 'IF': 12, '{': 13},
+    148: {"'": -33, 'DOTDIV': -33, 'DOTMUL': -33, 'DOTSUB': -33, 'DOTADD': -33, '/': -33, '*': -33, '-': -33, '+': -33, ';': -33, ',': -33, ')': -33, '>': -33, '<': -33, 'GEQ': -33, 'LEQ': -33, 'NEQ': -33, 'EQ': -33, ':': -33, 'PRINT': -33, 'RETURN': -33, 'CONTINUE': -33, 'BREAK': -33, 'ID': -33, 'FOR': -33, 'WHILE': -33, 'IF': -33, '{': -33},
+    149: {"'": -35, 'DOTDIV': -35, 'DOTMUL': -35, 'DOTSUB': -35, 'DOTADD': -35, '/': -35, '*': -35, '-': -35, '+': -35, ';': -35, ',': -35, ')': -35, '>': -35, '<': -35, 'GEQ': -35, 'LEQ': -35, 'NEQ': -35, 'EQ': -35, ':': -35, 'PRINT': -35, 'RETURN': -35, 'CONTINUE': -35, 'BREAK': -35, 'ID': -35, 'FOR': -35, 'WHILE': -35, 'IF': -35, '{': -35},
+    150: {"'": -37, 'DOTDIV': -37, 'DOTMUL': -37, 'DOTSUB': -37, 'DOTADD': -37, '/': -37, '*': -37, '-': -37, '+': -37, ';': -37, ',': -37, ')': -37, '>': -37, '<': -37, 'GEQ': -37, 'LEQ': -37, 'NEQ': -37, 'EQ': -37, ':': -37, 'PRINT': -37, 'RETURN': -37, 'CONTINUE': -37, 'BREAK': -37, 'ID': -37, 'FOR': -37, 'WHILE': -37, 'IF': -37, '{': -37},
+    151: {"'": -43, 'DOTDIV': -43, 'DOTMUL': -43, 'DOTSUB': -43, 'DOTADD': -43, '/': -43, '*': -43, '-': -43, '+': -43, ';': -43, ',': -43, ')': -43, '>': -43, '<': -43, 'GEQ': -43, 'LEQ': -43, 'NEQ': -43, 'EQ': -43, ':': -43, 'PRINT': -43, 'RETURN': -43, 'CONTINUE': -43, 'BREAK': -43, 'ID': -43, 'FOR': -43, 'WHILE': -43, 'IF': -43, '{': -43},
+    152: {'EYE': 19, 'ONES': 21, 'ZEROS': 22, 'STRING': 29, '[': 23, 'FLOATNUM': 24, 'INTNUM': 25, 'ID': 26, '(': 20, '-': 27},
+    153: {'PRINT': -11, 'RETURN': -11, 'CONTINUE': -11, 'BREAK': -11, 'ID': -11, 'FOR': -11, 'WHILE': -11, 'IF': -11, '{': -11, '$end': -11, '}': -11, 'ELSE': -11},
+    154: {'PRINT': -19, 'RETURN': -19, 'CONTINUE': -19, 'BREAK': -19, 'ID': -19, 'FOR': -19, 'WHILE': -19, 'IF': -19, '{': -19, '$end': -19, '}': -19, 'ELSE': -19},
+    155: {';': 156, "'": 44, 'DOTDIV': 45, 'DOTMUL': 46, 'DOTSUB': 47, 'DOTADD': 48, '/': 49, '*': 50, '-': 51, '+': 52},
+    156: {'PRINT': -10, 'RETURN': -10, 'CONTINUE': -10, 'BREAK': -10, 'ID': -10, 'FOR': -10, 'WHILE': -10, 'IF': -10, '{': -10, '$end': -10, '}': -10, 'ELSE': -10},
+}
+LR_GOTO = {
+    0: {'program': 1, 'instructions_opt': 2, 'instructions': 3, 'instruction': 4},
+    1: {},
+    2: {},
+    3: {'instruction': 14},
+    4: {},
+    5: {'print_list': 15, 'print_item': 16, 'expression': 17},
+    6: {'expression': 28},
+    7: {},
+    8: {},
+    9: {},
+    10: {},
+    11: {},
+    12: {},
+    13: {'instructions': 41, 'instruction': 4},
+    14: {},
+    15: {},
+    16: {},
+    17: {},
+    18: {},
+    19: {},
+    20: {'expression': 54},
+    21: {},
+    22: {},
+    23: {'inner_lists': 58, 'inner_item': 59, 'elem': 60},
+    24: {},
+    25: {},
+    26: {},
+    27: {'expression': 65},
+    28: {},
+    29: {},
+    30: {},
+    31: {},
+    32: {},
+    33: {'expression': 68},
+    34: {'expression': 69},
+    35: {'expression': 70},
+    36: {'expression': 71},
+    37: {'expression': 72},
+    38: {},
+    39: {'condition': 74, 'expression': 75},
+    40: {'condition': 76, 'expression': 75},
+    41: {'instruction': 14},
+    42: {},
+    43: {'print_item': 78, 'expression': 17},
+    44: {},
+    45: {'expression': 79},
+    46: {'expression': 80},
+    47: {'expression': 81},
+    48: {'expression': 82},
+    49: {'expression': 83},
+    50: {'expression': 84},
+    51: {'expression': 85},
+    52: {'expression': 86},
+    53: {'matrix_size': 87},
+    54: {},
+    55: {'matrix_size': 91},
+    56: {'matrix_size': 92},
+    57: {'elem_list': 93, 'elem': 94},
+    58: {},
+    59: {},
+    60: {},
+    61: {},
+    62: {},
+    63: {},
+    64: {},
+    65: {},
+    66: {},
+    67: {},
+    68: {},
+    69: {},
+    70: {},
+    71: {},
+    72: {},
+    73: {'range_expr': 105, 'expression': 106},
+    74: {},
+    75: {},
+    76: {},
+    77: {},
+    78: {},
+    79: {},
+    80: {},
+    81: {},
+    82: {},
+    83: {},
+    84: {},
+    85: {},
+    86: {},
+    87: {},
+    88: {},
+    89: {},
+    90: {},
+    91: {},
+    92: {},
+    93: {},
+    94: {},
+    95: {},
+    96: {'inner_item': 124, 'elem': 60},
+    97: {},
+    98: {},
+    99: {},
+    100: {},
+    101: {},
+    102: {},
+    103: {},
+    104: {},
+    105: {'instruction': 129},
+    106: {},
+    107: {'instruction': 131},
+    108: {'expression': 132},
+    109: {'expression': 133},
+    110: {'expression': 134},
+    111: {'expression': 135},
+    112: {'expression': 136},
+    113: {'expression': 137},
+    114: {'instruction': 138},
+    115: {'matrix_size': 139},
+    116: {},
+    117: {},
+    118: {'matrix_size': 140},
+    119: {},
+    120: {'matrix_size': 141},
+    121: {},
+    122: {},
+    123: {'elem': 142},
+    124: {},
+    125: {},
+    126: {},
+    127: {},
+    128: {'expression': 145},
+    129: {},
+    130: {'expression': 146},
+    131: {},
+    132: {},
+    133: {},
+    134: {},
+    135: {},
+    136: {},
+    137: {},
+    138: {},
+    139: {},
+    140: {},
+    141: {},
+    142: {},
+    143: {},
+    144: {},
+    145: {},
+    146: {},
+    147: {'instruction': 154},
+    148: {},
+    149: {},
+    150: {},
+    151: {},
+    152: {'expression': 155},
+    153: {},
+    154: {},
+    155: {},
+    156: {},
+}
+DEFAULTED_STATES = {
+    2: -1,
+}
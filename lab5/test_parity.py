@@ -0,0 +1,52 @@
+import os
+import sys
+import glob
+import functools
+import subprocess
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PROGRAMS = sorted(os.path.basename(path) for path in glob.glob(os.path.join(HERE, "*.m")))
+
+BACKENDS = ('tree', 'stack', 'lazy', 'vm', 'closure', 'python')
+
+INTERPRETERS = ('tree', 'stack', 'lazy')
+
+# Every interpreter pass at once
+PASSES = ('--vectorize', '--hoist', '--reorder', '--fuse', '--in-place', '--pool', '256')
+
+# Flags any backend takes, and those only the interpreters take
+FLAGS = [(), ('-O',), ('--share',), ('--flat',)]
+INTERPRETER_FLAGS = [('--incremental',), ('--incremental', '--share', '--flat'), PASSES, PASSES + ('-O', '--share'),
+                     PASSES + ('--incremental', '--flat')]
+
+RUNS = ([(backend, flags) for backend in BACKENDS for flags in FLAGS]
+        + [(backend, flags) for backend in INTERPRETERS for flags in INTERPRETER_FLAGS])
+
+
+def run(program, *args):
+    result = subprocess.run([sys.executable, "main.py", "--no-cache", *args, program], cwd=HERE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=120)
+    return result.stdout
+
+
+@functools.lru_cache(maxsize=None)
+def expected(program):
+    # What the plain tree-walking interpreter prints
+    return run(program)
+
+
+@pytest.mark.parametrize("backend,flags", RUNS, ids=[" ".join((backend,) + flags) for backend, flags in RUNS])
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_output_matches_tree_walker(program, backend, flags):
+    assert run(program, "--backend", backend, *flags) == expected(program)
+
+
+# The baseline tree walker ran this under its raised recursion limit
+@pytest.mark.parametrize("args", [()] + [("--backend", backend) for backend in BACKENDS],
+                         ids=["default"] + list(BACKENDS))
+def test_long_expression_chain(tmp_path, args):
+    program = tmp_path / "chain.m"
+    program.write_text("x = " + " + ".join(["1"] * 1000) + ";\nprint x;\n")
+    assert run(str(program), *args) == "1000\n"
@@ -0,0 +1,20 @@
+import os
+import re
+from ParseCache import GRAMMAR_FILES
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT = re.compile(r"^\s*(?:from\s+(\w+)\s+import|import\s+(\w+))", re.M)
+
+
+def test_grammar_files_cover_their_imports():
+    # Every module here that a grammar file imports, directly or not, is
+    # hashed into the cache version too
+    missing = set()
+    for name in GRAMMAR_FILES:
+        with open(os.path.join(HERE, name)) as file:
+            for match in IMPORT.finditer(file.read()):
+                module = (match.group(1) or match.group(2)) + ".py"
+                if os.path.exists(os.path.join(HERE, module)) and module not in GRAMMAR_FILES:
+                    missing.add(module)
+    assert not missing
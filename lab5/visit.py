@@ -1,6 +1,13 @@
+import sys
 import inspect
+from types import GeneratorType
 
-__all__ = ['on', 'when']
+__all__ = ['on', 'when', 'CachedDispatch', 'trampoline']
+
+# Visitors evaluating or compiling a node by visiting its children in nested
+# calls (Interpreter, Compiler, ClosureCompiler, Transpiler) recurse as deep
+# as expressions nest
+sys.setrecursionlimit(10000)
 
 
 def on(param_name):
@@ -30,6 +37,7 @@ class Dispatcher(object):
     def __init__(self, param_name, fn):
         self.param_index = self.__argspec(fn).args.index(param_name)
         self.param_name = param_name
+        self.default = fn
         self.targets = {}
 
     def __call__(self, *args, **kw):
@@ -53,3 +61,79 @@ class Dispatcher(object):
             return inspect.getfullargspec(fn)
         else:
             return inspect.getargspec(fn)
+
+    def method(self):
+        # Plain function doing what __call__ does, for CachedDispatch classes.
+        # Registered types hit `cache` directly; other types are resolved
+        # once along their MRO (falling back to the @on function) and cached.
+        targets = dict(self.targets)
+        cache = dict(targets)
+        default = self.default
+        param_index = self.param_index
+
+        def resolve(typ):
+            for base in typ.__mro__:
+                if base in targets:
+                    cache[typ] = targets[base]
+                    break
+            else:
+                cache[typ] = default
+            return cache[typ]
+
+        if param_index == 1:
+            def dispatch(self, node, *args, **kw):
+                try:
+                    fn = cache[node.__class__]
+                except KeyError:
+                    fn = resolve(node.__class__)
+                if args or kw:
+                    return fn(self, node, *args, **kw)
+                return fn(self, node)
+        else:
+            def dispatch(*args, **kw):
+                typ = args[param_index].__class__
+                try:
+                    fn = cache[typ]
+                except KeyError:
+                    fn = resolve(typ)
+                return fn(*args, **kw)
+        dispatch.__name__ = default.__name__
+        dispatch.dispatcher = self
+        return dispatch
+
+
+class CachedDispatch(object):
+    # Base class opting a visitor into table dispatch: when the class is
+    # created every @on/@when method is replaced by Dispatcher.method(),
+    # dropping the `ff` wrapper frame and the per-call issubclass scan.
+    def __init_subclass__(cls, **kw):
+        super().__init_subclass__(**kw)
+        for name, value in list(vars(cls).items()):
+            dispatcher = value if isinstance(value, Dispatcher) else getattr(value, 'dispatcher', None)
+            if isinstance(dispatcher, Dispatcher):
+                setattr(cls, name, dispatcher.method())
+
+
+def trampoline(call, item):
+    # Runs call(item) without nesting Python calls: when it returns a
+    # generator, every item the generator yields is passed to `call` in turn
+    # and the result sent back in, the generator's return value being the
+    # result. Generators in progress wait on an explicit stack, so recursion
+    # written this way goes as deep as the tree does.
+    result = call(item)
+    if result.__class__ is not GeneratorType:
+        return result
+    stack = [result]
+    result = None
+    while stack:
+        try:
+            item = stack[-1].send(result)
+        except StopIteration as stop:
+            stack.pop()
+            result = stop.value
+            continue
+        result = call(item)
+        if result.__class__ is GeneratorType:
+            stack.append(result)
+            result = None
+    return result